@@ -8,6 +8,38 @@ GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-flash-latest")
 AMAZON_TAG = os.getenv("AMAZON_TAG", "demo-22")
 RAKUTEN_ID = os.getenv("RAKUTEN_ID", "demo-11")
 GOOGLE_ANALYTICS_ID = os.getenv("GOOGLE_ANALYTICS_ID", "G-XXXXXXXXXX") # Placeholder
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "10")) # Requests per minute, shared by all processes
+GEMINI_RPD = int(os.getenv("GEMINI_RPD", "250")) # Requests per day, shared by all processes
+GEMINI_DAILY_TOKENS = int(os.getenv("GEMINI_DAILY_TOKENS", "0")) # Tokens per day (0 = no limit)
+QUOTA_STATE_PATH = os.getenv("GAIA_QUOTA_STATE_PATH", "data/quota_state.json")
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "3")) # Generation requests kept in flight
+GEMINI_MAX_OUTPUT_TOKENS = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "65536")) # Output budget per request
+BULK_MAX_BATCH = int(os.getenv("BULK_MAX_BATCH", "8")) # Upper bound for adaptive batch size
+BULK_TOKENS_PER_ARTICLE = int(os.getenv("BULK_TOKENS_PER_ARTICLE", "6000")) # Initial output estimate per article
+GEMINI_STREAM = os.getenv("GEMINI_STREAM", "0") == "1" # Stream bulk responses and publish articles as they complete
+GEMINI_CACHE_ENABLED = os.getenv("GEMINI_CACHE_ENABLED", "0") == "1" # Opt-in response cache
+GEMINI_CACHE_DIR = os.getenv("GEMINI_CACHE_DIR", "data/cache/gemini")
+GEMINI_CACHE_MAX_MB = int(os.getenv("GEMINI_CACHE_MAX_MB", "200"))
+GEMINI_CACHE_MAX_AGE_DAYS = int(os.getenv("GEMINI_CACHE_MAX_AGE_DAYS", "30"))
+CATALOG_PATH = os.getenv("GAIA_CATALOG_PATH", "catalog.db") # SQLite article catalog next to docs/
+CONTENT_STORE_PATH = os.getenv("GAIA_CONTENT_STORE_PATH", "data/content/articles.pack") # Source records of every article
+TOPIC_QUEUE_PATH = os.getenv("GAIA_TOPIC_QUEUE_PATH", "data/topics.db") # Pending/in-flight/done/failed topics
+TOPIC_MAX_ATTEMPTS = int(os.getenv("TOPIC_MAX_ATTEMPTS", "3")) # Failed generations before a topic is parked as failed
+TOPIC_RETRY_BACKOFF_MINUTES = int(os.getenv("TOPIC_RETRY_BACKOFF_MINUTES", "10")) # Doubles with every failed attempt
+SIMILARITY_INDEX_PATH = os.getenv("GAIA_SIMILARITY_INDEX_PATH", "data/similarity.db") # MinHash/LSH index of published articles
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.2")) # Estimated Jaccard of 3-gram sets; rewrites of the same product score ~0.2-0.3
+SIMILARITY_ACTION = os.getenv("SIMILARITY_ACTION", "flag") # off | flag | reject | rewrite
+RELATED_DIR = os.getenv("GAIA_RELATED_DIR", "data/related") # TF-IDF matrix and neighbour lists for 関連記事
+RELATED_COUNT = int(os.getenv("RELATED_COUNT", "5")) # Related articles linked from each page
+OUTPUT_MINIFY_HTML = os.getenv("OUTPUT_MINIFY_HTML", "1") == "1" # Strip indentation/blank lines/comments (<pre>, scripts and JSON-LD untouched)
+OUTPUT_PRECOMPRESS = os.getenv("OUTPUT_PRECOMPRESS", "1") == "1" # .gz (and .br with the brotli package) next to HTML/XML/JSON
+AFFILIATE_KEYWORDS_PATH = os.getenv("AFFILIATE_KEYWORDS_PATH", "config/affiliate_keywords.tsv") # Product/brand names linked in article bodies
+AFFILIATE_LINKS_PER_ARTICLE = int(os.getenv("AFFILIATE_LINKS_PER_ARTICLE", "10")) # In-body affiliate links per article (0 = off)
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "1") == "1" # Per-stage timings of each run as JSONL
+TELEMETRY_PATH = os.getenv("GAIA_TELEMETRY_PATH", "logs/telemetry.jsonl") # Read by tools/show_stats.py
+DEPLOY_REMOTE = os.getenv("DEPLOY_REMOTE", "origin")
+DEPLOY_BRANCH = os.getenv("DEPLOY_BRANCH", "main")
+DEPLOY_PUSH_INTERVAL_MINUTES = int(os.getenv("DEPLOY_PUSH_INTERVAL_MINUTES", "30")) # Runs in between only commit locally
 
 if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY not found in environment variables.")
@@ -2,8 +2,8 @@ import streamlit as st
 import os
 import pandas as pd
 from datetime import datetime
-import glob
-from config.settings import GOOGLE_ANALYTICS_ID
+from config.settings import GOOGLE_ANALYTICS_ID, CATALOG_PATH
+from src.publisher.catalog import ArticleCatalog
 
 # Page Config
 st.set_page_config(page_title="Gaia Dashboard", layout="wide")
@@ -17,8 +17,8 @@ ga_id = st.sidebar.text_input("GA4 Measurement ID", value=GOOGLE_ANALYTICS_ID)
 # Metrics
 st.markdown("### 📊 Project Overview")
 docs_dir = "docs"
-files = glob.glob(os.path.join(docs_dir, "article_*.html"))
-total_articles = len(files)
+catalog = ArticleCatalog(CATALOG_PATH)
+total_articles = catalog.count()
 
 col1, col2, col3 = st.columns(3)
 col1.metric("Total Articles", total_articles)
@@ -42,22 +42,11 @@ st.markdown("---")
 st.markdown("### 📝 Recent Articles")
 
 article_data = []
-for f in sorted(files, key=os.path.getmtime, reverse=True)[:10]:
-    title = "Unknown Title"
-    try:
-        with open(f, 'r', encoding='utf-8') as file:
-            content = file.read()
-            import re
-            m = re.search(r'<title>(.*?)</title>', content)
-            if m:
-                title = m.group(1)
-    except:
-        pass
-    
+for a in catalog.list_articles(limit=10):
     article_data.append({
-        "Date": datetime.fromtimestamp(os.path.getmtime(f)).strftime('%Y-%m-%d %H:%M'),
-        "Title": title,
-        "Filename": os.path.basename(f)
+        "Date": a['published_at'][:16].replace('T', ' '),
+        "Title": a['title'],
+        "Filename": a['filename']
     })
 
 if article_data:
@@ -1,280 +1,237 @@
 import argparse
-import random
 import os
-import json
-import time
-from datetime import datetime
+import sys
 from src.generator.gemini_client import GeminiClient
+from src.generator.response_cache import add_cache_arguments, cache_from_args
 from src.generator.prompts import Prompts
+from src.generator.json_extract import extract_articles, dump_failed_response
 from src.publisher.html_generator import HtmlGenerator
 from src.publisher.affiliate import AffiliateInjector
-from config.settings import AMAZON_TAG, RAKUTEN_ID
-
-def deploy_to_github():
-    """Automates the git push process."""
+from src.publisher.deploy import GitDeployer, DeployError
+from src.publisher.similarity import DuplicateGuard, DuplicateRejected
+from src.utils.logger import LOG_FILE
+from src.utils.telemetry import telemetry
+from src.pipeline.publish import process_article
+from src.pipeline.bulk import BulkRunner
+from src.pipeline.topic_queue import TopicQueue, TOPICS_FILE, COMPLETED_TOPICS_FILE
+from src.pipeline.batch_sizer import AdaptiveBatchSizer
+from src.utils.quota import (QuotaGovernor, QuotaExhausted, InstanceLock, AlreadyRunning,
+                             EXIT_QUOTA_EXHAUSTED, EXIT_ALREADY_RUNNING)
+from config.settings import (AMAZON_TAG, RAKUTEN_ID, BULK_CONCURRENCY, GEMINI_RPM, GEMINI_STREAM,
+                             TELEMETRY_ENABLED, TELEMETRY_PATH)
+
+def deploy_to_github(generator):
+    """Commits the files this run wrote; pushes once the deploy interval has elapsed."""
     print("Deploying to GitHub...")
-    try:
-        os.system('git add .')
-        os.system('git commit -m "Auto-deploy: New content generated"')
-        os.system('git push origin main')
-        print("Deploy successful.")
-    except Exception as e:
-        print(f"Deploy failed: {e}")
-
-def process_article(topic, title, content, injector, generator, search_query=None, slug=None, meta_description=None):
-    """Common logic to process a single article."""
-    # 2. Inject Affiliate Links
-    print(f"Injecting affiliate links for: {title}")
-    
-    # Use specific search query if available, otherwise topic
-    query = search_query if search_query else topic
-    print(f"  Using search query: {query}")
-
-    # Generate structured product card HTML
-    card_html = injector.generate_product_card(query)
-    
-    # Ensure content is string and append card
-    full_content = str(content) + "\n\n" + card_html
-    full_content = injector.inject_links(full_content)
-
-    # 3. Publish Content
-    # Use slug if available, else timestamp
-    if slug:
-        filename = f"{slug}.html"
-    else:
-        # Fallback to timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        filename = f"article_{timestamp}.html"
-    
-    filepath = generator.generate_article(title, full_content, filename, meta_description)
-    return filepath
+    paths = generator.written_paths() + [COMPLETED_TOPICS_FILE, LOG_FILE]
+    with telemetry.stage("deploy", items=len(paths)) as event:
+        try:
+            event['pushed'] = GitDeployer.from_settings().deploy(paths)
+        except DeployError as e:
+            print(f"Deploy failed: {e}")
+            event.update(ok=False, error=str(e)[:200])
+
+def make_duplicate_guard(client):
+    """DuplicateGuard per settings; 'rewrite' asks Gemini for a different angle on the same topic."""
+    def rewrite(title, content, matches):
+        prompt = Prompts.REWRITE_DISTINCT.format(title=title, existing_title=matches[0][2], content=content)
+        return client.generate_content(prompt)
+    return DuplicateGuard.from_settings(rewriter=rewrite)
 
 def main():
     parser = argparse.ArgumentParser(description="Gaia Content Automation")
     parser.add_argument("--topic", type=str, help="Topic to write about")
     parser.add_argument("--type", type=str, default="article", choices=["article", "news"], help="Type of content")
     parser.add_argument("--bulk", type=int, default=0, help="Number of articles to generate in bulk")
+    parser.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY, help="Bulk mode: generation requests kept in flight")
+    parser.add_argument("--rpm", type=int, default=GEMINI_RPM, help="Max Gemini requests per minute, shared with other running processes")
+    parser.add_argument("--batch-size", type=int, default=0, help="Bulk mode: fixed topics per request (default: adaptive)")
+    stream_group = parser.add_mutually_exclusive_group()
+    stream_group.add_argument("--stream", dest="stream", action="store_true", default=GEMINI_STREAM,
+                              help="Bulk mode: stream responses and publish each article as soon as it is complete")
+    stream_group.add_argument("--no-stream", dest="stream", action="store_false",
+                              help="Bulk mode: wait for whole responses (default unless GEMINI_STREAM=1)")
+    add_cache_arguments(parser)
     args = parser.parse_args()
 
-    client = GeminiClient()
+    client = GeminiClient(governor=QuotaGovernor.from_settings(rpm=args.rpm),
+                          cache=cache_from_args(args), refresh=args.refresh)
     injector = AffiliateInjector(amazon_tag=AMAZON_TAG, rakuten_id=RAKUTEN_ID)
     generator = HtmlGenerator()
 
-    def clean_topic(text):
-        """Removes leading numbers, bullets, and whitespace from topic."""
-        # Remove leading bullets, numbers, dots, and whitespace
-        # e.g. "1. Topic", "- Topic", "123. Topic"
-        import re
-        cleaned = re.sub(r'^[\d\.\-\*\s]+', '', text)
-        return cleaned.strip()
-
     if args.bulk > 0:
-        print(f"Starting Gaia Bulk Mode... Target: {args.bulk} articles")
-        # Load topics
-        topics_pool = []
-        if os.path.exists("config/topics.txt"):
-            with open("config/topics.txt", "r", encoding="utf-8") as f:
-                topics_pool = [
-                    clean_topic(line)
-                    for line in f 
-                    if line.strip() and len(line) < 50 and not line.strip().startswith("以下")
-                ]
-        
-        # Deduplication Logic
-        completed_topics = set()
-        if os.path.exists("logs/completed_topics.txt"):
-             with open("logs/completed_topics.txt", "r", encoding="utf-8") as f:
-                completed_topics = {line.strip() for line in f if line.strip()}
-        
-        original_count = len(topics_pool)
-        topics_pool = [t for t in topics_pool if t not in completed_topics]
-        print(f"Loaded {original_count} topics. {len(completed_topics)} already done. Remaining: {len(topics_pool)}")
-        
-        if not topics_pool:
-            print("No topics found in config/topics.txt for bulk generation.")
-            return
-
-        total_needed = args.bulk
-        processed = 0
-        batch_size = 1
-
-        while processed < total_needed:
-            current_batch_size = min(batch_size, total_needed - processed)
-            # Pick unique topics if possible
-            batch_topics = random.sample(topics_pool, current_batch_size)
-            
-            print(f"Generating batch of {current_batch_size} articles... ({processed}/{total_needed})")
-            topics_str = ", ".join(batch_topics)
-            print(f"Topics: {topics_str}")
-            prompt = Prompts.BULK_ARTICLE.format(count=current_batch_size, topics=topics_str)
-            
-            try:
-                print("Requesting content from Gemini (with 180s timeout)...")
-                response_text = client.generate_content(prompt, is_json=True) # Ensure JSON request
-                if not response_text:
-                    print(f"Failed to generate batch for: {topics_str}. Skipping to next batch.")
-                    processed += current_batch_size # Skip these as if processed to avoid infinite loop, or just skip
-                    continue
-                
-                # Basic cleaning of response if it's wrapped in markdown code blocks
-                clean_json = response_text.strip()
-                if clean_json.startswith("```json"):
-                    clean_json = clean_json[7:].strip()
-                    if clean_json.endswith("```"):
-                        clean_json = clean_json[:-3].strip()
-                elif clean_json.startswith("```"):
-                    clean_json = clean_json[3:].strip()
-                    if clean_json.endswith("```"):
-                        clean_json = clean_json[:-3].strip()
-                
-                try:
-                    articles = json.loads(clean_json)
-                except json.JSONDecodeError:
-                    print("JSON Decode Error. Retrying raw response cleanup...")
-                    # Sometimes Gemini returns extra text. Try to find [ ... ]
-                    start = clean_json.find('[')
-                    end = clean_json.rfind(']')
-                    if start != -1 and end != -1:
-                        clean_json = clean_json[start:end+1]
-                        articles = json.loads(clean_json)
-                    else:
-                        raise
-
-                for item in articles:
-                    title = item.get('title', 'Untitled')
-                    search_query = item.get('product_search_query')
-                    slug = item.get('slug')
-                    meta_description = item.get('meta_description')
-                    
-                    # Simple check if already exists to avoid duplicates
-                    # (Implementation for checking file existence could be more robust)
-                    process_article(item.get('topic', 'Unknown'), title, item.get('content', ''), injector, generator, search_query, slug, meta_description)
-                    processed += 1
-                    
-                    # Log as completed
-                    with open("logs/completed_topics.txt", "a", encoding="utf-8") as f:
-                        f.write(item.get('topic', 'Unknown') + "\n")
-                
-                # Rebuild Index and Sitemap
-                generator.update_index()
-                generator.generate_sitemap()
-                print("Batch completed.")
-                
-            except Exception as e:
-                print(f"Error in batch processing: {e}")
-                if 'response_text' in locals() and response_text:
-                    print(f"Raw response head (first 500 chars): {response_text[:500]}")
-                print("Skipping this batch due to error.")
-                processed += current_batch_size
-                continue
-            
-            if processed < total_needed:
-                print("Safety Interval: Waiting 60 seconds to respect API limits...")
-                time.sleep(60)
-        
-        # Log Generation
-        from src.utils.logger import log_generation
-        log_generation(processed, "Bulk")
-
-        # Final deploy
-        deploy_to_github()
+        # Only one bulk job may spend the shared quota at a time
+        try:
+            with InstanceLock("bulk"):
+                start_telemetry("bulk")
+                run_bulk(args, client, injector, generator)
+        except AlreadyRunning as e:
+            print(f"[LOCKED] {e} Exiting.")
+            sys.exit(EXIT_ALREADY_RUNNING)
+        finally:
+            telemetry.end_run()
 
     else:
-        # Determine Topic
-        topic = "Daily Tech Trends" # Default
-        if args.topic:
-            topic = args.topic
-        elif os.path.exists("config/topics.txt"):
-            try:
-                with open("config/topics.txt", "r", encoding="utf-8") as f:
-                    lines = [
-                        clean_topic(line)
-                        for line in f 
-                        if line.strip() and len(line) < 50 and not line.strip().startswith("以下")
-                    ]
-                if lines:
-                    # Deduplication for single mode
-                    completed_topics = set()
-                    if os.path.exists("logs/completed_topics.txt"):
-                        with open("logs/completed_topics.txt", "r", encoding="utf-8") as f:
-                            completed_topics = {line.strip() for line in f if line.strip()}
-                    
-                    available_topics = [t for t in lines if t not in completed_topics]
-                    if not available_topics:
-                        print("All topics in config/topics.txt have been generated! Please add more topics.")
-                        return
-                        
-                    topic = random.choice(available_topics)
-            except Exception as e:
-                print(f"Error reading topics.txt: {e}")
+        start_telemetry("single")
+        try:
+            run_single(args, client, injector, generator)
+        finally:
+            telemetry.end_run()
+
+def start_telemetry(mode):
+    """Per-stage timings of this run go to logs/telemetry.jsonl (see tools/show_stats.py)."""
+    if TELEMETRY_ENABLED:
+        run_id = telemetry.start_run(mode, path=TELEMETRY_PATH)
+        print(f"Telemetry run id: {run_id}")
+
+def run_bulk(args, client, injector, generator):
+    print(f"Starting Gaia Bulk Mode... Target: {args.bulk} articles")
+    # Topics come from the persistent queue; topics.txt and the completion
+    # log are only read when they changed since the last run
+    topic_queue = TopicQueue.from_settings()
+    added, completed = topic_queue.sync()
+    if added or completed:
+        print(f"Topic queue synced: {added} new topic(s), {completed} newly completed.")
+    print(topic_queue.describe())
+
+    if not topic_queue.counts()['ready']:
+        print("No topics ready in the topic queue (add them to config/topics.txt).")
+        return
+
+    sizer = AdaptiveBatchSizer.from_settings(fixed_size=args.batch_size or None)
+    runner = BulkRunner(client, generator, injector, concurrency=args.concurrency, sizer=sizer,
+                        stream=args.stream, topic_queue=topic_queue, guard=make_duplicate_guard(client))
+    # claim() takes topics out of the pool, so a run never repeats one
+    written = runner.run(args.bulk, topic_queue.claim)
+    processed = len(written)
+    print(client.governor.describe())
+    if client.cache:
+        print(client.cache.describe())
+    print(topic_queue.describe())
+    
+    # Log Generation
+    from src.utils.logger import log_generation
+    log_generation(processed, "Bulk")
+    generator.output.log_run("bulk")
+
+    # Final deploy
+    deploy_to_github(generator)
+
+    if runner.quota_exhausted:
+        print("[QUOTA] Daily budget exhausted. Run ended early.")
+        sys.exit(EXIT_QUOTA_EXHAUSTED)
+
+def run_single(args, client, injector, generator):
+    # Determine Topic
+    topic = "Daily Tech Trends" # Default
+    topic_queue = None
+    if args.topic:
+        topic = args.topic
+    else:
+        with telemetry.stage("topic_select", requested=1) as event:
+            topic_queue = TopicQueue.from_settings()
+            topic_queue.sync()
+            claimed = topic_queue.claim(1)
+            event['items'] = len(claimed)
+        if claimed:
+            topic = claimed[0]
+        elif topic_queue.counts()['pending']:
+            print("No topic is ready yet (failed topics are backing off). Please try again later.")
+            return
+        elif os.path.exists(TOPICS_FILE):
+            print("All topics in config/topics.txt have been generated! Please add more topics.")
+            return
+        else:
+            topic_queue = None
 
-        print(f"Starting Gaia... Topic: {topic}")
+    print(f"Starting Gaia... Topic: {topic}")
 
-        # 1. Generate Content
-        print("Generating content with Gemini...")
-        
-        # Select prompt based on type
+    # 1. Generate Content
+    print("Generating content with Gemini...")
+    
+    # Select prompt based on type
+    with telemetry.stage("prompt_build", items=1):
         prompt_template = Prompts.AFFILIATE_ARTICLE if args.type == "article" else Prompts.NEWS_SUMMARY
         prompt = prompt_template.format(topic=topic)
-        
+    
+    try:
         content = client.generate_content(prompt)
-
-        if not content:
-            print("Failed to generate content.")
-            return
-
-        if args.type == "article":
-            try:
-                # Clean up JSON
-                clean_json = content.strip()
-                if clean_json.startswith("```json"):
-                    clean_json = clean_json[7:]
-                if clean_json.endswith("```"):
-                    clean_json = clean_json[:-3]
-                
-                if "[" in clean_json and clean_json.strip().startswith("["):
-                     # Sometimes it returns a list even for single
-                    article_data = json.loads(clean_json)[0]
-                else:
-                    article_data = json.loads(clean_json)
-
-                title = article_data.get('title', topic)
-                body = article_data.get('content', '')
-                slug = article_data.get('slug')
-                meta_description = article_data.get('meta_description')
-                search_query = article_data.get('product_search_query', topic)
-
-            except json.JSONDecodeError as e:
-                print(f"JSON Parse Error: {e}. Falling back to raw content.")
-                title = topic
-                body = content
-                slug = None
-                meta_description = None
-                search_query = topic
+    except QuotaExhausted as e:
+        print(f"[QUOTA] {e} Skipping this run.")
+        if topic_queue:
+            topic_queue.release(topic)
+        sys.exit(EXIT_QUOTA_EXHAUSTED)
+
+    if not content:
+        print("Failed to generate content.")
+        if topic_queue:
+            topic_queue.fail(topic, "empty response")
+        return
+
+    if args.type == "article":
+        with telemetry.stage("json_parse") as event:
+            extraction = extract_articles(content)
+            event.update(ok=extraction.ok, items=len(extraction.articles), repairs=len(extraction.repairs))
+        if extraction.articles:
+            # Sometimes it returns a list even for single; the first article is used
+            article_data = extraction.articles[0]
+            title = article_data.get('title', topic)
+            body = article_data.get('content', '')
+            slug = article_data.get('slug')
+            meta_description = article_data.get('meta_description')
+            search_query = article_data.get('product_search_query', topic)
+            if extraction.repairs:
+                print(f"Repaired JSON response ({extraction.summary()}).")
         else:
-            # News/Summary mode (still Markdown)
+            print(f"JSON Parse Error: {extraction.summary()}. Falling back to raw content.")
+            dump_failed_response(content, extraction, "single")
             title = topic
             body = content
             slug = None
             meta_description = None
             search_query = topic
-
-        # 2. Process and Save
-        process_article(topic, title, body, injector, generator, search_query, slug, meta_description)
-        
-        # Update Index
-        generator.update_index()
-        deploy_to_github()
-        
-        # Log Generation
-        from src.utils.logger import log_generation
-        log_generation(1, "Single")
-        
-        # Log as completed
-        with open("logs/completed_topics.txt", "a", encoding="utf-8") as f:
-            f.write(topic + "\n")
-        
-        print("Done!")
+    else:
+        # News/Summary mode (still Markdown)
+        title = topic
+        body = content
+        slug = None
+        meta_description = None
+        search_query = topic
+
+    # 2. Process and Save
+    try:
+        filepath = process_article(topic, title, body, injector, generator, search_query, slug, meta_description,
+                                   guard=make_duplicate_guard(client))
+    except DuplicateRejected as e:
+        print(f"Not published, near-duplicate: {e}")
+        if topic_queue:
+            topic_queue.complete(topic)
+        return
+    except Exception as e:
+        # Back off and count the attempt, like a failed bulk batch; never leave the topic in flight
+        if topic_queue:
+            topic_queue.fail(topic, str(e))
+        raise
+
+    # Update Index and Sitemap
+    generator.update_index(new_files=[filepath])
+    generator.generate_sitemap(changed_files=[filepath])
+    
+    # Log Generation
+    from src.utils.logger import log_generation
+    log_generation(1, "Single")
+    generator.output.log_run("single")
+    
+    # Log as completed
+    with open(COMPLETED_TOPICS_FILE, "a", encoding="utf-8") as f:
+        f.write(topic + "\n")
+    if topic_queue:
+        topic_queue.complete(topic)
+
+    # Deploy after the logs so they go out in the same commit
+    deploy_to_github(generator)
+    
+    print("Done!")
 
 if __name__ == "__main__":
     main()
@@ -1,16 +1,23 @@
 
 import os
-import json
+import sys
+import argparse
 import time
 import random
 from src.generator.gemini_client import GeminiClient
+from src.generator.response_cache import add_cache_arguments, cache_from_args
 from src.generator.prompts import Prompts
+from src.generator.json_extract import extract_articles, dump_failed_response
 from src.publisher.html_generator import HtmlGenerator
 from src.publisher.affiliate import AffiliateInjector
+from src.pipeline.batch_sizer import AdaptiveBatchSizer
+from src.utils.quota import (QuotaExhausted, InstanceLock, AlreadyRunning,
+                             EXIT_QUOTA_EXHAUSTED, EXIT_ALREADY_RUNNING)
 from config.settings import AMAZON_TAG, RAKUTEN_ID
 
-def regenerate_all_content():
-    client = GeminiClient()
+def regenerate_all_content(cache=None, refresh=False):
+    # Cached responses make template-only re-runs free
+    client = GeminiClient(cache=cache, refresh=refresh)
     html_gen = HtmlGenerator()
     affiliate = AffiliateInjector(amazon_tag=AMAZON_TAG, rakuten_id=RAKUTEN_ID)
     
@@ -50,11 +57,17 @@ def regenerate_all_content():
 
     print(f"Found {len(topics)} topics. Starting regeneration...")
     
-    # Batch processing
-    batch_size = 2
-    for i in range(0, len(topics), batch_size):
+    # Batch processing (topics per request chosen adaptively)
+    sizer = AdaptiveBatchSizer.from_settings()
+    quota_exhausted = False
+    i = 0
+    batch_no = 0
+    while i < len(topics):
+        batch_size = sizer.next_size(remaining=len(topics) - i)
         batch_topics = topics[i:i+batch_size]
-        print(f"Processing batch {i//batch_size + 1} ({len(batch_topics)} topics)...")
+        i += len(batch_topics)
+        batch_no += 1
+        print(f"Processing batch {batch_no} ({len(batch_topics)} topics)...")
         
         prompt = Prompts.BULK_ARTICLE.format(
             count=len(batch_topics),
@@ -62,77 +75,78 @@ def regenerate_all_content():
         )
         
         try:
-            response_text = client.generate_content(prompt)
-            
-            # Parse JSON
-            try:
-                # Clean JSON format
-                json_text = response_text.strip()
-                if "```json" in json_text:
-                    json_text = json_text.split("```json")[1].split("```")[0].strip()
-                elif "```" in json_text:
-                    json_text = json_text.split("```")[1].split("```")[0].strip()
-                
-                articles_data = json.loads(json_text)
-                
-                # Check if it's a list or single object
-                if isinstance(articles_data, dict):
-                    articles_data = [articles_data]
-                
-                for article in articles_data:
-                    # Robust key access
-                    title = article.get("title")
-                    if not title:
-                        title = "Untitled Article"
-                        
-                    content = article.get("content", "")
-                    
-                    # Ensure topic exists
-                    search_query = article.get("product_search_query")
-                    slug = article.get("slug")
-                    meta_description = article.get("meta_description")
-                    
-                    # Ensure topic exists
-                    topic = article.get("topic")
-                    if not topic:
-                        # Fallback: try to find topic in title or just use title
-                        topic = title
+            result = client.generate(prompt, max_output_tokens=sizer.max_output_tokens)
+        except QuotaExhausted as e:
+            print(f"[QUOTA] {e} Stopping regeneration early.")
+            quota_exhausted = True
+            break
+        response_text = result.text
 
-                    # Inject Affiliate
-                    # Use search_query if available, else topic
-                    query = search_query if search_query else topic
-                    
-                    try:
-                        product_card_html = affiliate.generate_product_card(query)
-                    except Exception as e:
-                        print(f"    Affiliate Error for {topic}: {e}")
-                        product_card_html = "" # Fail gracefully
-                    
-                    # Append product card to content
-                    content += f"\n\n{product_card_html}"
-                    
-                    # Generate HTML
-                    # Use slug if available, else timestamp
-                    if slug:
-                        filename = f"{slug}.html"
-                    else:
-                        # Fallback to timestamp
-                        from datetime import datetime
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-                        filename = f"article_{timestamp}.html"
+        if not response_text:
+            sizer.record(len(batch_topics), 0, result.latency, error="empty response")
+            print("  API Error: empty response")
+            time.sleep(10)
+            continue
+
+        extraction = extract_articles(response_text)
+        articles_data = extraction.articles
+        if not extraction.ok:
+            print(f"  JSON problems in batch: {extraction.summary()}")
+            dump_failed_response(response_text, extraction, "regenerate")
+        error = extraction.errors[0]['reason'] if extraction.errors and not articles_data else None
+        sizer.record(len(batch_topics), len(articles_data), result.latency,
+                     truncated=result.truncated or extraction.truncated,
+                     output_tokens=result.output_tokens, error=error)
 
-                    html_gen.generate_article(title, content, filename, meta_description)
-                    print(f"  Generated: {title} ({filename})")
-                    
-            except json.JSONDecodeError as e:
-                print(f"  JSON Error in batch: {e}")
-                print(f"  Raw output: {response_text[:100]}...")
+        for article in articles_data:
+            # Robust key access
+            title = article.get("title")
+            if not title:
+                title = "Untitled Article"
                 
-        except Exception as e:
-            print(f"  API Error: {e}")
-            time.sleep(10)
+            content = article.get("content", "")
+            
+            # Ensure topic exists
+            search_query = article.get("product_search_query")
+            slug = article.get("slug")
+            meta_description = article.get("meta_description")
             
-        time.sleep(2) # Ease rate limits
+            # Ensure topic exists
+            topic = article.get("topic")
+            if not topic:
+                # Fallback: try to find topic in title or just use title
+                topic = title
+
+            # Inject Affiliate
+            # Use search_query if available, else topic
+            query = search_query if search_query else topic
+            
+            try:
+                product_card_html = affiliate.generate_product_card(query)
+            except Exception as e:
+                print(f"    Affiliate Error for {topic}: {e}")
+                product_card_html = "" # Fail gracefully
+            
+            # Append product card to content
+            content += f"\n\n{product_card_html}"
+            
+            # Generate HTML
+            # Use slug if available, else timestamp
+            if slug:
+                filename = f"{slug}.html"
+            else:
+                # Fallback to timestamp
+                from datetime import datetime
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+                filename = f"article_{timestamp}.html"
+
+            try:
+                html_gen.generate_article(title, content, filename, meta_description, search_query=query,
+                                          source=article)
+            except Exception as e:
+                print(f"  Render Error for {title}: {e}")
+                continue
+            print(f"  Generated: {title} ({filename})")
 
     # Rebuild Index and Sitemap
     html_gen.update_index()
@@ -142,6 +156,23 @@ def regenerate_all_content():
     # Log Generation
     from src.utils.logger import log_generation
     log_generation(len(topics), "RegenerateAll")
+    print(sizer.describe())
+    print(client.governor.describe())
+    if client.cache:
+        print(client.cache.describe())
+
+    if quota_exhausted:
+        sys.exit(EXIT_QUOTA_EXHAUSTED)
 
 if __name__ == "__main__":
-    regenerate_all_content()
+    parser = argparse.ArgumentParser(description="Regenerate all articles from config/topics.txt")
+    add_cache_arguments(parser, enabled_by_default=True)
+    args = parser.parse_args()
+
+    # Shares the bulk lock with main.py so the two never overlap
+    try:
+        with InstanceLock("bulk"):
+            regenerate_all_content(cache=cache_from_args(args), refresh=args.refresh)
+    except AlreadyRunning as e:
+        print(f"[LOCKED] {e} Exiting.")
+        sys.exit(EXIT_ALREADY_RUNNING)
@@ -2,52 +2,276 @@ import time
 from google import genai
 from google.genai import types
 from config.settings import GEMINI_API_KEY, GEMINI_MODEL_NAME
+from src.utils.quota import QuotaGovernor, QuotaExhausted
+from src.utils.telemetry import telemetry
+
+class GenerationResult:
+    """Response text plus the metadata callers need for pacing and batch sizing."""
+
+    def __init__(self, text, finish_reason=None, output_tokens=0, latency=0.0, cached=False):
+        self.text = text
+        self.finish_reason = finish_reason
+        self.output_tokens = output_tokens
+        self.latency = latency
+        self.cached = cached
+
+    @property
+    def truncated(self):
+        return self.finish_reason == "MAX_TOKENS"
+
+class GenerationStream:
+    """
+    Iterable of text chunks from a streamed generation.
+
+    After iteration finishes (or fails), `result` holds the accumulated
+    GenerationResult and `error` any exception that cut the stream short.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.result = None
+        self.error = None
+
+    def __iter__(self):
+        return self._chunks
 
 class GeminiClient:
-    def __init__(self):
+    def __init__(self, governor=None, cache=None, refresh=False):
         self.client = genai.Client(api_key=GEMINI_API_KEY)
         self.model_name = GEMINI_MODEL_NAME
+        # Every API call, including retries, goes through the shared quota governor
+        self.governor = governor or QuotaGovernor.from_settings()
+        # Optional ResponseCache; refresh skips lookups but still stores responses
+        self.cache = cache
+        self.refresh = refresh
+
+    def generate_content(self, prompt, is_json=False, max_output_tokens=None):
+        """Generates content and returns only the text (None on failure)."""
+        return self.generate(prompt, is_json=is_json, max_output_tokens=max_output_tokens).text
+
+    def generate(self, prompt, is_json=False, max_output_tokens=None):
+        """
+        Generates content with retry logic and extended timeout.
+
+        Returns a GenerationResult. Raises QuotaExhausted when the shared
+        daily budget is used up, so callers can stop the run instead of
+        retrying every topic. Telemetry gets one "api" event for the call
+        (retries and waits included) and one "api_attempt" per request.
+        """
+        with telemetry.stage("api") as event:
+            result = self._generate(prompt, is_json, max_output_tokens)
+            event.update(ok=result.text is not None, cached=result.cached, output_tokens=result.output_tokens,
+                         finish_reason=result.finish_reason)
+        return result
+
+    def _acquire(self):
+        with telemetry.stage("quota_wait"):
+            self.governor.acquire()
+
+    def _generate(self, prompt, is_json, max_output_tokens):
+        started = time.monotonic()
+        cache_key = None
+        if self.cache:
+            cache_config = {"is_json": is_json}
+            if max_output_tokens:
+                cache_config["max_output_tokens"] = max_output_tokens
+            cache_key = self.cache.make_key(self.model_name, prompt, cache_config)
+            if not self.refresh:
+                entry = self.cache.get_entry(cache_key)
+                if entry and entry.get('text'):
+                    print("Using cached Gemini response.")
+                    return GenerationResult(
+                        entry['text'], entry.get('finish_reason'), entry.get('output_tokens', 0),
+                        time.monotonic() - started, cached=True
+                    )
 
-    def generate_content(self, prompt, is_json=False):
-        """Generates content with retry logic and extended timeout."""
         max_retries = 5
         retry_delay = 10 # seconds
-        
+
         for attempt in range(max_retries):
+            self._acquire()
+            attempt_started = time.monotonic()
             try:
                 config = {}
                 if is_json:
                     config["response_mime_type"] = "application/json"
-                
+                if max_output_tokens:
+                    config["max_output_tokens"] = max_output_tokens
+
                 # Extended timeout for heavy bulk generation
-                config["http_options"] = types.HttpOptions(timeout=180000) 
-                
+                config["http_options"] = types.HttpOptions(timeout=180000)
+
                 response = self.client.models.generate_content(
                     model=self.model_name,
                     contents=prompt,
                     config=types.GenerateContentConfig(**config)
                 )
-                
+                usage = getattr(response, "usage_metadata", None)
+                self.governor.record_usage(getattr(usage, "total_token_count", 0) if usage else 0)
+
+                telemetry.record("api_attempt", time.monotonic() - attempt_started,
+                                 ok=bool(response and response.text), attempt=attempt + 1)
                 if not response or not response.text:
                     print(f"Empty response (Attempt {attempt + 1}/{max_retries})")
                     if attempt < max_retries - 1:
                         time.sleep(retry_delay)
                         continue
-                    return None
-                return response.text
+                    return GenerationResult(None, latency=time.monotonic() - started)
+
+                result = GenerationResult(
+                    response.text,
+                    finish_reason=self._finish_reason(response),
+                    output_tokens=(getattr(usage, "candidates_token_count", 0) or 0) if usage else 0,
+                    latency=time.monotonic() - started,
+                )
+                if result.truncated:
+                    print("Warning: response hit the output token limit (MAX_TOKENS).")
+                break
 
             except Exception as e:
+                telemetry.record("api_attempt", time.monotonic() - attempt_started, ok=False,
+                                 attempt=attempt + 1, error=str(e)[:200])
                 print(f"Error on attempt {attempt + 1}: {e}")
+                message = str(e)
+                if "429" in message or "RESOURCE_EXHAUSTED" in message:
+                    if "PerDay" in message or "per day" in message.lower():
+                        # Daily quota is gone on the server side; tell every other process too
+                        self.governor.mark_exhausted()
+                        raise QuotaExhausted(f"Gemini reported the daily quota as exhausted: {message[:200]}")
+                    if attempt < max_retries - 1:
+                        print(f"Rate limited. Retrying in {retry_delay}s...")
+                        time.sleep(retry_delay)
+                        continue
                 if "504" in str(e) or "503" in str(e) or "deadline" in str(e).lower():
                     if attempt < max_retries - 1:
                         print(f"Temporary error detected. Retrying in {retry_delay}s...")
                         time.sleep(retry_delay)
                         continue
-                
+
                 import traceback
                 traceback.print_exc()
-                return None
-        return None
+                return GenerationResult(None, latency=time.monotonic() - started)
+        else:
+            return GenerationResult(None, latency=time.monotonic() - started)
+
+        # Outside the retry loop: a cache I/O error must never re-send the prompt
+        self._cache_put(cache_key, result.text, result.finish_reason, result.output_tokens)
+        return result
+
+    def generate_stream(self, prompt, is_json=False, max_output_tokens=None):
+        """
+        Streams content using the SDK's streamed generation.
+
+        Returns a GenerationStream. Connection errors before the first chunk
+        are retried like generate(); once text has arrived, an error ends the
+        stream and the partial text is kept in stream.result. Raises
+        QuotaExhausted (from iteration) when the shared budget is used up.
+        """
+        stream = GenerationStream(None)
+        stream._chunks = self._stream_chunks(prompt, is_json, max_output_tokens, stream)
+        return stream
+
+    def _stream_chunks(self, prompt, is_json, max_output_tokens, stream):
+        started = time.monotonic()
+        cache_key = None
+        if self.cache:
+            cache_config = {"is_json": is_json}
+            if max_output_tokens:
+                cache_config["max_output_tokens"] = max_output_tokens
+            cache_key = self.cache.make_key(self.model_name, prompt, cache_config)
+            if not self.refresh:
+                entry = self.cache.get_entry(cache_key)
+                if entry and entry.get('text'):
+                    print("Using cached Gemini response.")
+                    stream.result = GenerationResult(
+                        entry['text'], entry.get('finish_reason'), entry.get('output_tokens', 0),
+                        time.monotonic() - started, cached=True
+                    )
+                    yield entry['text']
+                    return
+
+        config = {"http_options": types.HttpOptions(timeout=180000)}
+        if is_json:
+            config["response_mime_type"] = "application/json"
+        if max_output_tokens:
+            config["max_output_tokens"] = max_output_tokens
+
+        max_retries = 5
+        retry_delay = 10 # seconds
+        parts = []
+        finish_reason = None
+        usage = None
+
+        for attempt in range(max_retries):
+            self._acquire()
+            attempt_started = time.monotonic()
+            try:
+                for chunk in self.client.models.generate_content_stream(
+                    model=self.model_name,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(**config)
+                ):
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    finish_reason = self._finish_reason(chunk) or finish_reason
+                    text = chunk.text
+                    if text:
+                        parts.append(text)
+                        yield text
+                telemetry.record("api_attempt", time.monotonic() - attempt_started, attempt=attempt + 1,
+                                 stream=True)
+                break
+            except Exception as e:
+                telemetry.record("api_attempt", time.monotonic() - attempt_started, ok=False,
+                                 attempt=attempt + 1, stream=True, error=str(e)[:200])
+                print(f"Stream error on attempt {attempt + 1}: {e}")
+                message = str(e)
+                if "429" in message or "RESOURCE_EXHAUSTED" in message:
+                    if "PerDay" in message or "per day" in message.lower():
+                        self.governor.mark_exhausted()
+                        raise QuotaExhausted(f"Gemini reported the daily quota as exhausted: {message[:200]}")
+                # Only retry if nothing was delivered yet; otherwise keep what arrived
+                if not parts and attempt < max_retries - 1:
+                    print(f"Retrying stream in {retry_delay}s...")
+                    time.sleep(retry_delay)
+                    continue
+                stream.error = e
+                break
+
+        self.governor.record_usage(getattr(usage, "total_token_count", 0) if usage else 0)
+        text = "".join(parts) or None
+        stream.result = GenerationResult(
+            text,
+            finish_reason=finish_reason,
+            output_tokens=(getattr(usage, "candidates_token_count", 0) or 0) if usage else 0,
+            latency=time.monotonic() - started,
+        )
+        # Stream timings include the time the consumer spent between chunks
+        telemetry.record("api", stream.result.latency, ok=text is not None and stream.error is None,
+                         stream=True, output_tokens=stream.result.output_tokens, finish_reason=finish_reason)
+        if stream.result.truncated:
+            print("Warning: stream hit the output token limit (MAX_TOKENS).")
+        if text and stream.error is None:
+            self._cache_put(cache_key, text, finish_reason, stream.result.output_tokens)
+
+    def _cache_put(self, cache_key, text, finish_reason, output_tokens):
+        """Stores a response; cache failures are reported, never raised."""
+        if not cache_key:
+            return
+        try:
+            self.cache.put(cache_key, text, model=self.model_name,
+                           finish_reason=finish_reason, output_tokens=output_tokens)
+        except OSError as e:
+            print(f"Warning: could not write the response cache: {e}")
+
+    @staticmethod
+    def _finish_reason(response):
+        candidates = getattr(response, "candidates", None) or []
+        if not candidates:
+            return None
+        reason = getattr(candidates[0], "finish_reason", None)
+        if reason is None:
+            return None
+        return getattr(reason, "name", str(reason))
 
 if __name__ == "__main__":
     # Simple test
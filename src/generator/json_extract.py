@@ -0,0 +1,210 @@
+import os
+import re
+import json
+from datetime import datetime
+from src.generator.json_stream import JsonArrayStreamParser
+
+FAILED_RESPONSES_DIR = "logs/failed_responses"
+
+_FENCE_RE = re.compile(r"```[A-Za-z]*[ \t]*\r?\n?(.*?)(?:```|\Z)", re.DOTALL)
+_DECODER = json.JSONDecoder()
+
+
+class ExtractionResult:
+    """
+    Outcome of extract_articles().
+
+    `articles` holds every usable article dict, `errors` one dict per part
+    of the response that could not be salvaged (index, reason, detail,
+    snippet) and `repairs` the names of the fixes that had to be applied.
+    """
+
+    def __init__(self):
+        self.articles = []
+        self.errors = []
+        self.repairs = []
+        self.truncated = False
+
+    @property
+    def ok(self):
+        return bool(self.articles) and not self.errors
+
+    def add_error(self, reason, detail="", snippet="", index=None):
+        self.errors.append({'index': index, 'reason': reason, 'detail': str(detail)[:200],
+                            'snippet': snippet[:200]})
+
+    def summary(self):
+        parts = [f"{len(self.articles)} article(s)"]
+        if self.repairs:
+            parts.append("repaired: " + ", ".join(self.repairs))
+        if self.errors:
+            parts.append(f"{len(self.errors)} unrecoverable: " +
+                         ", ".join(e['reason'] for e in self.errors))
+        return "; ".join(parts)
+
+
+def locate_payload(text):
+    """
+    Returns the JSON part of a model response, or None.
+
+    Prefers the first ``` fence (closed or not) that contains an array or
+    object; otherwise starts at the first '[' or '{' in the raw text.
+    Trailing prose is left in place, the decoders stop at the end of the value.
+    """
+    if not text:
+        return None
+    candidates = [m.group(1) for m in _FENCE_RE.finditer(text)] if "```" in text else []
+    candidates.append(text)
+    for candidate in candidates:
+        positions = [p for p in (candidate.find('['), candidate.find('{')) if p != -1]
+        if positions:
+            return candidate[min(positions):]
+    return None
+
+
+def repair_json(payload):
+    """
+    Fixes the defects Gemini most often produces in long JSON answers.
+
+    - raw newlines, tabs and other control characters inside strings
+    - unescaped double quotes inside strings (typically HTML attributes in
+      `content`); a quote only closes a string when the next non-blank
+      character is structural (, : } ] or end of input)
+    - trailing commas before } or ]
+
+    Returns (repaired_text, list_of_repair_names).
+    """
+    out = []
+    repairs = []
+    in_string = False
+    escape = False
+    n = len(payload)
+    i = 0
+    while i < n:
+        c = payload[i]
+        if in_string:
+            if escape:
+                escape = False
+                out.append(c)
+            elif c == '\\':
+                escape = True
+                out.append(c)
+            elif c == '"':
+                j = i + 1
+                while j < n and payload[j] in ' \t\r\n':
+                    j += 1
+                if j >= n or payload[j] in ',:}]':
+                    in_string = False
+                    out.append(c)
+                else:
+                    out.append('\\"')
+                    _note(repairs, "unescaped quote")
+            elif c == '\n':
+                out.append('\\n')
+                _note(repairs, "raw newline")
+            elif c == '\r':
+                out.append('\\r')
+                _note(repairs, "raw newline")
+            elif c == '\t':
+                out.append('\\t')
+                _note(repairs, "raw tab")
+            elif ord(c) < 0x20:
+                out.append('\\u%04x' % ord(c))
+                _note(repairs, "control character")
+            else:
+                out.append(c)
+        else:
+            if c == '"':
+                in_string = True
+            elif c in '}]':
+                k = len(out) - 1
+                while k >= 0 and out[k] in (' ', '\t', '\r', '\n'):
+                    k -= 1
+                if k >= 0 and out[k] == ',':
+                    del out[k]
+                    _note(repairs, "trailing comma")
+            out.append(c)
+        i += 1
+    return "".join(out), repairs
+
+
+def _note(repairs, name):
+    if name not in repairs:
+        repairs.append(name)
+
+
+def _accept(result, obj, index):
+    """Adds obj to result.articles if it looks like an article, else records why not."""
+    if not isinstance(obj, dict):
+        result.add_error("not an object", type(obj).__name__, index=index)
+        return
+    content = obj.get('content')
+    if not isinstance(content, str) or not content.strip():
+        result.add_error("missing content", ", ".join(sorted(obj.keys())),
+                         snippet=str(obj.get('title', '')), index=index)
+        return
+    result.articles.append(obj)
+
+
+def extract_articles(text):
+    """
+    Extracts article dicts from a (possibly malformed) Gemini JSON response.
+
+    Works on fenced or prose-wrapped output, a bare object or an array of
+    objects. A strict parse is tried first; if it fails, the payload is
+    repaired (see repair_json) and decoded object by object, so one broken
+    or truncated article does not discard the rest of a paid response.
+    Always returns an ExtractionResult.
+    """
+    result = ExtractionResult()
+    payload = locate_payload(text)
+    if payload is None:
+        result.add_error("no json", snippet=(text or "").strip())
+        return result
+
+    try:
+        value, _ = _DECODER.raw_decode(payload)
+    except json.JSONDecodeError:
+        value = None
+    if value is not None:
+        items = value if isinstance(value, list) else [value]
+        for index, item in enumerate(items):
+            _accept(result, item, index)
+        return result
+
+    repaired, result.repairs = repair_json(payload)
+    parser = JsonArrayStreamParser()
+    objects = parser.feed(repaired)
+    for index, obj in enumerate(objects):
+        _accept(result, obj, index)
+    for error in parser.errors:
+        result.add_error("invalid object", error['error'], snippet=error['text'])
+    if parser.truncated:
+        result.truncated = True
+        remainder = parser.remainder().strip()
+        if remainder:
+            result.add_error("truncated", "response ended inside an object", snippet=remainder)
+    return result
+
+
+def dump_failed_response(text, result, source, directory=FAILED_RESPONSES_DIR):
+    """
+    Saves a response that was not fully salvaged, for later inspection.
+
+    The raw text goes to <directory>/<timestamp>_<source>.txt unchanged, so
+    it can be copied into tools/fixtures/llm_json/ as a regression case.
+    Returns the path, or None if writing failed.
+    """
+    if not text:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(directory, f"{stamp}_{source}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"Saved unsalvaged response to {path} ({result.summary()})")
+        return path
+    except OSError as e:
+        print(f"Could not save failed response: {e}")
+        return None
@@ -0,0 +1,108 @@
+import json
+
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser for a streamed JSON array of objects.
+
+    feed() accepts text chunks as they arrive and returns every top-level
+    object that became complete, so callers can act on article 1 while
+    article 2 is still being generated. Leading prose or a ```json fence is
+    skipped; a bare top-level object (no array) is also accepted. If the
+    stream is cut off, everything completed before the cut has already been
+    returned. Objects that fail to decode are collected in `errors`.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0            # next char of buffer to scan
+        self.depth = 0          # bracket depth, counting the outer array as 1
+        self.in_string = False
+        self.escape = False
+        self.started = False    # outer '[' (or bare '{') seen
+        self.bare_object = False
+        self.obj_start = None   # buffer index of the current top-level object
+        self.count = 0
+        self.errors = []
+        self.finished = False
+
+    def feed(self, chunk):
+        """Consumes a chunk and returns the list of newly completed objects."""
+        if self.finished or not chunk:
+            return []
+        self.buffer += chunk
+        completed = []
+        buf = self.buffer
+        i = self.pos
+        n = len(buf)
+        while i < n:
+            c = buf[i]
+            if not self.started:
+                if c == '[':
+                    self.started = True
+                    self.depth = 1
+                elif c == '{':
+                    self.started = True
+                    self.bare_object = True
+                    self.depth = 1
+                    self.obj_start = i
+                i += 1
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == '\\':
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                i += 1
+                continue
+
+            if c == '"':
+                self.in_string = True
+            elif c in '{[':
+                if self.depth == 1 and c == '{' and not self.bare_object:
+                    self.obj_start = i
+                self.depth += 1
+            elif c in '}]':
+                self.depth -= 1
+                top_level_done = (
+                    (self.bare_object and self.depth == 0) or
+                    (not self.bare_object and self.depth == 1 and c == '}')
+                )
+                if top_level_done and self.obj_start is not None:
+                    self._emit(buf[self.obj_start:i + 1], completed)
+                    self.obj_start = None
+                if self.depth <= 0:
+                    self.finished = True
+                    i += 1
+                    break
+            i += 1
+
+        # Drop consumed text so the buffer only holds the object in progress
+        keep_from = self.obj_start if self.obj_start is not None else i
+        self.buffer = buf[keep_from:]
+        self.pos = i - keep_from
+        if self.obj_start is not None:
+            self.obj_start = 0
+        return completed
+
+    def _emit(self, text, completed):
+        try:
+            obj = json.loads(text)
+        except json.JSONDecodeError as e:
+            self.errors.append({'error': str(e), 'text': text})
+            return
+        if isinstance(obj, dict):
+            self.count += 1
+            completed.append(obj)
+
+    @property
+    def truncated(self):
+        """True if the stream ended inside the array (e.g. cut off mid-object)."""
+        return self.started and not self.finished
+
+    def remainder(self):
+        """Unconsumed text of the object that was in progress when the stream stopped."""
+        return self.buffer if self.truncated else ""
@@ -75,3 +75,16 @@ class Prompts:
     - 「〜と言われています」「〜が予想されます」ばかりではなく、断定的な表現や独自の考察を適宜混ぜて、専門家らしさを出してください。
     - Markdown形式で出力してください。
     """
+
+    REWRITE_DISTINCT = """
+    あなたはプロの編集者です。現在は2026年です。
+    以下の記事「{title}」は、既に公開済みの記事「{existing_title}」と内容が重複しています。
+    同じ製品・トピックのまま、既存記事とは**別の読者層・利用シーン・悩み**に切り口を変えて全面的に書き直してください。
+
+    - 既存記事と同じ見出し、言い回し、具体例、スペック表の並びは使わないでください。
+    - 会話ショートコード（[[CHAT_L: ...]] / [[CHAT_R: ...]]）、メリット・デメリット、スペック、評価のHTML装飾は維持してください。
+    - 出力は書き直した本文のMarkdownのみ（前置き・説明・コードブロックなし）。
+
+    元の記事:
+    {content}
+    """
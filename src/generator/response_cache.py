@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+# A full scan of the cache tree runs every EVICT_EVERY writes (expiry), or
+# sooner once the size tracked since the last scan passes max_bytes
+EVICT_EVERY = 50
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache for Gemini responses.
+
+    Entries are keyed by a hash of model name, prompt and generation config
+    and stored as small JSON files under cache_dir/<2-char prefix>/. Expired
+    entries (max_age_days) and, beyond that, least recently used entries
+    (until the total fits max_bytes) are evicted after writes. Other
+    threads or processes may evict the same files concurrently; entries
+    that are already gone are skipped.
+    """
+
+    def __init__(self, cache_dir="data/cache/gemini", max_bytes=200 * 1024 * 1024, max_age_days=30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        # Bytes in the cache as of the last scan plus writes since (None: not scanned yet)
+        self._tracked_bytes = None
+        self._writes_since_scan = 0
+
+    @classmethod
+    def from_settings(cls):
+        from config.settings import GEMINI_CACHE_DIR, GEMINI_CACHE_MAX_MB, GEMINI_CACHE_MAX_AGE_DAYS
+        return cls(GEMINI_CACHE_DIR, GEMINI_CACHE_MAX_MB * 1024 * 1024, GEMINI_CACHE_MAX_AGE_DAYS)
+
+    @staticmethod
+    def make_key(model, prompt, config):
+        payload = json.dumps({'model': model, 'prompt': prompt, 'config': config},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Returns the cached response text, or None."""
+        entry = self.get_entry(key)
+        return entry.get('text') if entry else None
+
+    def get_entry(self, key):
+        """Returns the cached entry dict (text plus metadata), or None."""
+        path = self._path(key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if age > self.max_age:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        # Refresh access time for LRU eviction (mtime doubles as last use)
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass  # evicted by another process after the read
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key, text, model=None, **meta):
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            entry = dict(meta, model=model, created=time.time(), text=text)
+            json.dump(entry, f, ensure_ascii=False)
+        size = os.path.getsize(tmp)
+        os.replace(tmp, path)
+        with self._lock:
+            self.writes += 1
+            self._writes_since_scan += 1
+            if self._tracked_bytes is not None:
+                self._tracked_bytes += size
+            due = (self._tracked_bytes is None or self._tracked_bytes > self.max_bytes
+                   or self._writes_since_scan >= EVICT_EVERY)
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drops expired entries, then least recently used ones until under max_bytes."""
+        if not os.path.exists(self.cache_dir):
+            return 0
+        now = time.time()
+        entries = []
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if now - st.st_mtime > self.max_age:
+                    removed += self._remove(path)
+                else:
+                    entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                removed += self._remove(path)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        with self._lock:
+            self._tracked_bytes = total
+            self._writes_since_scan = 0
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0  # another thread or process evicted it first
+
+    def describe(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups * 100 if lookups else 0.0
+        return f"Response cache: {self.hits} hit(s), {self.misses} miss(es) ({rate:.0f}% hit rate), {self.writes} write(s)"
+
+
+def add_cache_arguments(parser, enabled_by_default=False):
+    """Adds --cache/--no-cache/--refresh flags to an argparse parser."""
+    group = parser.add_mutually_exclusive_group()
+    if enabled_by_default:
+        group.add_argument("--no-cache", dest="cache", action="store_false", default=True,
+                           help="Do not read or write the Gemini response cache")
+    else:
+        group.add_argument("--cache", dest="cache", action="store_true", default=None,
+                           help="Use the Gemini response cache (default: GEMINI_CACHE_ENABLED)")
+        group.add_argument("--no-cache", dest="cache", action="store_false",
+                           help="Do not read or write the Gemini response cache")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore cached responses but store the fresh ones")
+
+
+def cache_from_args(args):
+    """Builds a ResponseCache from parsed flags, or None when caching is off."""
+    from config.settings import GEMINI_CACHE_ENABLED
+    enabled = args.cache if args.cache is not None else GEMINI_CACHE_ENABLED
+    return ResponseCache.from_settings() if enabled else None
@@ -0,0 +1,86 @@
+import os
+import csv
+import threading
+from datetime import datetime
+
+BATCH_LOG_FILE = "logs/batches.csv"
+
+
+class AdaptiveBatchSizer:
+    """
+    Chooses how many topics go into one BULK_ARTICLE request.
+
+    The ceiling is the number of articles whose estimated output fits the
+    output-token budget; the estimate is a running average of observed
+    tokens per article. Within that ceiling the size grows by one after a
+    clean batch and halves after a truncated, unparsable or short one
+    (additive increase, multiplicative decrease).
+    """
+
+    def __init__(self, max_output_tokens=65536, tokens_per_article=6000, initial=2,
+                 max_size=8, headroom=0.8, fixed_size=None, log_file=BATCH_LOG_FILE):
+        self.max_output_tokens = max_output_tokens
+        self.tokens_per_article = float(tokens_per_article)
+        self.max_size = max(1, max_size)
+        self.headroom = headroom
+        self.fixed_size = fixed_size
+        self.size = fixed_size or max(1, initial)
+        self.log_file = log_file
+        self.batches = 0
+        self.successes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, fixed_size=None):
+        from config.settings import GEMINI_MAX_OUTPUT_TOKENS, BULK_MAX_BATCH, BULK_TOKENS_PER_ARTICLE
+        return cls(max_output_tokens=GEMINI_MAX_OUTPUT_TOKENS, tokens_per_article=BULK_TOKENS_PER_ARTICLE,
+                   max_size=BULK_MAX_BATCH, fixed_size=fixed_size)
+
+    def ceiling(self):
+        """Largest batch whose estimated output fits the token budget."""
+        fits = int(self.max_output_tokens * self.headroom // max(1.0, self.tokens_per_article))
+        return max(1, min(self.max_size, fits))
+
+    def next_size(self, remaining=None):
+        with self._lock:
+            size = self.fixed_size or min(self.size, self.ceiling())
+        if remaining is not None:
+            size = min(size, remaining)
+        return max(1, size)
+
+    def record(self, requested, parsed, latency, truncated=False, output_tokens=0, error=None):
+        """Feeds one batch outcome back into the sizer and the batch log."""
+        ok = not truncated and error is None and parsed >= requested
+        with self._lock:
+            self.batches += 1
+            if ok:
+                self.successes += 1
+            if parsed and output_tokens:
+                # Exponential moving average of tokens per article
+                observed = output_tokens / parsed
+                self.tokens_per_article = 0.7 * self.tokens_per_article + 0.3 * observed
+            if not self.fixed_size:
+                if ok:
+                    self.size = min(self.ceiling(), requested + 1)
+                else:
+                    self.size = max(1, requested // 2)
+            next_size = self.fixed_size or self.size
+        self._log(requested, parsed, latency, truncated, output_tokens, error, ok, next_size)
+        return ok
+
+    def _log(self, requested, parsed, latency, truncated, output_tokens, error, ok, next_size):
+        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+        file_exists = os.path.isfile(self.log_file)
+        with open(self.log_file, mode='a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if not file_exists:
+                writer.writerow(['Timestamp', 'Requested', 'Parsed', 'LatencySec', 'OutputTokens',
+                                 'Truncated', 'Success', 'Error', 'NextSize'])
+            writer.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), requested, parsed,
+                             f"{latency:.1f}", output_tokens, int(truncated), int(ok),
+                             (error or "")[:120], next_size])
+
+    def describe(self):
+        rate = self.successes / self.batches * 100 if self.batches else 0.0
+        return (f"Batches: {self.batches}, success rate {rate:.0f}%, "
+                f"next size {self.next_size()}, ~{self.tokens_per_article:.0f} tokens/article")
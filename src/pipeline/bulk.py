@@ -0,0 +1,349 @@
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.generator.prompts import Prompts
+from src.generator.json_stream import JsonArrayStreamParser
+from src.generator.json_extract import extract_articles, dump_failed_response
+from src.pipeline.publish import process_article
+from src.pipeline.batch_sizer import AdaptiveBatchSizer
+from src.pipeline.topic_queue import COMPLETED_TOPICS_FILE, clean_topic
+from src.publisher.similarity import DuplicateRejected
+from src.utils.quota import QuotaExhausted
+from src.utils.telemetry import telemetry
+
+
+class StageStats:
+    """Accumulates wall time and item counts per pipeline stage."""
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, items=1):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {'calls': 0, 'items': 0, 'seconds': 0.0})
+            entry['calls'] += 1
+            entry['items'] += items
+            entry['seconds'] += seconds
+
+    def report(self, wall_seconds):
+        print(f"\n--- Bulk Pipeline Throughput (wall time {wall_seconds:.1f}s) ---")
+        print(f"{'Stage':<12} {'Calls':>6} {'Items':>6} {'Total s':>9} {'Avg s':>7} {'Items/min':>10}")
+        print("-" * 55)
+        for stage, e in self.stages.items():
+            avg = e['seconds'] / e['calls'] if e['calls'] else 0.0
+            per_min = e['items'] / wall_seconds * 60 if wall_seconds else 0.0
+            print(f"{stage:<12} {e['calls']:>6} {e['items']:>6} {e['seconds']:>9.1f} {avg:>7.2f} {per_min:>10.2f}")
+
+
+class BulkRunner:
+    """
+    Pipelined bulk generation.
+
+    Keeps up to `concurrency` Gemini requests in flight on a thread pool.
+    Pacing comes from the client's shared quota governor rather than a fixed
+    sleep. The main thread parses, renders and writes each batch as soon as
+    its response arrives, while later requests are still pending. Topics per
+    request come from an AdaptiveBatchSizer.
+
+    With stream=True responses are streamed and parsed incrementally, so
+    each article is rendered as soon as its JSON object is complete instead
+    of after the whole batch has arrived.
+
+    With a topic_queue, every scheduled topic is settled once its batch
+    ends: done if an article came back for it, re-queued with backoff if
+    not, or released untouched when the quota ran out.
+    """
+
+    def __init__(self, client, generator, injector, concurrency=3, sizer=None, stream=False,
+                 topic_queue=None, guard=None):
+        self.client = client
+        self.generator = generator
+        self.injector = injector
+        self.concurrency = max(1, concurrency)
+        self.sizer = sizer or AdaptiveBatchSizer()
+        self.stream = stream
+        self.topic_queue = topic_queue
+        # DuplicateGuard checked before each article is written
+        self.guard = guard
+        # Topics of published articles (as the model echoed them back)
+        self.published_topics = set()
+        self.stats = StageStats()
+        self.quota_exhausted = False
+
+    def _generate(self, topics):
+        """Runs on a worker thread; the client blocks on the quota governor."""
+        topics_str = ", ".join(topics)
+        with telemetry.stage("prompt_build", items=len(topics)):
+            prompt = Prompts.BULK_ARTICLE.format(count=len(topics), topics=topics_str)
+        print(f"Requesting content from Gemini for: {topics_str}")
+        result = self.client.generate(prompt, is_json=True, max_output_tokens=self.sizer.max_output_tokens)
+        self.stats.record("generate", result.latency, items=len(topics))
+        return result
+
+    def _publish(self, topics, result):
+        """Runs on the main thread: parse, render, save. Returns written file paths."""
+        topics_str = ", ".join(topics)
+        response_text = result.text
+        if not response_text:
+            print(f"Failed to generate batch for: {topics_str}. Skipping.")
+            self.sizer.record(len(topics), 0, result.latency, error="empty response")
+            self._settle(topics, 0, error="empty response")
+            return []
+
+        start = time.monotonic()
+        with telemetry.stage("json_parse") as event:
+            extraction = extract_articles(response_text)
+            event.update(ok=extraction.ok, items=len(extraction.articles), repairs=len(extraction.repairs))
+        articles = extraction.articles
+        self.stats.record("parse", time.monotonic() - start, items=len(articles))
+        if not extraction.ok:
+            print(f"Batch for {topics_str}: {extraction.summary()}")
+            dump_failed_response(response_text, extraction, "bulk")
+        error = extraction.errors[0]['reason'] if extraction.errors and not articles else None
+        self.sizer.record(len(topics), len(articles), result.latency,
+                          truncated=result.truncated or extraction.truncated,
+                          output_tokens=result.output_tokens, error=error)
+
+        written = []
+        for item in articles:
+            filepath = self._publish_item(item)
+            if filepath:
+                written.append(filepath)
+        self._finish_batch(topics, written)
+        return written
+
+    def _publish_item(self, item):
+        """Renders and saves one article dict. Returns its path, or None on failure."""
+        start = time.monotonic()
+        try:
+            filepath = process_article(
+                item.get('topic', 'Unknown'), item.get('title', 'Untitled'), item.get('content', ''),
+                self.injector, self.generator, item.get('product_search_query'),
+                item.get('slug'), item.get('meta_description'), guard=self.guard
+            )
+        except DuplicateRejected as e:
+            print(f"Skipped near-duplicate '{item.get('title')}': {e}")
+            # Settled as done: generating the topic again would only repeat it
+            self.published_topics.add(clean_topic(item.get('topic', '')))
+            return None
+        except Exception as e:
+            print(f"Error rendering article '{item.get('title')}': {e}")
+            return None
+        self.stats.record("render", time.monotonic() - start)
+
+        # Log as completed
+        with open(COMPLETED_TOPICS_FILE, "a", encoding="utf-8") as f:
+            f.write(item.get('topic', 'Unknown') + "\n")
+        self.published_topics.add(clean_topic(item.get('topic', '')))
+        return filepath
+
+    def _settle(self, topics, written_count, error=None, release=False):
+        """
+        Reports a finished batch's topics to the topic queue.
+
+        A topic is done if an article came back under its name, or if the
+        batch produced at least one article per topic (the model may reword
+        topic names). The rest are re-queued with backoff, or released
+        without an attempt when the batch never ran (quota).
+        """
+        if self.topic_queue is None:
+            return
+        for topic in topics:
+            if written_count >= len(topics) or clean_topic(topic) in self.published_topics:
+                self.topic_queue.complete(topic)
+            elif release:
+                self.topic_queue.release(topic)
+            else:
+                self.topic_queue.fail(topic, error or "no article in response")
+
+    def _finish_batch(self, topics, written, error=None, release=False):
+        """Settles the batch's topics and updates index and sitemap once for the files it wrote."""
+        self._settle(topics, len(written), error=error, release=release)
+        if written:
+            start = time.monotonic()
+            self.generator.update_index(new_files=written)
+            self.generator.generate_sitemap(changed_files=written)
+            self.stats.record("index", time.monotonic() - start, items=len(written))
+        print(f"Batch completed: {len(written)} article(s) for {', '.join(topics)}")
+
+    def _generate_streaming(self, batch_id, topics, events):
+        """
+        Runs on a worker thread: streams one batch and posts events.
+
+        ('article', batch_id, item) is posted for every completed object,
+        followed by exactly one ('done', batch_id, result, parser) or
+        ('error', batch_id, exc).
+        """
+        topics_str = ", ".join(topics)
+        with telemetry.stage("prompt_build", items=len(topics)):
+            prompt = Prompts.BULK_ARTICLE.format(count=len(topics), topics=topics_str)
+        print(f"Streaming content from Gemini for: {topics_str}")
+        parser = JsonArrayStreamParser()
+        try:
+            stream = self.client.generate_stream(prompt, is_json=True,
+                                                 max_output_tokens=self.sizer.max_output_tokens)
+            for chunk in stream:
+                for item in parser.feed(chunk):
+                    events.put(('article', batch_id, item))
+        except Exception as e:
+            events.put(('error', batch_id, e))
+            return
+        result = stream.result
+        self.stats.record("generate", result.latency, items=len(topics))
+        if stream.error is not None:
+            print(f"Stream for {topics_str} ended early: {stream.error}")
+        events.put(('done', batch_id, result, parser))
+
+    def _finish_streamed(self, topics, result, parser, written):
+        """Records a streamed batch with the sizer and updates index and sitemap."""
+        parsed = parser.count
+        for failed in parser.errors:
+            # Give objects that failed strict decoding a second chance with repairs
+            with telemetry.stage("json_parse", stream=True) as event:
+                extraction = extract_articles(failed['text'])
+                event.update(ok=extraction.ok, items=len(extraction.articles), repairs=len(extraction.repairs))
+            for item in extraction.articles:
+                filepath = self._publish_item(item)
+                if filepath:
+                    written.append(filepath)
+                    parsed += 1
+            if not extraction.articles:
+                print(f"Unrecoverable article object in the stream for {', '.join(topics)}: {extraction.summary()}")
+                dump_failed_response(failed['text'], extraction, "stream")
+        if parser.truncated:
+            print(f"Stream for {', '.join(topics)} was cut off after {parser.count} article(s).")
+            dump_failed_response(result.text, extract_articles(result.text), "stream")
+        error = None if result.text else "empty response"
+        self.sizer.record(len(topics), parsed, result.latency,
+                          truncated=result.truncated or parser.truncated,
+                          output_tokens=result.output_tokens, error=error)
+        self._finish_batch(topics, written)
+        return written
+
+    def run(self, total_needed, pick_topics):
+        """
+        Generates `total_needed` articles.
+
+        pick_topics(n) must return a list of up to n topics. Failed batches
+        count towards the total so a persistent failure cannot loop forever.
+        Stops scheduling new batches once the quota is exhausted (see
+        self.quota_exhausted). Returns the list of written file paths.
+        """
+        started = time.monotonic()
+        if self.stream:
+            written = self._run_streaming(total_needed, pick_topics)
+        else:
+            written = self._run_batches(total_needed, pick_topics)
+
+        wall = time.monotonic() - started
+        governor = getattr(self.client, "governor", None)
+        if governor:
+            self.stats.record("quota_wait", governor.waited_seconds, items=0)
+        self.stats.report(wall)
+        print(self.sizer.describe())
+        if wall:
+            print(f"Articles written: {len(written)} ({len(written) / wall * 3600:.1f} per hour)")
+        return written
+
+    def _schedule(self, total_needed, scheduled, in_flight, pick_topics, submit):
+        """Fills free worker slots. Returns the updated (total_needed, scheduled)."""
+        while not self.quota_exhausted and scheduled < total_needed and in_flight() < self.concurrency:
+            size = self.sizer.next_size(remaining=total_needed - scheduled)
+            with telemetry.stage("topic_select", requested=size) as event:
+                topics = pick_topics(size)
+                event['items'] = len(topics)
+            if not topics:
+                return scheduled, scheduled
+            scheduled += len(topics)
+            submit(topics)
+            print(f"Scheduled batch of {len(topics)} ({scheduled}/{total_needed})")
+        return total_needed, scheduled
+
+    def _quota_hit(self, e):
+        if not self.quota_exhausted:
+            print(f"[QUOTA] {e} No new batches will be scheduled.")
+        self.quota_exhausted = True
+
+    def _run_batches(self, total_needed, pick_topics):
+        written = []
+        scheduled = 0
+        pending = {}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            def submit(topics):
+                pending[pool.submit(self._generate, topics)] = topics
+
+            while scheduled < total_needed or pending:
+                # Keep the pipeline full
+                total_needed, scheduled = self._schedule(
+                    total_needed, scheduled, lambda: len(pending), pick_topics, submit)
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    topics = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except QuotaExhausted as e:
+                        self._quota_hit(e)
+                        self._settle(topics, 0, release=True)
+                        continue
+                    except Exception as e:
+                        print(f"Error in batch generation for {', '.join(topics)}: {e}")
+                        self._settle(topics, 0, error=str(e))
+                        continue
+                    written.extend(self._publish(topics, result))
+        return written
+
+    def _run_streaming(self, total_needed, pick_topics):
+        written = []
+        scheduled = 0
+        # batch_id -> (topics, files written so far)
+        pending = {}
+        events = queue.Queue()
+        next_id = [0]
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            def submit(topics):
+                batch_id = next_id[0]
+                next_id[0] += 1
+                pending[batch_id] = (topics, [])
+                pool.submit(self._generate_streaming, batch_id, topics, events)
+
+            while scheduled < total_needed or pending:
+                total_needed, scheduled = self._schedule(
+                    total_needed, scheduled, lambda: len(pending), pick_topics, submit)
+                if not pending:
+                    break
+                event = events.get()
+                kind, batch_id = event[0], event[1]
+                topics, batch_written = pending[batch_id]
+                if kind == 'article':
+                    # Render right away; later objects of the batch are still streaming
+                    filepath = self._publish_item(event[2])
+                    if filepath:
+                        batch_written.append(filepath)
+                        written.append(filepath)
+                    continue
+                del pending[batch_id]
+                if kind == 'error':
+                    exc = event[2]
+                    quota = isinstance(exc, QuotaExhausted)
+                    if quota:
+                        self._quota_hit(exc)
+                    else:
+                        print(f"Error in batch generation for {', '.join(topics)}: {exc}")
+                    # Articles that streamed out before the failure are kept
+                    self._finish_batch(topics, batch_written, error=str(exc), release=quota)
+                    continue
+                result, parser = event[2], event[3]
+                if parser.count == 0 and result.text:
+                    # Nothing decoded incrementally; fall back to the whole-response parser
+                    written.extend(self._publish(topics, result))
+                else:
+                    already = len(batch_written)
+                    self._finish_streamed(topics, result, parser, batch_written)
+                    written.extend(batch_written[already:])
+        return written
@@ -0,0 +1,60 @@
+import os
+from datetime import datetime
+from src.utils.telemetry import telemetry
+
+def process_article(topic, title, content, injector, generator, search_query=None, slug=None, meta_description=None,
+                    guard=None):
+    """
+    Common logic to process a single article.
+
+    With a DuplicateGuard the article is first checked against the
+    published corpus; it may be rewritten, or DuplicateRejected is raised
+    before anything is written. Timed as one "article" telemetry event.
+    """
+    with telemetry.stage("article", slug=slug):
+        return _process_article(topic, title, content, injector, generator, search_query, slug,
+                                meta_description, guard)
+
+def _process_article(topic, title, content, injector, generator, search_query, slug, meta_description, guard):
+    # Near-duplicate check before anything is rendered or written
+    if guard is not None:
+        with telemetry.stage("duplicate_check", slug=slug):
+            content = guard.check(slug, title, str(content))
+
+    # 2. Inject Affiliate Links
+    print(f"Injecting affiliate links for: {title}")
+    
+    # Use specific search query if available, otherwise topic
+    query = search_query if search_query else topic
+    print(f"  Using search query: {query}")
+
+    # Generate structured product card HTML
+    card_html = injector.generate_product_card(query)
+    
+    # Ensure content is string and append card
+    full_content = str(content) + "\n\n" + card_html
+    full_content = injector.inject_links(full_content)
+
+    # 3. Publish Content
+    # Use slug if available, else timestamp
+    if slug:
+        filename = f"{slug}.html"
+    else:
+        # Fallback to timestamp
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        filename = f"article_{timestamp}.html"
+    
+    # Keep what Gemini returned so the page can be rebuilt without the API
+    source = {
+        'topic': topic,
+        'title': title,
+        'slug': slug,
+        'meta_description': meta_description,
+        'product_search_query': search_query,
+        'content': content,
+    }
+    filepath = generator.generate_article(title, full_content, filename, meta_description, search_query=query,
+                                          source=source)
+    if guard is not None:
+        guard.record(os.path.splitext(filename)[0], title, str(content))
+    return filepath
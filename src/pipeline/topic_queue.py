@@ -0,0 +1,294 @@
+import os
+import re
+import math
+import time
+import random
+import sqlite3
+
+DEFAULT_QUEUE_PATH = "data/topics.db"
+TOPICS_FILE = "config/topics.txt"
+COMPLETED_TOPICS_FILE = "logs/completed_topics.txt"
+
+PENDING, IN_FLIGHT, DONE, FAILED = "pending", "in_flight", "done", "failed"
+
+# Leading bullets, numbers and dots ("1. Topic", "- Topic", "123. Topic")
+LEADING_MARKS_RE = re.compile(r'^[\d\.\-\*\s]+')
+MAX_TOPIC_LENGTH = 50
+
+
+def clean_topic(text):
+    """Removes leading numbers, bullets, and whitespace from topic."""
+    return LEADING_MARKS_RE.sub('', text).strip()
+
+
+def normalize_topic(line):
+    """
+    Cleans one topics.txt line. Returns None for lines that are not topics
+    (blank, over-long, or the instruction header starting with 以下).
+    """
+    if not line.strip() or len(line) >= MAX_TOPIC_LENGTH or line.strip().startswith("以下"):
+        return None
+    return clean_topic(line) or None
+
+
+def _sort_key(weight):
+    """
+    Weighted random order (Efraimidis-Spirakis): smaller keys are drawn first.
+
+    Drawn once when a topic is queued, so claiming is an index scan instead of
+    a weighted sample over every pending row.
+    """
+    return -math.log(1.0 - random.random()) / max(weight, 1e-6)
+
+
+class TopicQueue:
+    """
+    Persistent topic queue in SQLite.
+
+    Topics are normalized once when they enter the queue and move through
+    pending -> in_flight -> done (or back to pending with a backoff, and to
+    failed after max_attempts). claim() hands out topics inside an
+    IMMEDIATE transaction, so concurrent workers and processes never get the
+    same topic. Within a priority, topics come out in weighted random order.
+
+    config/topics.txt is only re-read when its size or mtime changed, and
+    logs/completed_topics.txt is read from the offset reached last time, so
+    startup cost does not grow with the generation history.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, max_attempts=3, backoff_seconds=600,
+                 max_backoff_seconds=24 * 3600, lease_seconds=3600):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.lease_seconds = lease_seconds
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        # Autocommit; transactions are opened explicitly where atomicity matters.
+        # One TopicQueue per thread/process; they coordinate through the database.
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    @classmethod
+    def from_settings(cls):
+        from config.settings import TOPIC_QUEUE_PATH, TOPIC_MAX_ATTEMPTS, TOPIC_RETRY_BACKOFF_MINUTES
+        return cls(TOPIC_QUEUE_PATH, max_attempts=TOPIC_MAX_ATTEMPTS,
+                   backoff_seconds=TOPIC_RETRY_BACKOFF_MINUTES * 60)
+
+    def _create_schema(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS topics (
+                topic TEXT PRIMARY KEY,
+                state TEXT NOT NULL DEFAULT 'pending',
+                priority INTEGER NOT NULL DEFAULT 0,
+                weight REAL NOT NULL DEFAULT 1.0,
+                sort_key REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL DEFAULT 0,
+                claimed_at REAL,
+                last_error TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_topics_claim ON topics (state, priority DESC, sort_key)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS sync_state (source TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER)")
+
+    def close(self):
+        self.conn.close()
+
+    # ------------------------------------------------------------------ input
+
+    def add(self, topic, priority=0, weight=1.0):
+        """Queues a topic. Returns True if it was new; existing topics (any state) are left alone."""
+        topic = clean_topic(topic)
+        if not topic:
+            return False
+        cur = self.conn.execute("""
+            INSERT OR IGNORE INTO topics (topic, state, priority, weight, sort_key, updated_at)
+            VALUES (?, 'pending', ?, ?, ?, ?)
+        """, (topic, priority, weight, _sort_key(weight), time.time()))
+        return cur.rowcount == 1
+
+    def set_priority(self, topic, priority=None, weight=None):
+        """Changes priority and/or weight of a queued topic. Returns True if it exists."""
+        row = self.get(topic)
+        if row is None:
+            return False
+        weight = row['weight'] if weight is None else weight
+        priority = row['priority'] if priority is None else priority
+        self.conn.execute(
+            "UPDATE topics SET priority = ?, weight = ?, sort_key = ?, updated_at = ? WHERE topic = ?",
+            (priority, weight, _sort_key(weight), time.time(), row['topic'])
+        )
+        return True
+
+    def _source_changed(self, source, path):
+        """(size, mtime_ns, previous size) if the file changed since the last sync, else None."""
+        if not os.path.exists(path):
+            return None
+        st = os.stat(path)
+        row = self.conn.execute("SELECT size, mtime_ns FROM sync_state WHERE source = ?", (source,)).fetchone()
+        if row and row['size'] == st.st_size and row['mtime_ns'] == st.st_mtime_ns:
+            return None
+        return st.st_size, st.st_mtime_ns, row['size'] if row else 0
+
+    def _mark_synced(self, source, size, mtime_ns):
+        self.conn.execute("INSERT OR REPLACE INTO sync_state (source, size, mtime_ns) VALUES (?, ?, ?)",
+                          (source, size, mtime_ns))
+
+    def sync(self, topics_path=TOPICS_FILE, completed_path=COMPLETED_TOPICS_FILE):
+        """
+        Pulls new topics from topics.txt and finished ones from the completion log.
+
+        Either file is skipped entirely if unchanged since the last sync. The
+        completion log is append-only, so only the bytes added since then
+        are read. Returns (added, completed).
+        """
+        added = completed = 0
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            changed = self._source_changed("topics", topics_path)
+            if changed:
+                with open(topics_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        topic = normalize_topic(line)
+                        if topic and self.add(topic):
+                            added += 1
+                self._mark_synced("topics", changed[0], changed[1])
+
+            changed = self._source_changed("completed", completed_path)
+            if changed:
+                size, mtime_ns, offset = changed
+                if size < offset:
+                    offset = 0  # Log was truncated or replaced; read it again
+                with open(completed_path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read()
+                # Only consume whole lines; a partial last line is read next time
+                end = data.rfind(b"\n") + 1
+                for line in data[:end].decode("utf-8", errors="replace").splitlines():
+                    if self._mark_done(line.strip()):
+                        completed += 1
+                self._mark_synced("completed", offset + end, mtime_ns if end == len(data) else 0)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added, completed
+
+    def _mark_done(self, topic):
+        topic = clean_topic(topic)
+        if not topic:
+            return False
+        now = time.time()
+        cur = self.conn.execute("""
+            INSERT INTO topics (topic, state, sort_key, updated_at) VALUES (?, 'done', 0, ?)
+            ON CONFLICT(topic) DO UPDATE SET state = 'done', claimed_at = NULL, updated_at = excluded.updated_at
+            WHERE topics.state != 'done'
+        """, (topic, now))
+        return cur.rowcount == 1
+
+    # ------------------------------------------------------------------ workers
+
+    def claim(self, n=1):
+        """
+        Atomically moves up to n available topics to in_flight and returns them.
+
+        Highest priority first; weighted random order within a priority.
+        Topics whose lease expired (the claiming run died) are reclaimed.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute("""
+                UPDATE topics SET state = 'pending', claimed_at = NULL, updated_at = ?
+                WHERE state = 'in_flight' AND claimed_at < ?
+            """, (now, now - self.lease_seconds))
+            rows = self.conn.execute("""
+                SELECT topic FROM topics
+                WHERE state = 'pending' AND available_at <= ?
+                ORDER BY priority DESC, sort_key
+                LIMIT ?
+            """, (now, n)).fetchall()
+            topics = [row['topic'] for row in rows]
+            self.conn.executemany(
+                "UPDATE topics SET state = 'in_flight', claimed_at = ?, updated_at = ? WHERE topic = ?",
+                [(now, now, t) for t in topics]
+            )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return topics
+
+    def complete(self, topic):
+        """Marks a topic done. Unknown topics are recorded as done too."""
+        return self._mark_done(topic)
+
+    def fail(self, topic, error=None):
+        """
+        Records a failed attempt: back to pending after an exponential
+        backoff, or failed once max_attempts is reached.
+        """
+        row = self.get(topic)
+        if row is None:
+            return
+        attempts = row['attempts'] + 1
+        now = time.time()
+        if attempts >= self.max_attempts:
+            state, available_at = FAILED, now
+        else:
+            delay = min(self.backoff_seconds * 2 ** (attempts - 1), self.max_backoff_seconds)
+            state, available_at = PENDING, now + delay
+        self.conn.execute("""
+            UPDATE topics SET state = ?, attempts = ?, available_at = ?, claimed_at = NULL,
+                              last_error = ?, sort_key = ?, updated_at = ?
+            WHERE topic = ?
+        """, (state, attempts, available_at, (error or "")[:200], _sort_key(row['weight']), now, row['topic']))
+
+    def release(self, topic):
+        """Returns an in-flight topic to pending without counting an attempt (e.g. quota ran out)."""
+        self.conn.execute(
+            "UPDATE topics SET state = 'pending', claimed_at = NULL, updated_at = ? WHERE topic = ? AND state = 'in_flight'",
+            (time.time(), clean_topic(topic))
+        )
+
+    def retry_failed(self):
+        """Moves every failed topic back to pending with a fresh attempt count."""
+        cur = self.conn.execute(
+            "UPDATE topics SET state = 'pending', attempts = 0, available_at = 0, updated_at = ? WHERE state = 'failed'",
+            (time.time(),)
+        )
+        return cur.rowcount
+
+    # ------------------------------------------------------------------ read
+
+    def get(self, topic):
+        row = self.conn.execute("SELECT * FROM topics WHERE topic = ?", (clean_topic(topic),)).fetchone()
+        return dict(row) if row else None
+
+    def counts(self):
+        """{state: count} plus 'ready' (pending topics whose backoff has elapsed)."""
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        for row in self.conn.execute("SELECT state, COUNT(*) AS n FROM topics GROUP BY state"):
+            counts[row['state']] = row['n']
+        counts['ready'] = self.conn.execute(
+            "SELECT COUNT(*) FROM topics WHERE state = 'pending' AND available_at <= ?", (time.time(),)
+        ).fetchone()[0]
+        return counts
+
+    def list(self, state, limit=20):
+        return [dict(row) for row in self.conn.execute(
+            "SELECT * FROM topics WHERE state = ? ORDER BY priority DESC, sort_key LIMIT ?", (state, limit)
+        )]
+
+    def describe(self):
+        c = self.counts()
+        return (f"Topics: {c['ready']} ready, {c[PENDING] - c['ready']} backing off, "
+                f"{c[IN_FLIGHT]} in flight, {c[DONE]} done, {c[FAILED]} failed")
@@ -1,4 +1,18 @@
 import re
+import html
+from urllib.parse import quote, unquote
+from src.publisher.assets import affiliate_attributes
+
+AMAZON_SEARCH_URL = "https://www.amazon.co.jp/s?k="
+RAKUTEN_SEARCH_URL = "https://search.rakuten.co.jp/search/mall/"
+
+# <a ...> start tags pointing at an affiliate search, on raw page bytes
+AFFILIATE_TAG_RE = re.compile(
+    rb'<a\b[^>]*?href="((?:https://www\.amazon\.co\.jp/s\?k=|https://search\.rakuten\.co\.jp/search/mall/)[^"]*)"[^>]*>'
+)
+# Up to the closing '}) rather than the next quote: older pages have labels like 'De'Longhi'
+ONCLICK_LABEL_RE = re.compile(r"('event_label': ')(.*?)('\}\))")
+DATA_LABEL_RE = re.compile(r'(data-label=")([^"]*)(")')
 
 class AffiliateInjector:
     def __init__(self, amazon_tag=None, rakuten_id=None):
@@ -48,8 +62,8 @@ class AffiliateInjector:
     <div class="product-info">
         <div class="product-title">{keyword} (検索結果)</div>
         <div class="product-btn-group">
-            <a href="{amz_link}" class="btn btn-amazon" target="_blank" onclick="gtag('event', 'click_amazon', {{'event_category': 'affiliate', 'event_label': '{keyword}'}})">Amazonで探す</a>
-            <a href="{rak_link}" class="btn btn-rakuten" target="_blank" onclick="gtag('event', 'click_rakuten', {{'event_category': 'affiliate', 'event_label': '{keyword}'}})">楽天で探す</a>
+            <a href="{amz_link}" class="btn btn-amazon" target="_blank" {affiliate_attributes('amazon', keyword)}>Amazonで探す</a>
+            <a href="{rak_link}" class="btn btn-rakuten" target="_blank" {affiliate_attributes('rakuten', keyword)}>楽天で探す</a>
         </div>
     </div>
 </div>
@@ -57,8 +71,82 @@ class AffiliateInjector:
         return card_html
 
     def generate_search_link(self, keyword, platform="amazon"):
+        # Keywords are percent-encoded: spaces, & and / in product names must not end the query or path
         if platform == "amazon":
-            return f"https://www.amazon.co.jp/s?k={keyword}&tag={self.amazon_tag}"
+            return f"{AMAZON_SEARCH_URL}{quote(keyword, safe='')}&tag={self.amazon_tag}"
         elif platform == "rakuten":
-            return f"https://search.rakuten.co.jp/search/mall/{keyword}/?afid={self.rakuten_id}"
+            return f"{RAKUTEN_SEARCH_URL}{quote(keyword, safe='')}/?afid={self.rakuten_id}"
         return "#"
+
+
+def _retag_url(href, amazon_tag, rakuten_id, renames):
+    """(new href, keyword) for an affiliate search URL as written in a page."""
+    url = html.unescape(href)
+    if url.startswith(AMAZON_SEARCH_URL):
+        raw, sep, _ = url[len(AMAZON_SEARCH_URL):].rpartition("&tag=")
+        keyword = unquote(raw if sep else url[len(AMAZON_SEARCH_URL):])
+        keyword = renames.get(keyword, keyword)
+        new_url = AffiliateInjector(amazon_tag=amazon_tag).generate_search_link(keyword, "amazon")
+    else:
+        raw, sep, _ = url[len(RAKUTEN_SEARCH_URL):].rpartition("/?afid=")
+        keyword = unquote((raw if sep else url[len(RAKUTEN_SEARCH_URL):]).rstrip("/"))
+        keyword = renames.get(keyword, keyword)
+        new_url = AffiliateInjector(rakuten_id=rakuten_id).generate_search_link(keyword, "rakuten")
+    if new_url == url:
+        return href, keyword
+    # Keep the page's own escaping style for the query separator
+    return (new_url.replace("&", "&amp;") if "&amp;" in href else new_url), keyword
+
+
+def _js_string(value):
+    """Body of a single-quoted JS string literal."""
+    return value.replace("\\", "\\\\").replace("'", "\\'")
+
+
+def retag_links(data, amazon_tag, rakuten_id, renames=None):
+    """
+    Rewrites affiliate search links in page bytes (bytes or mmap).
+
+    Each link's URL gets the given tag/affiliate id and a percent-encoded
+    keyword (renamed through `renames` if listed), and its tracking label
+    (onclick event_label or data-label) is set to that keyword. Links that
+    already match are left byte-for-byte alone. Returns (new bytes or None
+    if nothing changed, {'links', 'urls', 'labels'} counts).
+    """
+    renames = renames or {}
+    counts = {'links': 0, 'urls': 0, 'labels': 0}
+    parts = []
+    last = 0
+    for m in AFFILIATE_TAG_RE.finditer(data):
+        counts['links'] += 1
+        tag = m.group(0).decode("utf-8", errors="surrogateescape")
+        href = m.group(1).decode("utf-8", errors="surrogateescape")
+        new_href, keyword = _retag_url(href, amazon_tag, rakuten_id, renames)
+        new_tag = tag
+        if new_href != href:
+            counts['urls'] += 1
+            new_tag = new_tag.replace(f'href="{href}"', f'href="{new_href}"', 1)
+
+        def onclick_label(lm):
+            # Compared as a JS literal, so unescaped quotes that break the handler get fixed
+            if html.unescape(lm.group(2)) == _js_string(keyword):
+                return lm.group(0)
+            counts['labels'] += 1
+            return lm.group(1) + html.escape(_js_string(keyword), quote=True) + lm.group(3)
+
+        def data_label(lm):
+            if html.unescape(lm.group(2)) == keyword:
+                return lm.group(0)
+            counts['labels'] += 1
+            return lm.group(1) + html.escape(keyword, quote=True) + lm.group(3)
+
+        new_tag = ONCLICK_LABEL_RE.sub(onclick_label, new_tag)
+        new_tag = DATA_LABEL_RE.sub(data_label, new_tag)
+        if new_tag != tag:
+            parts.append(data[last:m.start()])
+            parts.append(new_tag.encode("utf-8", errors="surrogateescape"))
+            last = m.end()
+    if not parts:
+        return None, counts
+    parts.append(data[last:])
+    return b"".join(bytes(p) for p in parts), counts
@@ -0,0 +1,120 @@
+import os
+import re
+import json
+import html
+import hashlib
+from config.settings import GOOGLE_ANALYTICS_ID
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+ASSET_SOURCES = ("site.css", "site.js")
+
+# Inline blocks that older pages carry and the shared bundle replaces
+INLINE_STYLE_RE = re.compile(r"[ \t]*<style>.*?</style>[ \t]*\n?", re.DOTALL)
+INLINE_GA_RE = re.compile(
+    r"[ \t]*(?:<!-- Google Analytics 4 -->\s*)?"
+    r"<script async src=\"https://www\.googletagmanager\.com/gtag/js\?id=[^\"]*\"></script>\s*"
+    r"<script>\s*window\.dataLayer.*?</script>[ \t]*\n?",
+    re.DOTALL,
+)
+ONCLICK_RE = re.compile(
+    r"""\s*onclick="gtag\('event', 'click_(\w+)', \{'event_category': 'affiliate', 'event_label': '(.*?)'\}\)\""""
+)
+
+
+def affiliate_attributes(platform, label):
+    """data-* attributes read by the delegated click handler in site.js."""
+    return f'data-aff="{platform}" data-label="{html.escape(label, quote=True)}"'
+
+
+class SiteAssets:
+    """
+    Fingerprinted stylesheet and script shared by every page.
+
+    build() renders src/publisher/static/site.css and site.js into
+    <output_dir>/assets/site.<hash>.css/.js, named by a hash of their
+    content, and records the names in assets/manifest.json. Old fingerprints
+    are left in place so pages that still reference them keep working.
+    With write=False (dry runs) build() only computes the names.
+    """
+
+    def __init__(self, output_dir="docs", ga_id=GOOGLE_ANALYTICS_ID, write=True):
+        self.output_dir = output_dir
+        self.assets_dir = os.path.join(output_dir, "assets")
+        self.ga_id = ga_id
+        self.write = write
+        self.files = None
+        self._built = False
+        # Files created by build(), for the deploy stage
+        self.written = []
+
+    def _render(self, name):
+        with open(os.path.join(STATIC_DIR, name), "r", encoding="utf-8") as f:
+            text = f.read()
+        if name.endswith(".js"):
+            text = text.replace("__GA_ID__", self.ga_id)
+        return text.encode("utf-8")
+
+    def names(self):
+        """{'site.css': 'site.<hash>.css', ...} for the current sources; nothing is written."""
+        if self.files is None:
+            self.files = {}
+            for name in ASSET_SOURCES:
+                stem, ext = os.path.splitext(name)
+                self.files[name] = f"{stem}.{hashlib.sha256(self._render(name)).hexdigest()[:10]}{ext}"
+        return self.files
+
+    def build(self):
+        """Writes the fingerprinted files if missing (unless write is off). Returns names()."""
+        files = self.names()
+        if self._built or not self.write:
+            return files
+        os.makedirs(self.assets_dir, exist_ok=True)
+        for name, fingerprinted in files.items():
+            path = os.path.join(self.assets_dir, fingerprinted)
+            if not os.path.exists(path):
+                with open(path, "wb") as f:
+                    f.write(self._render(name))
+                self.written.append(path)
+                print(f"Asset written: {path}")
+
+        manifest_path = os.path.join(self.assets_dir, "manifest.json")
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                current = json.load(f)
+        except (OSError, ValueError):
+            current = None
+        if current != files:
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump(files, f, indent=2)
+            self.written.append(manifest_path)
+        self._built = True
+        return files
+
+    def head_tags(self, root=""):
+        """<link>/<script> tags for a page; root is the relative path to the site root."""
+        files = self.build()
+        return (f'<link rel="stylesheet" href="{root}assets/{files["site.css"]}">\n'
+                f'            <script defer src="{root}assets/{files["site.js"]}"></script>')
+
+
+def externalize_page(page_html, head_tags):
+    """
+    Rewrites an already published page to use the shared bundle.
+
+    Drops the inline <style> block and GA bootstrap, turns gtag onclick
+    handlers into data-* attributes and links the bundle before </head>.
+    Returns the new HTML, or None if the page needs no change.
+    """
+    if "/assets/site." in page_html or 'href="assets/site.' in page_html:
+        # Already linked; only convert leftover onclick handlers
+        new_html = ONCLICK_RE.sub(lambda m: " " + affiliate_attributes(m.group(1), m.group(2)), page_html)
+        return new_html if new_html != page_html else None
+    if "</head>" not in page_html:
+        return None
+    new_html = INLINE_STYLE_RE.sub("", page_html, count=1)
+    new_html = INLINE_GA_RE.sub("", new_html, count=1)
+    new_html = ONCLICK_RE.sub(lambda m: " " + affiliate_attributes(m.group(1), m.group(2)), new_html)
+    if new_html == page_html:
+        return None
+    new_html = new_html.replace("</head>", f"    {head_tags}\n        </head>", 1)
+    return new_html
@@ -0,0 +1,264 @@
+import os
+import re
+import html as html_lib
+import sqlite3
+import hashlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_CATALOG_PATH = "catalog.db"
+
+# Files in docs/ that are not articles
+SYSTEM_PAGES = {"index.html", "search.html"}
+
+TITLE_RE = re.compile(r'<title>(.*?)</title>', re.DOTALL)
+DESCRIPTION_RE = re.compile(r'<meta name="description" content="(.*?)">', re.DOTALL)
+DATE_PUBLISHED_RE = re.compile(r'"datePublished":\s*"([^"]+)"')
+DATE_MODIFIED_RE = re.compile(r'"dateModified":\s*"([^"]+)"')
+SEARCH_QUERY_RE = re.compile(r'<div class="product-title">(.*?) \(検索結果\)</div>')
+FILENAME_DATE_RE = re.compile(r'article_(\d{8})_(\d{6})')
+# Article body: after the title, before the generated 関連記事 block (if any) and footer
+BODY_RE = re.compile(r'</h1>(.*?)(?:<div class="related">|<div class="footer">)', re.DOTALL)
+TAG_RE = re.compile(r'<[^>]+>')
+SPACE_RE = re.compile(r'\s+')
+
+
+def is_article_file(filename):
+    """Returns True for published article pages in docs/."""
+    return (
+        filename.endswith(".html")
+        and filename not in SYSTEM_PAGES
+        and not filename.startswith("google")
+        and not filename.startswith("test_")
+    )
+
+
+def html_to_text(html):
+    """Strips tags and collapses whitespace for full-text indexing."""
+    return SPACE_RE.sub(" ", TAG_RE.sub(" ", html)).strip()
+
+
+def scan_article_file(path):
+    """
+    Extracts catalog fields from a rendered article page.
+
+    Runs in worker processes during backfill, so it only returns plain data.
+    """
+    filename = os.path.basename(path)
+    with open(path, 'rb') as f:
+        raw = f.read()
+    html = raw.decode('utf-8', errors='replace')
+    mtime = os.path.getmtime(path)
+
+    m = TITLE_RE.search(html)
+    # Titles and descriptions are HTML-escaped in rendered pages
+    title = html_lib.unescape(m.group(1).strip()) if m else filename
+
+    m = DESCRIPTION_RE.search(html)
+    meta_description = html_lib.unescape(m.group(1)) if m else None
+
+    m = SEARCH_QUERY_RE.search(html)
+    search_query = m.group(1) if m else None
+
+    # Publish date: JSON-LD first, then the timestamped filename, then mtime
+    published_at = None
+    m = DATE_PUBLISHED_RE.search(html)
+    if m:
+        published_at = m.group(1)
+    else:
+        m = FILENAME_DATE_RE.search(filename)
+        if m:
+            published_at = datetime.strptime(m.group(1) + m.group(2), "%Y%m%d%H%M%S").isoformat()
+    if not published_at:
+        published_at = datetime.fromtimestamp(mtime).isoformat()
+
+    # Checkouts reset mtimes, so prefer the modify date stamped into the page
+    m = DATE_MODIFIED_RE.search(html)
+    modified_at = m.group(1) if m else published_at
+
+    m = BODY_RE.search(html)
+    body = html_to_text(m.group(1)) if m else ""
+
+    return {
+        'slug': filename[:-len(".html")],
+        'filename': filename,
+        'title': title,
+        'meta_description': meta_description,
+        'published_at': published_at,
+        'modified_at': modified_at,
+        'content_hash': hashlib.sha256(raw).hexdigest(),
+        'byte_size': len(raw),
+        'search_query': search_query,
+        'body': body,
+    }
+
+
+class ArticleCatalog:
+    """
+    SQLite catalog of published articles.
+
+    Index, sitemap and stats read article metadata from here instead of
+    re-scanning every page in docs/. An FTS5 table mirrors titles and body
+    text so the corpus can be searched without grepping the HTML.
+    """
+
+    def __init__(self, path=DEFAULT_CATALOG_PATH):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                slug TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                title TEXT NOT NULL,
+                meta_description TEXT,
+                published_at TEXT NOT NULL,
+                modified_at TEXT NOT NULL,
+                content_hash TEXT,
+                byte_size INTEGER,
+                search_query TEXT
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (published_at)"
+        )
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'"
+        ).fetchone()
+        if not exists:
+            # trigram tokenizer handles Japanese substrings; older SQLite lacks it
+            try:
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE articles_fts USING fts5(slug UNINDEXED, title, body, tokenize='trigram')"
+                )
+            except sqlite3.OperationalError:
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE articles_fts USING fts5(slug UNINDEXED, title, body)"
+                )
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            self._align_fts_rowids()
+        self.conn.commit()
+
+    def _align_fts_rowids(self):
+        """
+        Gives every FTS row the rowid of its articles row.
+
+        slug is UNINDEXED, so deleting FTS rows by slug scans the whole table;
+        by rowid it is a direct lookup. Older catalogs used arbitrary rowids.
+        """
+        rows = self.conn.execute("""
+            SELECT a.rowid, f.slug, f.title, f.body
+            FROM articles_fts f JOIN articles a ON a.slug = f.slug
+        """).fetchall()
+        self.conn.execute("DELETE FROM articles_fts")
+        self.conn.executemany(
+            "INSERT INTO articles_fts (rowid, slug, title, body) VALUES (?, ?, ?, ?)",
+            [tuple(r) for r in rows]
+        )
+        self.conn.execute("PRAGMA user_version = 1")
+
+    def close(self):
+        self.conn.close()
+
+    def upsert(self, slug, filename, title, meta_description=None, published_at=None,
+               modified_at=None, content_hash=None, byte_size=None, search_query=None,
+               body=None, commit=True):
+        """Inserts or updates one article. The original publish date is kept on update."""
+        now = datetime.now().isoformat()
+        modified_at = modified_at or now
+        self.conn.execute("""
+            INSERT INTO articles (slug, filename, title, meta_description, published_at,
+                                  modified_at, content_hash, byte_size, search_query)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(slug) DO UPDATE SET
+                filename = excluded.filename,
+                title = excluded.title,
+                meta_description = excluded.meta_description,
+                modified_at = excluded.modified_at,
+                content_hash = excluded.content_hash,
+                byte_size = excluded.byte_size,
+                search_query = COALESCE(excluded.search_query, articles.search_query)
+        """, (slug, filename, title, meta_description, published_at or now,
+              modified_at, content_hash, byte_size, search_query))
+        if body is not None:
+            rowid = self.conn.execute("SELECT rowid FROM articles WHERE slug = ?", (slug,)).fetchone()[0]
+            self.conn.execute("DELETE FROM articles_fts WHERE rowid = ?", (rowid,))
+            self.conn.execute(
+                "INSERT INTO articles_fts (rowid, slug, title, body) VALUES (?, ?, ?, ?)",
+                (rowid, slug, title, body)
+            )
+        if commit:
+            self.conn.commit()
+
+    def get(self, slug):
+        row = self.conn.execute("SELECT * FROM articles WHERE slug = ?", (slug,)).fetchone()
+        return dict(row) if row else None
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def list_articles(self, limit=None, oldest_first=False):
+        """Returns articles newest first (or oldest first)."""
+        if oldest_first:
+            sql = "SELECT * FROM articles ORDER BY published_at, slug"
+        else:
+            sql = "SELECT * FROM articles ORDER BY published_at DESC, slug DESC"
+        params = ()
+        if limit:
+            sql += " LIMIT ?"
+            params = (limit,)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def count_by_date(self, date_str):
+        """Counts articles published on a given YYYY-MM-DD date."""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM articles WHERE substr(published_at, 1, 10) = ?",
+            (date_str,)
+        ).fetchone()[0]
+
+    def search(self, query, limit=20):
+        """Full-text search over titles and bodies."""
+        rows = self.conn.execute("""
+            SELECT a.slug, a.filename, a.title, a.published_at,
+                   snippet(articles_fts, 2, '[', ']', '…', 12) AS snippet
+            FROM articles_fts
+            JOIN articles a ON a.rowid = articles_fts.rowid
+            WHERE articles_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """, (query, limit))
+        return [dict(row) for row in rows]
+
+    def remove_missing(self, docs_dir):
+        """Drops catalog entries whose page no longer exists."""
+        removed = 0
+        for row in self.conn.execute("SELECT rowid, slug, filename FROM articles").fetchall():
+            if not os.path.exists(os.path.join(docs_dir, row['filename'])):
+                self.conn.execute("DELETE FROM articles WHERE rowid = ?", (row['rowid'],))
+                self.conn.execute("DELETE FROM articles_fts WHERE rowid = ?", (row['rowid'],))
+                removed += 1
+        self.conn.commit()
+        return removed
+
+    def backfill(self, docs_dir, workers=None):
+        """Scans every existing page in docs_dir in parallel and records it."""
+        paths = [
+            os.path.join(docs_dir, f) for f in os.listdir(docs_dir)
+            if is_article_file(f) and os.path.isfile(os.path.join(docs_dir, f))
+        ]
+        count = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for data in pool.map(scan_article_file, paths, chunksize=32):
+                self.upsert(commit=False, **data)
+                count += 1
+        self.conn.commit()
+        removed = self.remove_missing(docs_dir)
+        print(f"Catalog backfill: {count} articles indexed, {removed} stale entries removed.")
+        return count
@@ -0,0 +1,214 @@
+import os
+import json
+import mmap
+import zlib
+import shutil
+import struct
+from datetime import datetime
+from src.utils.quota import FileLock
+
+DEFAULT_STORE_PATH = "data/content/articles.pack"
+
+# Record header: magic, payload length, CRC32 of the payload
+RECORD_MAGIC = b"GCR1"
+HEADER = struct.Struct("<4sII")
+
+
+class ContentStore:
+    """
+    Append-only store of article source records.
+
+    Every record (title, slug, meta fields and the Markdown that was
+    rendered) is zlib-compressed JSON appended to one pack file behind a
+    small header. An offset index (slug -> offset, length of the latest
+    record) is kept in <pack>.idx and caught up by scanning whatever was
+    appended since it was written. Reads go through an mmap of the pack, so
+    a full-site rebuild touches each record once without re-reading HTML.
+
+    The pack is the only copy of the article sources and is kept out of
+    git (see .gitignore): it is binary and append-only, so every revision
+    would stay in the history. Back it up with
+    `python -m tools.rebuild_site backup <dir>` (backup() below).
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.lock_path = path + ".lock"
+        self.entries = {}
+        self._indexed_size = 0
+        self._mm = None
+        self._file = None
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        if not os.path.exists(path):
+            open(path, "ab").close()
+        self._load_index()
+
+    @classmethod
+    def from_settings(cls):
+        from config.settings import CONTENT_STORE_PATH
+        return cls(CONTENT_STORE_PATH)
+
+    # ------------------------------------------------------------------ index
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = {slug: tuple(entry) for slug, entry in data["entries"].items()}
+            self._indexed_size = data["pack_size"]
+        except (OSError, ValueError, KeyError):
+            self.entries = {}
+            self._indexed_size = 0
+        size = os.path.getsize(self.path)
+        if size < self._indexed_size:
+            # Pack was replaced or truncated; the index cannot be trusted
+            self.entries = {}
+            self._indexed_size = 0
+        if size > self._indexed_size:
+            self._scan_from(self._indexed_size)
+            self.save_index()
+
+    def _scan_from(self, offset):
+        """Indexes records appended after `offset`; truncates a torn tail left by a crash."""
+        with open(self.path, "r+b") as f:
+            f.seek(offset)
+            while True:
+                header = f.read(HEADER.size)
+                if not header:
+                    break
+                if len(header) < HEADER.size:
+                    self._truncate_tail(f, offset)
+                    break
+                magic, length, crc = HEADER.unpack(header)
+                payload = f.read(length)
+                if magic != RECORD_MAGIC or len(payload) < length or zlib.crc32(payload) != crc:
+                    self._truncate_tail(f, offset)
+                    break
+                record = json.loads(zlib.decompress(payload))
+                self.entries[record["slug"]] = (offset, HEADER.size + length)
+                offset += HEADER.size + length
+        self._indexed_size = offset
+
+    def _truncate_tail(self, f, offset):
+        print(f"Content store: dropping incomplete record at offset {offset} in {self.path}")
+        f.truncate(offset)
+
+    def save_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"pack_size": self._indexed_size, "entries": self.entries}, f, separators=(",", ":"))
+        os.replace(tmp, self.index_path)
+
+    # ------------------------------------------------------------------ write
+
+    def put(self, record, save_index=True):
+        """
+        Appends a source record; it supersedes any earlier record for the same slug.
+
+        record must contain 'slug'. A 'stored_at' timestamp is added.
+        """
+        record = dict(record, stored_at=datetime.now().isoformat())
+        payload = zlib.compress(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+        data = HEADER.pack(RECORD_MAGIC, len(payload), zlib.crc32(payload)) + payload
+        with FileLock(self.lock_path):
+            # Another process may have appended since we indexed
+            if os.path.getsize(self.path) > self._indexed_size:
+                self._scan_from(self._indexed_size)
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[record["slug"]] = (offset, len(data))
+            self._indexed_size = offset + len(data)
+            if save_index:
+                self.save_index()
+        return record
+
+    # ------------------------------------------------------------------ read
+
+    def _map(self):
+        size = os.path.getsize(self.path)
+        if self._mm is not None and len(self._mm) >= self._indexed_size:
+            return self._mm
+        self.close()
+        if size == 0:
+            return None
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def _decode(self, mm, offset, length):
+        payload = mm[offset + HEADER.size:offset + length]
+        return json.loads(zlib.decompress(payload))
+
+    def get(self, slug):
+        entry = self.entries.get(slug)
+        if entry is None:
+            return None
+        return self._decode(self._map(), *entry)
+
+    def __contains__(self, slug):
+        return slug in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def slugs(self):
+        return sorted(self.entries)
+
+    def iter_records(self):
+        """Yields the latest record per slug, in pack order."""
+        mm = self._map()
+        if mm is None:
+            return
+        for slug, (offset, length) in sorted(self.entries.items(), key=lambda item: item[1][0]):
+            yield self._decode(mm, offset, length)
+
+    def stats(self):
+        size = os.path.getsize(self.path)
+        live = sum(length for _, length in self.entries.values())
+        return {'records': len(self.entries), 'pack_bytes': size, 'live_bytes': live}
+
+    # ------------------------------------------------------------------ maintenance
+
+    def compact(self):
+        """Rewrites the pack with only the latest record per slug."""
+        with FileLock(self.lock_path):
+            tmp = self.path + ".compact"
+            entries = {}
+            mm = self._map()
+            if mm is None:
+                return
+            with open(tmp, "wb") as out:
+                for slug, (offset, length) in sorted(self.entries.items(), key=lambda item: item[1][0]):
+                    entries[slug] = (out.tell(), length)
+                    out.write(mm[offset:offset + length])
+            self.close()
+            os.replace(tmp, self.path)
+            self.entries = entries
+            self._indexed_size = os.path.getsize(self.path)
+            self.save_index()
+
+    def backup(self, dest_dir):
+        """Copies the pack and its index to dest_dir under the store lock. Returns the copied paths."""
+        os.makedirs(dest_dir, exist_ok=True)
+        copied = []
+        with FileLock(self.lock_path):
+            for path in (self.path, self.index_path):
+                if os.path.exists(path):
+                    target = os.path.join(dest_dir, os.path.basename(path))
+                    shutil.copy2(path, target)
+                    copied.append(target)
+        return copied
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
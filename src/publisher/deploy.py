@@ -0,0 +1,177 @@
+import os
+import re
+import csv
+import json
+import time
+import subprocess
+from datetime import datetime
+from src.utils.quota import FileLock
+
+DEPLOY_STATE_PATH = "data/deploy_state.json"
+DEPLOY_LOG_FILE = "logs/deploy.csv"
+
+# "Writing objects: 100% (12/12), 3.41 KiB | 3.41 MiB/s, done." on stderr with --progress
+PUSH_BYTES_RE = re.compile(r"Writing objects: 100% \(\d+/\d+\), ([\d.]+) (bytes|KiB|MiB|GiB)")
+UNITS = {'bytes': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3}
+
+
+class DeployError(RuntimeError):
+    """A git command failed; the message carries its stderr."""
+
+
+class GitDeployer:
+    """
+    Commits the files a run wrote and pushes them in batches.
+
+    deploy(paths) stages exactly `paths` (no `git add .`, so git never walks
+    all of docs/), commits them if anything actually changed and pushes
+    once `push_interval` seconds have passed since the last push. Commits
+    made in between stay local and go out together with the next push.
+    Every commit/push is appended to logs/deploy.csv with duration and
+    pushed bytes.
+    """
+
+    def __init__(self, repo_dir=".", remote="origin", branch="main", push_interval=0,
+                 state_path=DEPLOY_STATE_PATH, log_file=DEPLOY_LOG_FILE):
+        self.repo_dir = os.path.abspath(repo_dir)
+        self.remote = remote
+        self.branch = branch
+        self.push_interval = push_interval
+        self.state_path = state_path
+        self.log_file = log_file
+        self.lock_path = os.path.join(self.repo_dir, "data", "locks", "deploy.lock")
+
+    @classmethod
+    def from_settings(cls):
+        from config.settings import DEPLOY_REMOTE, DEPLOY_BRANCH, DEPLOY_PUSH_INTERVAL_MINUTES
+        return cls(remote=DEPLOY_REMOTE, branch=DEPLOY_BRANCH, push_interval=DEPLOY_PUSH_INTERVAL_MINUTES * 60)
+
+    # ------------------------------------------------------------------ git
+
+    def _git(self, *args, input=None, check=True):
+        # Literal pathspecs: file names are never treated as globs
+        proc = subprocess.run(
+            ["git", "--literal-pathspecs", *args], cwd=self.repo_dir, input=input,
+            capture_output=True, text=True, encoding="utf-8", errors="replace",
+        )
+        if check and proc.returncode != 0:
+            raise DeployError(f"git {args[0]} failed ({proc.returncode}): {proc.stderr.strip()[:500]}")
+        return proc
+
+    def _relative(self, paths):
+        """Repo-relative, de-duplicated paths; anything outside the repo is dropped."""
+        rel = set()
+        for path in paths:
+            r = os.path.relpath(os.path.abspath(path), self.repo_dir)
+            if not r.startswith(".."):
+                rel.add(r.replace(os.sep, "/"))
+        return sorted(rel)
+
+    def _stage(self, paths):
+        """Stages new/modified files and removals of deleted ones. Returns the paths now staged."""
+        present = [p for p in paths if os.path.exists(os.path.join(self.repo_dir, p))]
+        missing = sorted(set(paths) - set(present))
+        if present:
+            self._git("add", "--pathspec-from-file=-", "--pathspec-file-nul", input="\0".join(present))
+        if missing:
+            self._git("rm", "--cached", "--quiet", "--ignore-unmatch", "--pathspec-from-file=-",
+                      "--pathspec-file-nul", input="\0".join(missing))
+        # Index vs HEAD only; the work tree is not scanned
+        staged = set(self._git("diff", "--cached", "--name-only", "-z").stdout.split("\0"))
+        return [p for p in paths if p in staged]
+
+    def unpushed_commits(self):
+        upstream = f"{self.remote}/{self.branch}"
+        if self._git("rev-parse", "--verify", "--quiet", upstream, check=False).returncode != 0:
+            # Nothing pushed yet: everything on HEAD is pending
+            return int(self._git("rev-list", "--count", "HEAD").stdout.strip() or 0)
+        return int(self._git("rev-list", "--count", f"{upstream}..HEAD").stdout.strip() or 0)
+
+    # ------------------------------------------------------------------ state/log
+
+    def _read_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_state(self, state):
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+
+    def _log(self, action, files, commits, pushed_bytes, seconds, result):
+        os.makedirs(os.path.dirname(os.path.abspath(self.log_file)), exist_ok=True)
+        file_exists = os.path.isfile(self.log_file)
+        with open(self.log_file, mode='a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if not file_exists:
+                writer.writerow(['Timestamp', 'Action', 'Files', 'Commits', 'Bytes', 'Seconds', 'Result'])
+            writer.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), action, files, commits,
+                             pushed_bytes, f"{seconds:.2f}", result[:200]])
+
+    # ------------------------------------------------------------------ deploy
+
+    def commit(self, paths, message):
+        """Stages and commits only `paths`. Returns the number of files committed (0 = nothing changed)."""
+        paths = self._relative(paths)
+        if not paths:
+            return 0
+        start = time.monotonic()
+        staged = self._stage(paths)
+        if not staged:
+            print("Deploy: no changes in the files this run wrote. Nothing to commit.")
+            return 0
+        # Commit just these paths, even if something else happens to be staged
+        self._git("commit", "--quiet", "-m", message, "--pathspec-from-file=-", "--pathspec-file-nul",
+                  input="\0".join(staged))
+        seconds = time.monotonic() - start
+        self._log("commit", len(staged), 1, 0, seconds, "ok")
+        print(f"Deploy: committed {len(staged)} file(s) in {seconds:.1f}s.")
+        return len(staged)
+
+    def push_due(self, state=None):
+        state = state if state is not None else self._read_state()
+        last = state.get('last_push', 0)
+        return time.time() - last >= self.push_interval
+
+    def push(self):
+        """Pushes local commits. Returns the pushed byte count (0 if nothing to push)."""
+        commits = self.unpushed_commits()
+        if not commits:
+            return 0
+        start = time.monotonic()
+        try:
+            proc = self._git("push", "--progress", self.remote, f"HEAD:{self.branch}")
+        except DeployError as e:
+            self._log("push", 0, commits, 0, time.monotonic() - start, str(e))
+            raise
+        seconds = time.monotonic() - start
+        m = PUSH_BYTES_RE.search(proc.stderr)
+        pushed_bytes = int(float(m.group(1)) * UNITS[m.group(2)]) if m else 0
+        # Keep the remote-tracking ref current for unpushed_commits()
+        self._git("update-ref", f"refs/remotes/{self.remote}/{self.branch}", "HEAD", check=False)
+        self._write_state(dict(self._read_state(), last_push=time.time()))
+        self._log("push", 0, commits, pushed_bytes, seconds, "ok")
+        print(f"Deploy: pushed {commits} commit(s), {pushed_bytes / 1024:.1f} KB in {seconds:.1f}s.")
+        return pushed_bytes
+
+    def deploy(self, paths, message="Auto-deploy: New content generated", force_push=False):
+        """
+        Commits the given paths and pushes if the push interval has elapsed.
+
+        Returns True if a push happened. Raises DeployError if git fails;
+        committed work stays local and is pushed by a later run.
+        """
+        with FileLock(self.lock_path):
+            self.commit(paths, message)
+            if not self.unpushed_commits():
+                return False
+            if not (force_push or self.push_due()):
+                remaining = self.push_interval - (time.time() - self._read_state().get('last_push', 0))
+                print(f"Deploy: {self.unpushed_commits()} local commit(s) waiting; "
+                      f"next push in {remaining / 60:.0f} min.")
+                return False
+            self.push()
+            return True
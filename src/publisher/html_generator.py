@@ -1,361 +1,296 @@
 import os
 import markdown
-import re
+import hashlib
 from datetime import datetime
-from config.settings import GOOGLE_ANALYTICS_ID
+from config.settings import CATALOG_PATH, CONTENT_STORE_PATH, AMAZON_TAG, RAKUTEN_ID
+from src.publisher.catalog import ArticleCatalog, html_to_text, is_article_file
+from src.publisher.index_pages import IndexPages
+from src.publisher.search_index import SearchIndex
+from src.publisher.sitemap import SitemapWriter
+from src.publisher.assets import SiteAssets
+from src.publisher.templating import render
+from src.publisher.shortcodes import ShortcodeEngine
+from src.publisher.affiliate import AffiliateInjector
+from src.publisher.content_store import ContentStore
+from src.publisher.related import RelatedArticles
+from src.publisher.output import OutputStage
+from src.publisher.keyword_linker import KeywordLinker
+from src.utils.telemetry import telemetry
+from markupsafe import Markup
 
 class HtmlGenerator:
-    def __init__(self, output_dir="docs", base_url="https://yurisis.github.io/Gaia"):
+    def __init__(self, output_dir="docs", base_url="https://yurisis.github.io/Gaia", catalog=None,
+                 content_store=None, related=None):
         self.output_dir = output_dir
         self.base_url = base_url
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
+        # Catalog and content store are opened on first use, so render-only
+        # workers (tools/rebuild_site.py) never touch them
+        self._catalog = catalog
+        self._content_store = content_store
+        self._related = related
+        # Shared, fingerprinted CSS/JS linked from every page instead of inlined
+        self.assets = SiteAssets(self.output_dir)
+        injector = AffiliateInjector(amazon_tag=AMAZON_TAG, rakuten_id=RAKUTEN_ID)
+        self.shortcodes = ShortcodeEngine(product_card=injector.generate_product_card)
+        # Product/brand names in the body become affiliate links (dictionary compiled once)
+        self.linker = KeywordLinker.from_settings(injector)
+        # One Markdown instance, reset per article (building it loads every extension)
+        self.md = markdown.Markdown(extensions=['extra'])
+        # Minifies HTML and keeps .gz/.br siblings for everything written below
+        self.output = OutputStage.from_settings()
+        # Files actually (re)written by render_record(), update_index() and
+        # generate_sitemap(); unchanged files are skipped
+        self.written_files = []
 
-    def generate_article(self, title, markdown_content, filename, meta_description=None):
-        """Converts Markdown to HTML and saves it."""
-        
-        # Process Shortcodes before Markdown conversion
-        processed_content = self.process_shortcodes(markdown_content)
+    @property
+    def catalog(self):
+        if self._catalog is None:
+            self._catalog = ArticleCatalog(CATALOG_PATH)
+        return self._catalog
+
+    @property
+    def content_store(self):
+        if self._content_store is None:
+            self._content_store = ContentStore(CONTENT_STORE_PATH)
+        return self._content_store
+
+    @property
+    def related(self):
+        # Loaded once per generator; rebuild workers read neighbours.json a single time
+        if self._related is None:
+            self._related = RelatedArticles.from_settings()
+        return self._related
+
+    def _catalog_articles(self):
+        """Returns catalog rows newest first, backfilling once if the catalog is empty."""
+        if self.catalog.count() == 0:
+            print("Article catalog is empty. Backfilling from existing pages...")
+            self.catalog.backfill(self.output_dir)
+        return self.catalog.list_articles()
+
+    def generate_article(self, title, markdown_content, filename, meta_description=None, search_query=None,
+                         source=None):
+        """
+        Converts Markdown to HTML and saves it.
 
-        # Enable attribute lists extension if needed
-        html_content = markdown.markdown(processed_content, extensions=['extra'])
-        
+        The inputs are first appended to the content store as the article's
+        source record (source: the raw generated fields, if the caller has
+        them), so the page can later be re-rendered without the API.
+        Non-article pages (test_*, google*) are only rendered and written;
+        they stay out of the content store, related index and catalog, so
+        they never reach the index, sitemap or search.
+        """
         # Description fallback
         if not meta_description:
-            # Strip tags for fallback
             meta_description = f"{title}に関する詳細記事です。"
-        
-        # Article URL
-        article_url = f"{self.base_url}/{filename}"
-        
-        # JSON-LD Structured Data
-        published_date = datetime.now().isoformat()
-        json_ld = f"""
-        <script type="application/ld+json">
-        {{
-          "@context": "https://schema.org",
-          "@type": "Article",
-          "headline": "{title}",
-          "image": [
-            "https://via.placeholder.com/1200x675.png?text=Gaia+Blog" 
-           ],
-          "datePublished": "{published_date}",
-          "dateModified": "{published_date}",
-          "author": {{
-              "@type": "Person",
-              "name": "Gaia AI",
-              "url": "https://yurisis.github.io/Gaia/"
-          }},
-          "publisher": {{
-              "@type": "Organization",
-              "name": "Gaia Blog",
-              "logo": {{
-                "@type": "ImageObject",
-                "url": "https://via.placeholder.com/600x60.png?text=Gaia+Logo"
-              }}
-          }},
-          "description": "{meta_description}"
-        }}
-        </script>
-        """
-
-        template = f"""
-        <!DOCTYPE html>
-        <html lang="ja">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{title}</title>
-            <meta name="description" content="{meta_description}">
-            <link rel="icon" href="favicon.png" type="image/png">
-            
-            {json_ld}
-            
-            <!-- Google Analytics 4 -->
-            <script async src="https://www.googletagmanager.com/gtag/js?id={GOOGLE_ANALYTICS_ID}"></script>
-            <script>
-            window.dataLayer = window.dataLayer || [];
-            function gtag(){{dataLayer.push(arguments);}}
-            gtag('js', new Date());
-            gtag('config', '{GOOGLE_ANALYTICS_ID}');
-            </script>
-            
-            <!-- OGP Tags -->
-            <meta property="og:title" content="{title}" />
-            <meta property="og:type" content="article" />
-            <meta property="og:url" content="{article_url}" />
-            <meta property="og:description" content="{meta_description}" />
-            <meta property="og:site_name" content="Gaia Blog" />
-            <meta property="og:locale" content="ja_JP" />
 
-            <style>
-                /* Common */
-                body {{ font-family: 'Helvetica Neue', Arial, sans-serif; line-height: 1.6; max-width: 800px; margin: 0 auto; padding: 20px; color: #333; }}
-                h1 {{ color: #2c3e50; font-size: 1.8em; margin-bottom: 30px; }}
-                h2 {{ color: #34495e; border-bottom: 2px solid #ecf0f1; padding-bottom: 10px; margin-top: 40px; font-size: 1.5em; clear: both; }}
-                h3 {{ color: #2c3e50; margin-top: 30px; font-size: 1.25em; border-left: 5px solid #3498db; padding-left: 10px; }}
-                a {{ color: #3498db; text-decoration: none; }}
-                a:hover {{ text-decoration: underline; }}
-                .container {{ background: #fff; padding: 40px; border-radius: 8px; box-shadow: 0 4px 15px rgba(0,0,0,0.05); }}
-                .footer {{ margin-top: 60px; padding-top: 20px; border-top: 1px solid #eee; font-size: 0.9em; color: #7f8c8d; text-align: center; }}
-                .nav {{ margin-bottom: 20px; }}
+        slug = os.path.splitext(filename)[0]
+        record = {
+            'slug': slug,
+            'filename': filename,
+            'title': title,
+            'meta_description': meta_description,
+            'search_query': search_query,
+            'format': 'markdown',
+            'content': markdown_content,
+        }
+        # Dates come from the stored record so re-rendering the same article
+        # produces the same bytes: publish date is fixed on first save and the
+        # modify date only moves when the article itself changes.
+        now = datetime.now().isoformat(timespec='seconds')
+        if not is_article_file(filename):
+            record.update(published_at=now, modified_at=now)
+            self.render_record(record)
+            filepath = os.path.join(self.output_dir, filename)
+            print(f"Page saved to: {filepath} (not an article; not listed)")
+            return filepath
 
-                /* Chat Bubble */
-                .chat-box {{ width: 100%; overflow: hidden; margin-bottom: 20px; }}
-                .chat-face {{ float: left; margin-right: 15px; text-align: center; width: 60px; }}
-                .chat-face img {{ width: 50px; height: 50px; border-radius: 50%; border: 2px solid #eee; object-fit: cover; background-color: #ddd; }}
-                .chat-area {{ float: left; position: relative; width: calc(100% - 90px); }}
-                .chat-bubble {{ position: relative; display: inline-block; padding: 15px; background: #f0f4f8; border-radius: 10px; }}
-                .chat-bubble::after {{ content: ''; position: absolute; left: -10px; top: 15px; border-right: 15px solid #f0f4f8; border-top: 10px solid transparent; border-bottom: 10px solid transparent; }}
-                
-                /* Right Chat (User) */
-                .chat-box.right .chat-face {{ float: right; margin-right: 0; margin-left: 15px; }}
-                .chat-box.right .chat-area {{ float: right; text-align: right; }}
-                .chat-box.right .chat-bubble {{ background: #e3f2fd; text-align: left; }}
-                .chat-box.right .chat-bubble::after {{ left: auto; right: -10px; border-right: none; border-left: 15px solid #e3f2fd; }}
+        previous = self.content_store.get(slug)
+        if previous is None:
+            # Pages published before the content store existed keep their catalog date
+            known = self.catalog.get(slug)
+            record.update(published_at=known['published_at'] if known else now, modified_at=now, source=source)
+            record = self.content_store.put(record)
+        elif any(previous.get(k) != v for k, v in record.items()):
+            record.update(published_at=previous['published_at'], modified_at=now, source=source)
+            record = self.content_store.put(record)
+        else:
+            record = previous
 
-                /* Merit/Demerit Boxes */
-                .box-common, .merit-box, .demerit-box {{ padding: 20px; border-radius: 5px; margin: 25px 0; border: 1px solid transparent; }}
-                .box-common {{ background-color: #f9f9f9; border-color: #ddd; }}
-                .box-common table {{ width: 100%; border-collapse: collapse; margin-top: 15px; }}
-                .box-common th, .box-common td {{ padding: 10px; border: 1px solid #ddd; text-align: left; }}
-                .box-common th {{ background-color: #f1f5f9; width: 30%; color: #334155; }}
-                .merit-box {{ background-color: #f0f9ff; border-color: #bae6fd; color: #0369a1; }}
-                .merit-box::before {{ content: '✅ メリット'; display: block; font-weight: bold; margin-bottom: 10px; font-size: 1.1em; }}
-                .demerit-box {{ background-color: #fef2f2; border-color: #fecaca; color: #b91c1c; }}
-                .demerit-box::before {{ content: '⚠️ デメリット・注意点'; display: block; font-weight: bold; margin-bottom: 10px; font-size: 1.1em; }}
+        # New or changed articles join the related-article index first, so
+        # this page already lists its neighbours; pages whose lists changed
+        # are re-rendered from their stored records.
+        relinked = set()
+        if record is not previous or slug not in self.related.meta['articles']:
+            with telemetry.stage("related", slug=slug) as event:
+                relinked = self.related.update([(slug, title, filename, title + "\n" + markdown_content)])
+                event['items'] = len(relinked)
 
-                /* Rating */
-                .rating-box {{ display: flex; align-items: center; margin-bottom: 20px; font-weight: bold; background: #fffbeb; padding: 10px; border-radius: 5px; }}
-                .stars {{ color: #f59e0b; font-size: 1.2em; margin-left: 10px; letter-spacing: 2px; }}
+        already_written = len(self.written_files)
+        fields = self.render_record(record)
 
-                /* Product Card (Amazon/Rakuten Style) */
-                .product-card {{ display: flex; border: 1px solid #e5e7eb; border-radius: 8px; overflow: hidden; margin: 30px 0; box-shadow: 0 4px 6px -1px rgba(0,0,0,0.1); transition: transform 0.2s; }}
-                .product-card:hover {{ transform: translateY(-2px); box-shadow: 0 10px 15px -3px rgba(0,0,0,0.1); }}
-                .product-img {{ width: 120px; background: #f3f4f6; display: flex; align-items: center; justify-content: center; font-size: 2em; color: #9ca3af; min-height: 120px; text-align: center; }}
-                .product-info {{ padding: 20px; flex: 1; display: flex; flex-direction: column; justify-content: center; }}
-                .product-title {{ font-weight: bold; font-size: 1.1em; margin-bottom: 5px; color: #1f2937; }}
-                .product-btn-group {{ margin-top: 15px; display: flex; gap: 10px; }}
-                .btn {{ display: inline-block; padding: 10px 20px; border-radius: 4px; color: #fff; font-weight: bold; text-align: center; font-size: 0.9em; flex: 1; max-width: 150px; text-decoration: none; }}
-                .btn-amazon {{ background-color: #f9ce56; color: #111; }}
-                .btn-rakuten {{ background-color: #bf0000; }}
-                .btn:hover {{ opacity: 0.9; text-decoration: none; }}
+        # Record in the catalog so index/sitemap never have to re-read pages
+        self.catalog.upsert(**fields)
+        for other in sorted(relinked):
+            other_record = self.content_store.get(other)
+            if other_record is not None:
+                self.catalog.upsert(**self.render_record(other_record))
 
-                /* Clearfix for floats */
-                .clearfix::after {{ content: ""; clear: both; display: table; }}
-
-                /* Responsive */
-                @media (max-width: 600px) {{
-                    .product-card {{ flex-direction: column; }}
-                    .product-img {{ width: 100%; height: 150px; }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="nav"><a href="index.html">← Top Page</a></div>
-                <h1>{title}</h1>
-                {html_content}
-                <div class="footer">
-                    <p>&copy; {datetime.now().year} Gaia Automated Content. All rights reserved.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
         filepath = os.path.join(self.output_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(template)
-        
-        print(f"Article saved to: {filepath}")
+        if filepath in self.written_files[already_written:]:
+            print(f"Article saved to: {filepath}")
+        else:
+            print(f"Article unchanged: {filepath}")
+        if relinked:
+            print(f"Related links refreshed on {len(relinked)} other page(s).")
         return filepath
 
-    def process_shortcodes(self, content):
-        """Replaces custom shortcodes with HTML structures."""
-        
-        # Chat Left (User)
-        # Pattern: [[CHAT_L: message]]
-        def repl_chat_l(match):
-            msg = match.group(1)
-            return f"""
-<div class="chat-box">
-    <div class="chat-face"><img src="https://api.dicebear.com/9.x/avataaars/svg?seed=Felix" alt="User"></div>
-    <div class="chat-area">
-        <div class="chat-bubble">{msg}</div>
-    </div>
-</div>
-"""
-        content = re.sub(r'\[\[CHAT_L:\s*(.*?)\]\]', repl_chat_l, content, flags=re.DOTALL)
+    def render_markdown(self, markdown_content):
+        """Shortcodes, then Markdown (with the 'extra' extension) to HTML."""
+        processed_content = self.process_shortcodes(markdown_content)
+        with telemetry.stage("markdown"):
+            return self.md.reset().convert(processed_content)
+
+    def render_record(self, record):
+        """
+        Renders and writes the page for a content store record.
 
-        # Chat Right (Agent)
-        # Pattern: [[CHAT_R: message]]
-        def repl_chat_r(match):
-            msg = match.group(1)
-            return f"""
-<div class="chat-box right">
-    <div class="chat-face"><img src="https://api.dicebear.com/9.x/avataaars/svg?seed=Aneka" alt="Agent"></div>
-    <div class="chat-area">
-        <div class="chat-bubble">{msg}</div>
-    </div>
-</div>
-"""
-        content = re.sub(r'\[\[CHAT_R:\s*(.*?)\]\]', repl_chat_r, content, flags=re.DOTALL)
+        Records imported from already published pages hold HTML
+        (format 'html') and skip the Markdown step. Either way the body
+        then gets in-body affiliate links from the keyword dictionary. The
+        page is written atomically (minified) and only if its bytes
+        changed; written paths, precompressed siblings included, are
+        collected in self.written_files. Returns the catalog fields for the
+        page; the catalog itself is not touched.
+        """
+        if record.get('format') == 'html':
+            html_content = record['content']
+        else:
+            html_content = self.render_markdown(record['content'])
+        with telemetry.stage("keyword_links", slug=record['slug']) as event:
+            html_content, linked = self.linker.link(html_content)
+            event['items'] = len(linked)
+        modified_at = record.get('modified_at') or record['published_at']
+        page = self.render_article_page(record['title'], html_content, record['filename'],
+                                        record['meta_description'], record['published_at'], modified_at,
+                                        related=self.related.neighbours(record['slug']))
 
-        return content
+        filepath = os.path.join(self.output_dir, record['filename'])
+        with telemetry.stage("write", slug=record['slug']) as event:
+            data, written = self.output.write(filepath, page)
+            event.update(items=len(written), bytes=len(data))
+        self.written_files.extend(written)
 
-    def generate_sitemap(self):
-        """Generates sitemap.xml."""
-        # Include all html files except system files
-        files = [
-            f for f in os.listdir(self.output_dir) 
-            if f.endswith(".html") 
-            and f != "index.html" 
-            and not f.startswith("google")
-            and not f.startswith("test_")
-        ]
-        # Sort by modification time (newest first)
-        files.sort(key=lambda x: os.path.getmtime(os.path.join(self.output_dir, x)), reverse=True)
+        return {
+            'slug': record['slug'],
+            'filename': record['filename'],
+            'title': record['title'],
+            'meta_description': record['meta_description'],
+            'published_at': record['published_at'],
+            'modified_at': modified_at,
+            'content_hash': hashlib.sha256(data).hexdigest(),
+            'byte_size': len(data),
+            'search_query': record.get('search_query'),
+            'body': html_to_text(html_content),
+        }
 
-        sitemap_content = """<?xml version="1.0" encoding="UTF-8"?>
-<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
-"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        # Add index
-        sitemap_content += f"""    <url>
-        <loc>{self.base_url}/index.html</loc>
-        <lastmod>{today}</lastmod>
-        <changefreq>daily</changefreq>
-        <priority>1.0</priority>
-    </url>
-"""
+    def render_article_page(self, title, html_content, filename, meta_description, published_date=None,
+                            modified_date=None, related=None):
+        """
+        Renders the full article page around already converted HTML.
 
-        for f in files:
-            file_url = f"{self.base_url}/{f}"
-            sitemap_content += f"""    <url>
-        <loc>{file_url}</loc>
-        <lastmod>{today}</lastmod>
-        <changefreq>monthly</changefreq>
-        <priority>0.8</priority>
-    </url>
-"""
-        
-        sitemap_content += "</urlset>"
-        
-        with open(os.path.join(self.output_dir, "sitemap.xml"), 'w', encoding='utf-8') as f:
-            f.write(sitemap_content)
-        print("Updated sitemap.xml")
+        Shared by generate_article() and the scripts that re-wrap existing
+        pages, so there is only one article layout. Without published_date
+        the JSON-LD block is omitted. related ([{'title', 'filename'}], from
+        RelatedArticles.neighbours()) becomes the 関連記事 block. Nothing here
+        reads the clock: the same inputs always render the same page.
+        """
+        json_ld = None
+        if published_date:
+            # JSON-LD Structured Data
+            json_ld = {
+                "@context": "https://schema.org",
+                "@type": "Article",
+                "headline": title,
+                "image": ["https://via.placeholder.com/1200x675.png?text=Gaia+Blog"],
+                "datePublished": published_date,
+                "dateModified": modified_date or published_date,
+                "author": {
+                    "@type": "Person",
+                    "name": "Gaia AI",
+                    "url": "https://yurisis.github.io/Gaia/"
+                },
+                "publisher": {
+                    "@type": "Organization",
+                    "name": "Gaia Blog",
+                    "logo": {
+                        "@type": "ImageObject",
+                        "url": "https://via.placeholder.com/600x60.png?text=Gaia+Logo"
+                    }
+                },
+                "description": meta_description,
+            }
+        return render(
+            "article.html",
+            title=title,
+            description=meta_description,
+            url=f"{self.base_url}/{filename}",
+            json_ld=json_ld,
+            content=Markup(html_content),
+            root="",
+            assets=self.assets.build(),
+            year=(published_date or "")[:4] or None,
+            related=related or [],
+        )
 
-    def update_index(self):
-        """Updates the index.html file with a nice grid layout."""
-        # Include all html files except system files
-        files = [
-            f for f in os.listdir(self.output_dir) 
-            if f.endswith(".html") 
-            and f != "index.html" 
-            and not f.startswith("google")
-            and not f.startswith("test_")
-        ]
-        # Sort by modification time (newest first)
-        files.sort(key=lambda x: os.path.getmtime(os.path.join(self.output_dir, x)), reverse=True)
+    def process_shortcodes(self, content):
+        """Expands [[NAME: ...]] shortcodes in one pass; malformed codes are reported and left as text."""
+        with telemetry.stage("shortcodes") as event:
+            html, errors = self.shortcodes.render(content)
+            event['errors'] = len(errors)
+        for error in errors:
+            print(f"Shortcode warning (line {error['line']}, {error['code']}): {error['message']}")
+        return html
 
-        # Extract titles from files to display in index
-        articles_data = []
-        for f in files:
-            path = os.path.join(self.output_dir, f)
-            title = f # Default
-            try:
-                with open(path, 'r', encoding='utf-8') as file:
-                    content = file.read()
-                    # regex to parse <title>...</title>
-                    m = re.search(r'<title>(.*?)</title>', content)
-                    if m:
-                        title = m.group(1)
-            except:
-                pass
-            
-            # Create a clean date from filename if possible
-            # article_20260217... -> 2026-02-17
-            m_date = re.search(r'article_(\d{8})_', f)
-            if m_date:
-                d = m_date.group(1)
-                date_str = f"{d[:4]}-{d[4:6]}-{d[6:]}"
-            else:
-                # If filename does not contain date, use file modification time
-                mtime = os.path.getmtime(path)
-                date_str = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d')
+    def generate_sitemap(self, changed_files=None):
+        """
+        Generates sitemap.xml as a sitemap index with per-month shards.
 
-            articles_data.append({'file': f, 'title': title, 'date': date_str})
+        With changed_files, only the shards holding those articles are rewritten.
+        """
+        self._catalog_articles()  # backfill an empty catalog first
+        with telemetry.stage("sitemap", items=len(changed_files or [])) as event:
+            writer = SitemapWriter(self.output_dir, self.base_url, self.catalog, output=self.output)
+            writer.write(changed_files)
+            event['written'] = len(writer.written)
+        self.written_files.extend(writer.written)
 
-        cards_html = ""
-        for item in articles_data:
-            cards_html += f"""
-            <a href="{item['file']}" class="card">
-                <div class="card-content">
-                    <div class="card-date">{item['date']}</div>
-                    <h2 class="card-title">{item['title']}</h2>
-                    <div class="card-readmore">Read More →</div>
-                </div>
-            </a>
-            """
+    def update_index(self, new_files=None):
+        """
+        Updates the paginated index (index.html, page/, month/, cards/) and
+        the search index (search.html, search/).
 
-        template = f"""
-        <!DOCTYPE html>
-        <html lang="ja">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Gaia Blog - Automated Tech & Life Hacks</title>
-            <meta name="description" content="AIが自動生成する最新のガジェット・ライフハックブログ。">
-            <link rel="icon" href="favicon.png" type="image/png">
-            <style>
-                body {{ font-family: 'Helvetica Neue', Arial, sans-serif; line-height: 1.6; max-width: 900px; margin: 0 auto; padding: 20px; background-color: #f4f6f8; color: #333; }}
-                header {{ text-align: center; margin-bottom: 50px; padding: 40px 0; }}
-                h1 {{ font-size: 2.5em; margin: 0; color: #2c3e50; }}
-                p.subtitle {{ color: #7f8c8d; font-size: 1.1em; }}
-                
-                .grid {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(280px, 1fr)); gap: 20px; }}
-                
-                .card {{ background: #fff; border-radius: 8px; box-shadow: 0 2px 5px rgba(0,0,0,0.05); overflow: hidden; text-decoration: none; color: inherit; transition: transform 0.2s, box-shadow 0.2s; display: block; }}
-                .card:hover {{ transform: translateY(-3px); box-shadow: 0 5px 15px rgba(0,0,0,0.1); }}
-                
-                .card-content {{ padding: 20px; }}
-                .card-date {{ font-size: 0.85em; color: #95a5a6; margin-bottom: 10px; }}
-                .card-title {{ font-size: 1.2em; margin: 0 0 15px 0; color: #2c3e50; line-height: 1.4; border: none; padding: 0; }}
-                .card-readmore {{ color: #3498db; font-weight: bold; font-size: 0.9em; }}
-                
-                .footer {{ margin-top: 60px; padding-top: 20px; border-top: 1px solid #ddd; font-size: 0.9em; color: #7f8c8d; text-align: center; }}
-            </style>
-        </head>
-    <!-- Google Analytics 4 -->
-    <script async src="https://www.googletagmanager.com/gtag/js?id={GOOGLE_ANALYTICS_ID}"></script>
-    <script>
-      window.dataLayer = window.dataLayer || [];
-      function gtag(){{dataLayer.push(arguments);}}
-      gtag('js', new Date());
-      gtag('config', '{GOOGLE_ANALYTICS_ID}');
-    </script>
-        <body>
-            <header>
-                <h1>Gaia Blog</h1>
-                <p class="subtitle">Daily Tech trends & Life Hacks provided by AI</p>
-            </header>
-            
-            <div class="grid">
-                {cards_html}
-            </div>
-            
-            <div class="footer">
-                <p>&copy; {datetime.now().year} Gaia Automated Content. All rights reserved.</p>
-            </div>
-        </body>
-        </html>
+        With new_files, only the newest page and the shards/archives holding
+        those articles are rewritten; otherwise everything is rebuilt.
         """
-        
-        with open(os.path.join(self.output_dir, "index.html"), 'w', encoding='utf-8') as f:
-            f.write(template)
-        print("Updated index.html with Grid Layout")
-        
-        # Also update sitemap whenever index is updated
-        self.generate_sitemap()
+        self._catalog_articles()  # backfill an empty catalog first
+        with telemetry.stage("index", items=len(new_files or [])) as event:
+            pages = IndexPages(self.output_dir, self.catalog, assets=self.assets, output=self.output)
+            pages.update(new_files)
+            self.written_files.extend(pages.written)
+            event['written'] = len(pages.written)
+        with telemetry.stage("search_index", items=len(new_files or [])) as event:
+            search = SearchIndex(self.output_dir, self.catalog, assets=self.assets, output=self.output)
+            search.update(new_files)
+            self.written_files.extend(search.written)
+            event['written'] = len(search.written)
+
+    def written_paths(self):
+        """Every file this generator wrote or removed so far (pages, listings, sitemap, assets)."""
+        return self.written_files + self.assets.written
+
+    def rebuild_index(self):
+        """Rebuilds every index page from the full catalog."""
+        self.update_index()
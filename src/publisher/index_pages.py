@@ -0,0 +1,193 @@
+import os
+import json
+from src.publisher.assets import SiteAssets
+from src.publisher.templating import render
+from src.publisher.output import OutputStage
+
+# Cards per static page and per JSON shard
+PAGE_SIZE = 30
+
+# Bump whenever the listing layout or shard format changes; forces a full rebuild
+INDEX_TEMPLATE_VERSION = 7
+
+MANIFEST_PATH = os.path.join("cards", "manifest.json")
+
+
+class IndexPages:
+    """
+    Paginated site front built from the article catalog.
+
+    Articles are split oldest-first into fixed-size chunks, so chunk k never
+    changes once it is full and a new article only touches the newest chunk:
+
+    - index.html            newest two chunks + infinite scroll
+    - page/<k>.html         static page for chunk k (crawlable fallback)
+    - cards/<k>.json        compact card shard for chunk k
+    - month/<YYYY-MM>.html  monthly archive
+    - cards/manifest.json   build state used for incremental updates
+    """
+
+    def __init__(self, output_dir, catalog, page_size=PAGE_SIZE, assets=None, output=None):
+        self.output_dir = output_dir
+        self.catalog = catalog
+        self.page_size = page_size
+        self.assets = assets or SiteAssets(output_dir)
+        self.output = output or OutputStage.from_settings()
+        self.year = None
+        # Paths actually rewritten by update(), for the deploy stage
+        self.written = []
+
+    # ------------------------------------------------------------------ helpers
+
+    def _write(self, relpath, content):
+        _, written = self.output.write(os.path.join(self.output_dir, relpath), content)
+        self.written.extend(written)
+
+    def _read_manifest(self):
+        path = os.path.join(self.output_dir, MANIFEST_PATH)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _chunks(self, articles):
+        """Splits oldest-first articles into 1-based chunks."""
+        return {
+            i // self.page_size + 1: articles[i:i + self.page_size]
+            for i in range(0, len(articles), self.page_size)
+        }
+
+    @staticmethod
+    def _month(article):
+        return article['published_at'][:7]
+
+    # ------------------------------------------------------------------ build
+
+    def update(self, new_files=None):
+        """
+        Writes the listing pages.
+
+        With new_files, only index.html, the chunks holding those articles and
+        their month archives are rewritten. Anything unexpected (missing or
+        outdated manifest, articles inserted before the last build) falls back
+        to a full rebuild.
+        """
+        articles = self.catalog.list_articles(oldest_first=True)
+        chunks = self._chunks(articles)
+        manifest = self._read_manifest()
+        # Footer year follows the newest article, not the clock, so unchanged pages render identically
+        self.year = articles[-1]['published_at'][:4] if articles else None
+
+        if new_files and self._can_update_incrementally(manifest, articles):
+            slugs = {os.path.splitext(os.path.basename(f))[0] for f in new_files}
+            positions = [i for i, a in enumerate(articles) if a['slug'] in slugs]
+            pages = {i // self.page_size + 1 for i in positions}
+            # The previous last page links "newer" to the index; relink it if a chunk was opened
+            if len(chunks) != manifest['pages'] and manifest['pages'] in chunks:
+                pages.add(manifest['pages'])
+            months = {self._month(articles[i]) for i in positions}
+            full = False
+        else:
+            pages = set(chunks)
+            months = {self._month(a) for a in articles}
+            full = True
+
+        for k in sorted(pages):
+            self._write(os.path.join("cards", f"{k}.json"), self._render_shard(chunks[k]))
+            self._write(os.path.join("page", f"{k}.html"), self._render_page(k, chunks[k], len(chunks)))
+        for month in sorted(months):
+            month_articles = [a for a in articles if self._month(a) == month]
+            self._write(os.path.join("month", f"{month}.html"), self._render_month(month, month_articles))
+
+        all_months = sorted({self._month(a) for a in articles}, reverse=True)
+        self._write("index.html", self._render_index(chunks, all_months))
+        self._write(MANIFEST_PATH, json.dumps({
+            'version': INDEX_TEMPLATE_VERSION,
+            'page_size': self.page_size,
+            'pages': len(chunks),
+            'count': len(articles),
+            'last': articles[-1]['slug'] if articles else None,
+            'assets': self.assets.build(),
+        }))
+
+        mode = "Rebuilt" if full else "Updated"
+        print(f"{mode} index.html ({len(pages)} page(s), {len(months)} month archive(s))")
+
+    def _can_update_incrementally(self, manifest, articles):
+        if not manifest:
+            return False
+        if manifest.get('version') != INDEX_TEMPLATE_VERSION or manifest.get('page_size') != self.page_size:
+            print("Index template changed. Falling back to full rebuild.")
+            return False
+        if manifest.get('assets') != self.assets.build():
+            print("Site assets changed. Falling back to full rebuild.")
+            return False
+        if not os.path.exists(os.path.join(self.output_dir, "index.html")):
+            return False
+        # Earlier chunks are only stable if everything new sorts after the last build
+        count = manifest.get('count', 0)
+        if count > len(articles):
+            return False
+        if count and articles[count - 1]['slug'] != manifest.get('last'):
+            print("Article order changed since last build. Falling back to full rebuild.")
+            return False
+        return True
+
+    # ------------------------------------------------------------------ render
+
+    def _render_shard(self, chunk):
+        cards = [
+            {'f': a['filename'], 't': a['title'], 'd': a['published_at'][:10]}
+            for a in reversed(chunk)
+        ]
+        return json.dumps(cards, ensure_ascii=False, separators=(',', ':'))
+
+    def _render_index(self, chunks, months):
+        total = len(chunks)
+        shown = []
+        for k in (total, total - 1):
+            if k in chunks:
+                shown.extend(reversed(chunks[k]))
+        next_shard = total - 2
+
+        links = []
+        if next_shard >= 1:
+            links.append((f"page/{next_shard}.html", "← 過去の記事"))
+
+        # site.js loads cards/<next_shard>.json and older while scrolling
+        return self._render_layout(
+            "Gaia Blog - Automated Tech & Life Hacks", "", shown, links, months,
+            next_shard=next_shard,
+        )
+
+    def _render_page(self, k, chunk, total):
+        links = []
+        if k > 1:
+            links.append((f"{k - 1}.html", "← 過去の記事"))
+        if k < total:
+            links.append((f"{k + 1}.html", "新しい記事 →"))
+        else:
+            links.append(("../index.html", "トップへ"))
+        return self._render_layout(f"Gaia Blog - Page {k}", "../", list(reversed(chunk)), links, [])
+
+    def _render_month(self, month, articles):
+        links = [("../index.html", "トップへ")]
+        return self._render_layout(f"Gaia Blog - {month} の記事", "../", list(reversed(articles)), links, [])
+
+    def _render_layout(self, title, root, articles, links, months, next_shard=None):
+        return render(
+            "listing.html",
+            title=title,
+            description="AIが自動生成する最新のガジェット・ライフハックブログ。",
+            root=root,
+            body_class="listing",
+            assets=self.assets.build(),
+            articles=articles,
+            links=links,
+            months=months,
+            next_shard=next_shard,
+            year=self.year,
+        )
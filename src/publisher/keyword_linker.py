@@ -0,0 +1,217 @@
+import os
+import re
+from collections import deque
+from src.publisher.assets import affiliate_attributes
+
+DEFAULT_KEYWORDS_PATH = "config/affiliate_keywords.tsv"
+PLATFORMS = ("amazon", "rakuten")
+
+# Text inside these is never linked: existing links, headings, code, and the product card
+SKIP_TAGS = {"a", "h1", "h2", "h3", "h4", "h5", "h6", "script", "style", "pre", "code",
+             "button", "textarea", "title"}
+SKIP_CLASSES = ("product-card",)
+
+TAG_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*)>|<!--.*?-->', re.DOTALL)
+CLASS_RE = re.compile(r'class\s*=\s*["\']([^"\']*)["\']')
+ENTITY_RE = re.compile(r'&#?\w+;')
+
+
+def _is_word_char(ch):
+    return ch.isascii() and ch.isalnum()
+
+
+class Automaton:
+    """
+    Aho-Corasick automaton over lowercase patterns.
+
+    Built once from the whole dictionary; scanning a text follows one
+    transition per character plus output links, so the cost depends on the
+    text and the number of matches, not on how many patterns there are.
+    """
+
+    def __init__(self, patterns):
+        # State 0 is the root. goto[s]: char -> state; out[s]: pattern ending here (or None)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [None]
+        self.out_link = [0]  # nearest proper suffix state that ends a pattern
+        for pattern in patterns:
+            self._insert(pattern)
+        self._link()
+
+    def _insert(self, pattern):
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(None)
+                self.out_link.append(0)
+                self.goto[state][ch] = nxt
+            state = nxt
+        self.out[state] = pattern
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0) if self.goto[f].get(ch, 0) != nxt else 0
+                fail_state = self.fail[nxt]
+                self.out_link[nxt] = fail_state if self.out[fail_state] else self.out_link[fail_state]
+
+    def __len__(self):
+        return len(self.goto)
+
+    def find(self, text):
+        """Yields (start, end, pattern) for every occurrence in text."""
+        goto, fail, out, out_link = self.goto, self.fail, self.out, self.out_link
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            s = state if out[state] else out_link[state]
+            while s:
+                pattern = out[s]
+                yield i + 1 - len(pattern), i + 1, pattern
+                s = out_link[s]
+
+
+def load_keywords(path):
+    """
+    Reads the keyword dictionary: one `term<TAB>search query<TAB>platform`
+    per line. The query defaults to the term and the platform to amazon;
+    blank lines and lines starting with # are ignored.
+    """
+    entries = []
+    if not os.path.exists(path):
+        return entries
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = [field.strip() for field in line.rstrip("\n").split("\t")]
+            term = fields[0]
+            query = fields[1] if len(fields) > 1 and fields[1] else term
+            platform = fields[2] if len(fields) > 2 and fields[2] in PLATFORMS else "amazon"
+            if len(term) >= 2:
+                entries.append((term, query, platform))
+    return entries
+
+
+class KeywordLinker:
+    """
+    Links product and brand names in rendered article HTML to affiliate
+    searches.
+
+    The whole dictionary is compiled into one Aho-Corasick automaton. link()
+    walks the HTML once, feeding only text outside tags, existing links,
+    headings, code and product cards to the automaton, and turns the first
+    occurrence of each term into a tracked affiliate link (longest match
+    wins where terms overlap, e.g. a model name over its brand).
+    """
+
+    def __init__(self, entries, injector, max_links=10):
+        self.injector = injector
+        self.max_links = max_links
+        self.targets = {}
+        for term, query, platform in entries:
+            self.targets.setdefault(term.lower(), (query, platform))
+        self.automaton = Automaton(self.targets)
+
+    @classmethod
+    def from_settings(cls, injector):
+        from config.settings import AFFILIATE_KEYWORDS_PATH, AFFILIATE_LINKS_PER_ARTICLE
+        return cls(load_keywords(AFFILIATE_KEYWORDS_PATH), injector, max_links=AFFILIATE_LINKS_PER_ARTICLE)
+
+    def _anchor(self, text, key):
+        query, platform = self.targets[key]
+        url = query if query.startswith("http") else self.injector.generate_search_link(query, platform)
+        return (f'<a href="{url}" class="aff-link" target="_blank" rel="nofollow sponsored noopener" '
+                f'{affiliate_attributes(platform, query)}>{text}</a>')
+
+    def _matches(self, text, linked):
+        """Leftmost-longest, non-overlapping, not yet linked matches in one text node."""
+        lowered = text.lower()
+        if len(lowered) != len(text):  # lower() changed lengths; offsets would not line up
+            lowered = text
+        entities = [m.span() for m in ENTITY_RE.finditer(text)] if "&" in text else []
+        found = []
+        for start, end, key in self.automaton.find(lowered):
+            if _is_word_char(key[0]) and start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if _is_word_char(key[-1]) and end < len(text) and _is_word_char(text[end]):
+                continue
+            if any(s < end and start < e for s, e in entities):
+                continue
+            found.append((start, -(end - start), key))
+        found.sort()
+        chosen = []
+        last_end = 0
+        for start, neg_len, key in found:
+            if start < last_end or key in linked:
+                continue
+            chosen.append((start, start - neg_len, key))
+            linked.add(key)
+            last_end = start - neg_len
+            if len(linked) >= self.max_links:
+                break
+        return chosen
+
+    def _link_text(self, text, linked):
+        chosen = self._matches(text, linked)
+        if not chosen:
+            return text
+        parts = []
+        pos = 0
+        for start, end, key in chosen:
+            parts.append(text[pos:start])
+            parts.append(self._anchor(text[start:end], key))
+            pos = end
+        parts.append(text[pos:])
+        return "".join(parts)
+
+    def link(self, html):
+        """Returns (html with affiliate links, set of linked terms)."""
+        linked = set()
+        if not self.targets or self.max_links <= 0:
+            return html, linked
+        out = []
+        pos = 0
+        skip = None   # tag name of the element being skipped
+        depth = 0     # nesting of that tag name inside it
+        for m in TAG_RE.finditer(html):
+            text = html[pos:m.start()]
+            if text and skip is None and len(linked) < self.max_links:
+                text = self._link_text(text, linked)
+            out.append(text)
+            out.append(m.group(0))
+            pos = m.end()
+            name = (m.group(2) or "").lower()
+            if not name or m.group(3).rstrip().endswith("/"):
+                continue
+            closing = m.group(1) == "/"
+            if skip is None:
+                if not closing and (name in SKIP_TAGS or self._has_skip_class(m.group(3))):
+                    skip, depth = name, 1
+            elif name == skip:
+                depth += -1 if closing else 1
+                if depth == 0:
+                    skip = None
+        tail = html[pos:]
+        if tail and skip is None and len(linked) < self.max_links:
+            tail = self._link_text(tail, linked)
+        out.append(tail)
+        return "".join(out), linked
+
+    @staticmethod
+    def _has_skip_class(attributes):
+        m = CLASS_RE.search(attributes)
+        return bool(m) and any(c in m.group(1).split() for c in SKIP_CLASSES)
@@ -0,0 +1,254 @@
+import os
+import re
+import html as html_lib
+import difflib
+from concurrent.futures import ProcessPoolExecutor
+from src.publisher.catalog import (is_article_file, TITLE_RE, DESCRIPTION_RE, DATE_PUBLISHED_RE,
+                                   DATE_MODIFIED_RE, BODY_RE)
+from src.publisher.output import OutputStage
+from src.publisher.templating import MIGRATION_VERSION
+
+# Every page carries the migration version it is at; pages without one are at 0
+MARKER_RE = re.compile(r'<meta name="gaia-migration" content="(\d+)">')
+FAVICON_TAG = '<link rel="icon" href="favicon.png" type="image/png">'
+
+# version -> (name, function, articles_only), filled by @migration below
+PASSES = {}
+
+# Per-worker state (the article generator), created on first use
+_worker = {}
+
+
+def migration(version, name, articles_only=False):
+    """
+    Registers a site-wide pass.
+
+    The function takes (page, context) and returns the new page HTML, the
+    same HTML if the page needs nothing, or None if the pass cannot be
+    applied to this page (the page then stays at the previous version).
+    context holds path, filename, docs_dir and apply (False in a dry run,
+    when a pass must not write anything). Versions must be unique and only
+    ever grow; freshly rendered pages are stamped with
+    templating.MIGRATION_VERSION, which must be bumped with each new pass,
+    so a pass must describe a change the templates already make.
+    """
+    def register(func):
+        if version in PASSES:
+            raise ValueError(f"Migration version {version} is already registered ({PASSES[version][0]})")
+        PASSES[version] = (name, func, articles_only)
+        return func
+    return register
+
+
+def latest_version():
+    return max(PASSES) if PASSES else 0
+
+
+def page_version(page):
+    m = MARKER_RE.search(page)
+    return int(m.group(1)) if m else 0
+
+
+def stamp_version(page, version):
+    """Sets the page's migration marker. Returns None if the page has no <head> to put it in."""
+    marker = f'<meta name="gaia-migration" content="{version}">'
+    if MARKER_RE.search(page):
+        return MARKER_RE.sub(marker, page, count=1)
+    if "</head>" not in page:
+        return None
+    return page.replace("</head>", f"{marker}\n</head>", 1)
+
+
+# --- Passes ---------------------------------------------------------------
+
+@migration(1, "favicon")
+def add_favicon(page, context):
+    """Links favicon.png right after <title> (was tools/add_favicon.py)."""
+    if 'rel="icon"' in page or 'favicon.png' in page:
+        return page
+    return re.sub(r'(<title>.*?</title>)', lambda m: m.group(1) + "\n" + FAVICON_TAG, page,
+                  count=1, flags=re.IGNORECASE | re.DOTALL)
+
+
+def rewrap_article(page, context):
+    """
+    Re-renders an article page around its existing body with the current
+    article template (was update_articles.py). Title, description and
+    dates are read back from the page, so JSON-LD and OGP tags survive.
+    """
+    body = BODY_RE.search(page)
+    title = TITLE_RE.search(page)
+    if not body or not title:
+        return None
+    generator = _generator(context['docs_dir'], context['apply'])
+    title = html_lib.unescape(title.group(1).strip())
+    m = DESCRIPTION_RE.search(page)
+    description = html_lib.unescape(m.group(1)) if m else f"{title}に関する詳細記事です。"
+    m = DATE_PUBLISHED_RE.search(page)
+    published_at = m.group(1) if m else None
+    m = DATE_MODIFIED_RE.search(page)
+    modified_at = m.group(1) if m else None
+    slug = context['filename'][:-len(".html")]
+    return generator.render_article_page(title, body.group(1).strip(), context['filename'], description,
+                                         published_at, modified_at, related=generator.related.neighbours(slug))
+
+
+migration(2, "article-layout", articles_only=True)(rewrap_article)
+
+# Rendered pages claim MIGRATION_VERSION, so it must name the newest pass
+if latest_version() != MIGRATION_VERSION:
+    raise RuntimeError(f"templating.MIGRATION_VERSION is {MIGRATION_VERSION} but the newest migration is "
+                       f"v{latest_version()}")
+
+
+# --- Engine ---------------------------------------------------------------
+
+def _generator(docs_dir, apply):
+    # Imported on first use: only the layout pass needs the full generator
+    if 'generator' not in _worker:
+        from src.publisher.html_generator import HtmlGenerator
+        _worker['generator'] = HtmlGenerator(docs_dir)
+    generator = _worker['generator']
+    # A dry run only needs the asset names; it must not write assets/
+    generator.assets.write = apply
+    return generator
+
+
+def migrate_page(page, context, target):
+    """
+    Applies every pass between the page's version and target, in order.
+
+    Returns (new page, version reached, names of the passes that changed
+    it, name of the pass that could not be applied or None).
+    """
+    version = page_version(page)
+    changed_by = []
+    blocked = None
+    for v in sorted(PASSES):
+        if v <= version or v > target:
+            continue
+        name, func, articles_only = PASSES[v]
+        if articles_only and not is_article_file(context['filename']):
+            version = v
+            continue
+        new_page = func(page, context)
+        if new_page is None:
+            blocked = name
+            break
+        if new_page != page:
+            changed_by.append(name)
+            page = new_page
+        version = v
+    return page, version, changed_by, blocked
+
+
+def _diff_lines(old, new):
+    added = removed = 0
+    for line in difflib.unified_diff(old.splitlines(), new.splitlines(), lineterm="", n=0):
+        if line.startswith("+") and not line.startswith("+++"):
+            added += 1
+        elif line.startswith("-") and not line.startswith("---"):
+            removed += 1
+    return added, removed
+
+
+def _migrate_file(job):
+    """
+    Worker: one read, every pending pass, one write. Returns a result dict,
+    or None if the page is already at target (or cannot carry a marker:
+    empty files, verification stubs without <head>).
+    """
+    path, docs_dir, target, apply, minify, precompress, want_diff = job
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        page = f.read()
+    if "</head>" not in page or page_version(page) >= target:
+        return None
+    context = {'path': path, 'filename': os.path.basename(path), 'docs_dir': docs_dir, 'apply': apply}
+    from_version = page_version(page)
+    new_page, version, changed_by, blocked = migrate_page(page, context, target)
+    result = {'path': path, 'from': from_version, 'to': version, 'passes': changed_by, 'blocked': blocked,
+              'written': [], 'bytes': 0, 'added': 0, 'removed': 0, 'diff': None}
+    if version > from_version:
+        new_page = stamp_version(new_page, version)
+    stage = OutputStage(minify=minify, precompress=precompress)
+    final = stage.prepare(path, new_page).decode("utf-8")
+    if final == page:
+        return result
+    result['bytes'] = len(final.encode("utf-8")) - len(page.encode("utf-8"))
+    result['added'], result['removed'] = _diff_lines(page, final)
+    if want_diff:
+        result['diff'] = "\n".join(difflib.unified_diff(page.splitlines(), final.splitlines(), path, path,
+                                                        lineterm="", n=1))
+    if apply:
+        _, result['written'] = stage.write(path, new_page)
+        result['stats'] = stage.stats
+    return result
+
+
+class MigrationEngine:
+    """
+    Brings published pages up to the latest migration version.
+
+    Each page is read once, every pending pass runs on the in-memory HTML
+    and the result is written once through the output stage (minified,
+    .gz/.br refreshed), in a process pool. The version reached is stamped
+    into the page, so re-runs skip finished pages without parsing them.
+    """
+
+    def __init__(self, docs_dir="docs", output=None):
+        self.docs_dir = docs_dir
+        self.output = output or OutputStage.from_settings()
+        self.results = []
+        self.scanned = 0
+        self.diffs = []
+
+    def pages(self):
+        # Listing pages under page/ and month/ are re-rendered whole by update_index()
+        return [os.path.join(self.docs_dir, name) for name in sorted(os.listdir(self.docs_dir))
+                if name.endswith(".html")]
+
+    def run(self, target=None, apply=False, workers=None, diffs=0):
+        """Migrates (or with apply=False only plans) every page; returns the per-page results."""
+        target = latest_version() if target is None else target
+        paths = self.pages()
+        jobs = [(path, self.docs_dir, target, apply, self.output.minify, self.output.precompress, False)
+                for path in paths]
+        if workers == 1:
+            results = list(map(_migrate_file, jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_migrate_file, jobs, chunksize=32))
+        self.results = [r for r in results if r is not None]
+        for r in self.results:
+            self.output.merge(r.pop('stats', {}))
+        # Diffs are only computed, in a dry run, for the first few changed pages
+        changed = [] if apply else [r['path'] for r in self.results if r['added'] or r['removed']][:diffs]
+        for path in changed:
+            self.diffs.append(_migrate_file((path, self.docs_dir, target, False, self.output.minify,
+                                             self.output.precompress, True))['diff'])
+        self.scanned = len(paths)
+        return self.results
+
+    def written(self):
+        return [path for r in self.results for path in r['written']]
+
+    def report(self, apply=False):
+        """Summary lines: pages per pass, stamp-only pages, blocked pages and the diff size."""
+        changed = [r for r in self.results if r['added'] or r['removed'] or r['bytes']]
+        lines = [f"{'Migrated' if apply else 'Would migrate'} {len(changed)} of {self.scanned} page(s) "
+                 f"({self.scanned - len(self.results)} already at target or without <head>): "
+                 f"+{sum(r['added'] for r in changed)}/-{sum(r['removed'] for r in changed)} line(s), "
+                 f"{sum(r['bytes'] for r in changed) / 1024:+.0f} KB"]
+        for v in sorted(PASSES):
+            name = PASSES[v][0]
+            count = sum(1 for r in self.results if name in r['passes'])
+            lines.append(f"  v{v} {name}: {count} page(s) changed")
+        stamp_only = sum(1 for r in changed if not r['passes'])
+        if stamp_only:
+            lines.append(f"  {stamp_only} page(s) only get the version marker (or minification)")
+        blocked = [r for r in self.results if r['blocked']]
+        if blocked:
+            lines.append(f"  {len(blocked)} page(s) stopped early:")
+            for r in blocked[:10]:
+                lines.append(f"    {r['path']}: stays at v{r['to']}, {r['blocked']} not applicable")
+        return lines
@@ -0,0 +1,208 @@
+import os
+import re
+import csv
+import gzip
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from src.utils.fs import write_if_changed
+
+try:
+    import brotli
+except ImportError:  # optional; .br siblings are skipped without it
+    brotli = None
+
+OUTPUT_LOG_FILE = "logs/output.csv"
+
+COMPRESSIBLE = (".html", ".xml", ".json")
+
+# Whitespace is significant inside these; JSON-LD lives in <script> and stays byte-identical
+PROTECTED_RE = re.compile(r'<(pre|textarea|script|style)\b[^>]*>.*?</\1\s*>', re.DOTALL | re.IGNORECASE)
+COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+TAG_OR_TEXT_RE = re.compile(r'(<[^>]*>)')
+SPACE_RUN_RE = re.compile(r'\s+')
+
+STAT_KEYS = ('files', 'source_bytes', 'output_bytes', 'gzip_bytes', 'brotli_bytes')
+
+
+def _collapse(match):
+    return "\n" if "\n" in match.group(0) else " "
+
+
+def _minify_segment(html):
+    html = COMMENT_RE.sub("", html)
+    parts = TAG_OR_TEXT_RE.split(html)
+    # Even parts are text between tags, odd parts are tags (left as written, attributes included)
+    for i in range(0, len(parts), 2):
+        parts[i] = SPACE_RUN_RE.sub(_collapse, parts[i])
+    return "".join(parts)
+
+
+def minify_html(html):
+    """
+    Drops indentation, blank lines and comments without changing rendering.
+
+    Every whitespace run in text becomes one newline or space (browsers
+    render them the same), so no inline spacing is lost. Tags, <pre>,
+    <textarea>, <script> (including JSON-LD) and <style> are left untouched.
+    """
+    out = []
+    last = 0
+    for m in PROTECTED_RE.finditer(html):
+        out.append(_minify_segment(html[last:m.start()]))
+        out.append(m.group(0))
+        last = m.end()
+    out.append(_minify_segment(html[last:]))
+    return "".join(out).strip() + "\n"
+
+
+def gzip_bytes(data):
+    # mtime=0 keeps the .gz bytes stable when the source is unchanged
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_bytes(data):
+    return brotli.compress(data, quality=11)
+
+
+class OutputStage:
+    """
+    Last step before a generated file reaches the disk.
+
+    write() minifies HTML, writes the file only if its bytes changed and,
+    for HTML, XML and JSON, keeps precompressed .gz (and .br when the
+    brotli package is installed) siblings next to it. Siblings are only
+    recompressed when the file changed or they are missing, so unchanged
+    pages cost one hash comparison.
+
+    Sizes of everything written are added up in self.stats; report()
+    and log_run() turn them into the per-run savings line.
+    """
+
+    def __init__(self, minify=True, precompress=True, log_file=OUTPUT_LOG_FILE):
+        self.minify = minify
+        self.precompress = precompress
+        self.log_file = log_file
+        self.stats = dict.fromkeys(STAT_KEYS, 0)
+
+    @classmethod
+    def from_settings(cls):
+        from config.settings import OUTPUT_MINIFY_HTML, OUTPUT_PRECOMPRESS
+        return cls(minify=OUTPUT_MINIFY_HTML, precompress=OUTPUT_PRECOMPRESS)
+
+    def prepare(self, path, content):
+        """Final bytes for path: minified if it is HTML and minification is on."""
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        if self.minify and path.endswith(".html"):
+            content = minify_html(content)
+        return content.encode('utf-8')
+
+    def write(self, path, content, compress=None):
+        """
+        Writes content (str or bytes) to path through the stage.
+
+        compress=True forces a .gz sibling even when precompression is off
+        (sitemap shards are referenced as .xml.gz). Returns (final bytes,
+        paths written).
+        """
+        source_size = len(content.encode('utf-8') if isinstance(content, str) else content)
+        data = self.prepare(path, content)
+        written = []
+        changed = write_if_changed(path, data)
+        if changed:
+            written.append(path)
+            self.stats['files'] += 1
+            self.stats['source_bytes'] += source_size
+            self.stats['output_bytes'] += len(data)
+
+        compress = self.precompress if compress is None else compress
+        if compress and path.endswith(COMPRESSIBLE):
+            siblings = [(".gz", gzip_bytes, 'gzip_bytes')]
+            if brotli is not None and self.precompress:
+                siblings.append((".br", brotli_bytes, 'brotli_bytes'))
+            for suffix, compressor, key in siblings:
+                sibling = path + suffix
+                if not changed and os.path.exists(sibling):
+                    continue
+                packed = compressor(data)
+                if write_if_changed(sibling, packed):
+                    written.append(sibling)
+                if changed:
+                    self.stats[key] += len(packed)
+        return data, written
+
+    def merge(self, stats):
+        """Adds another stage's stats (e.g. from a rebuild worker)."""
+        for key in STAT_KEYS:
+            self.stats[key] += stats.get(key, 0)
+
+    def report(self):
+        s = self.stats
+        if not s['files']:
+            return "Output: nothing written"
+        saved = s['source_bytes'] - s['output_bytes']
+        line = (f"Output: {s['files']} file(s), {s['source_bytes'] / 1024:.0f} KB rendered -> "
+                f"{s['output_bytes'] / 1024:.0f} KB written ({saved / 1024:.0f} KB saved by minification)")
+        if s['gzip_bytes']:
+            line += f"; .gz {s['gzip_bytes'] / 1024:.0f} KB"
+        if s['brotli_bytes']:
+            line += f", .br {s['brotli_bytes'] / 1024:.0f} KB"
+        return line
+
+    def log_run(self, mode):
+        """Prints the savings line and appends it to logs/output.csv."""
+        print(self.report())
+        if not self.stats['files']:
+            return
+        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+        file_exists = os.path.isfile(self.log_file)
+        with open(self.log_file, mode='a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if not file_exists:
+                writer.writerow(['Timestamp', 'Mode', 'Files', 'SourceBytes', 'OutputBytes', 'GzipBytes', 'BrotliBytes'])
+            writer.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), mode] + [self.stats[k] for k in STAT_KEYS])
+
+
+def _process_file(args):
+    """Worker: passes one existing file through a fresh stage. Returns (written, stats)."""
+    path, minify, precompress = args
+    stage = OutputStage(minify=minify, precompress=precompress)
+    with open(path, 'rb') as f:
+        data = f.read()
+    # Already-published files count as their current size, so savings reflect this pass
+    _, written = stage.write(path, data)
+    return written, stage.stats
+
+
+def process_tree(stage, output_dir, workers=None):
+    """
+    Bulk mode: runs every HTML, XML and JSON file under output_dir through
+    the stage in a process pool (existing corpus, or after changing the
+    settings). Returns the paths written; sizes are merged into stage.stats.
+    """
+    paths = []
+    for root, _, files in os.walk(output_dir):
+        paths.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(COMPRESSIBLE))
+    written = []
+    jobs = [(path, stage.minify, stage.precompress) for path in sorted(paths)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for files, stats in pool.map(_process_file, jobs, chunksize=32):
+            written.extend(files)
+            stage.merge(stats)
+    return written
+
+
+def remove_siblings(output_dir):
+    """Deletes every .gz/.br sibling of an HTML/XML/JSON file, except sitemap shards. Returns the paths."""
+    removed = []
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            base, suffix = os.path.splitext(name)
+            if suffix not in (".gz", ".br") or not base.endswith(COMPRESSIBLE):
+                continue
+            if suffix == ".gz" and os.path.basename(root) == "sitemaps":
+                continue
+            path = os.path.join(root, name)
+            os.remove(path)
+            removed.append(path)
+    return removed
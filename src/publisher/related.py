@@ -0,0 +1,322 @@
+import os
+import json
+import numpy as np
+import scipy.sparse as sp
+from src.publisher.similarity import normalize_text
+
+DEFAULT_RELATED_DIR = "data/related"
+
+NGRAM = 3
+DIMENSIONS = 1 << 20      # hashed n-gram space; no vocabulary to refit when articles arrive
+TERMS_PER_ARTICLE = 600   # strongest TF-IDF terms kept per article; keeps the products sparse
+MAX_DF_RATIO = 0.05       # n-grams in more articles than this say nothing about relatedness
+MAX_DF_FLOOR = 20         # ...unless the corpus is so small that the ratio means a handful
+BATCH_ROWS = 1024         # rows per similarity product in a full recompute
+MIN_SCORE = 0.03          # below this nothing is shared but boilerplate
+FOLD_ROWS = 256           # appended rows kept in the delta files before they are folded into the base
+FORMAT_VERSION = 1
+
+
+def ngram_counts(text):
+    """
+    Hashed character n-gram counts of normalized text: (ids, counts) arrays.
+
+    Hashing runs in NumPy over the code points, so vectorizing an article
+    costs well under a millisecond.
+    """
+    text = normalize_text(text)
+    if len(text) < NGRAM:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    cps = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    h = np.zeros(len(cps) - NGRAM + 1, dtype=np.uint64)
+    for i in range(NGRAM):
+        h = h * np.uint64(1000003) + cps[i:len(cps) - NGRAM + 1 + i]
+    ids, counts = np.unique((h % np.uint64(DIMENSIONS)).astype(np.int64), return_counts=True)
+    return ids, counts.astype(np.float32)
+
+
+def _tf_rows(texts):
+    """Sublinear term-frequency CSR matrix, one row per text."""
+    indptr = [0]
+    indices = []
+    data = []
+    for text in texts:
+        ids, counts = ngram_counts(text)
+        indices.append(ids)
+        data.append(1.0 + np.log(counts))
+        indptr.append(indptr[-1] + len(ids))
+    return sp.csr_matrix(
+        (np.concatenate(data) if data else np.zeros(0, np.float32),
+         np.concatenate(indices) if indices else np.zeros(0, np.int64),
+         np.array(indptr)),
+        shape=(len(texts), DIMENSIONS), dtype=np.float32,
+    )
+
+
+class RelatedArticles:
+    """
+    TF-IDF neighbours of every article, kept up to date incrementally.
+
+    Raw term frequencies of all articles live in one SciPy CSR matrix
+    (hashed character 3-grams, so new articles never change the columns)
+    with document frequencies alongside. Weighted, pruned and normalized
+    rows are kept in a second matrix and multiplied in batches to get
+    cosine similarities; the top-k per row are each article's neighbours.
+
+    update() appends or replaces rows, weights only those rows and only
+    computes their products; an existing list changes only where a new
+    article beats its current k-th neighbour. IDF weights drift slowly as
+    the corpus grows, so recompute() re-weights everything now and then.
+
+    Files in `directory`: tf.npz, weights.npz, df.npy, and neighbours.json
+    (slugs, titles, filenames, lists). Rendering only reads neighbours.json.
+    Rows appended since the base files were written live in tf.delta.npz
+    and weights.delta.npz, so publishing an article writes a few KB of
+    matrix rows instead of the whole corpus; df.npy is base-only and the
+    delta's counts are added on load. The delta is folded into the base
+    after FOLD_ROWS rows, on recompute/rebuild, and when a base row is
+    replaced.
+    """
+
+    def __init__(self, directory=DEFAULT_RELATED_DIR, k=5):
+        self.directory = directory
+        self.k = k
+        self.neighbours_path = os.path.join(directory, "neighbours.json")
+        self.matrix_path = os.path.join(directory, "tf.npz")
+        self.weights_path = os.path.join(directory, "weights.npz")
+        self.df_path = os.path.join(directory, "df.npy")
+        self.delta_matrix_path = os.path.join(directory, "tf.delta.npz")
+        self.delta_weights_path = os.path.join(directory, "weights.delta.npz")
+        self._meta = None
+        self._fold = False  # base files must be rewritten on the next save()
+        self._tf = None
+        self._weights = None
+        self._df = None
+
+    @classmethod
+    def from_settings(cls):
+        from config.settings import RELATED_DIR, RELATED_COUNT
+        return cls(RELATED_DIR, k=RELATED_COUNT)
+
+    # ------------------------------------------------------------------ storage
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            try:
+                with open(self.neighbours_path, "r", encoding="utf-8") as f:
+                    self._meta = json.load(f)
+                if self._meta.get('version') != FORMAT_VERSION:
+                    raise ValueError("outdated format")
+            except (OSError, ValueError):
+                self._meta = {'version': FORMAT_VERSION, 'slugs': [], 'articles': {}, 'neighbours': {},
+                              'base_rows': 0}
+        return self._meta
+
+    def _load_matrix(self):
+        if self._tf is not None:
+            return
+        if os.path.exists(self.weights_path) and len(self.meta['slugs']):
+            self._tf = sp.load_npz(self.matrix_path).tocsr()
+            self._weights = sp.load_npz(self.weights_path).tocsr()
+            self._df = np.load(self.df_path)
+            self.meta['base_rows'] = self._tf.shape[0]
+            if os.path.exists(self.delta_weights_path):
+                delta_tf = sp.load_npz(self.delta_matrix_path).tocsr()
+                self._tf = sp.vstack([self._tf, delta_tf]).tocsr()
+                self._weights = sp.vstack([self._weights, sp.load_npz(self.delta_weights_path)]).tocsr()
+                self._df = self._df + np.bincount(delta_tf.indices, minlength=DIMENSIONS).astype(np.int32)
+            if self._tf.shape[0] != len(self.meta['slugs']):
+                print(f"Related index is inconsistent ({self._tf.shape[0]} rows, {len(self.meta['slugs'])} "
+                      f"articles); starting empty. Run: python -m tools.related rebuild")
+                self._meta = None
+                self._tf = None
+                self._load_matrix()
+        else:
+            self._tf = sp.csr_matrix((0, DIMENSIONS), dtype=np.float32)
+            self._weights = sp.csr_matrix((0, DIMENSIONS), dtype=np.float32)
+            self._df = np.zeros(DIMENSIONS, dtype=np.int32)
+            self.meta['base_rows'] = 0
+
+    @staticmethod
+    def _save_matrix(path, matrix):
+        # Uncompressed: zlib on a 10k-article matrix costs seconds per fold
+        tmp = path + ".tmp.npz"
+        sp.save_npz(tmp, matrix, compressed=False)
+        os.replace(tmp, path)
+
+    def save(self):
+        """Writes the rows appended since the base (or folds everything into it), then neighbours.json."""
+        os.makedirs(self.directory, exist_ok=True)
+        if self._tf is not None:
+            rows = self._tf.shape[0]
+            base = self.meta['base_rows']
+            if self._fold or base > rows or rows - base >= FOLD_ROWS or not os.path.exists(self.matrix_path):
+                for path in (self.delta_matrix_path, self.delta_weights_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                self._save_matrix(self.matrix_path, self._tf)
+                self._save_matrix(self.weights_path, self._weights)
+                tmp = self.df_path + ".tmp.npy"
+                np.save(tmp, self._df)
+                os.replace(tmp, self.df_path)
+                self.meta['base_rows'] = rows
+                self._fold = False
+            elif rows > base:
+                self._save_matrix(self.delta_matrix_path, self._tf[base:])
+                self._save_matrix(self.delta_weights_path, self._weights[base:])
+        tmp = self.neighbours_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            # dumps() takes the C encoder; dump() streams through the pure-Python one
+            f.write(json.dumps(self.meta, ensure_ascii=False, separators=(",", ":")))
+        os.replace(tmp, self.neighbours_path)
+
+    # ------------------------------------------------------------------ math
+
+    def _weighted(self, rows):
+        """TF-IDF, pruned to the strongest terms per row and L2-normalized."""
+        n = max(len(self.meta['slugs']), 1)
+        idf = (np.log((1.0 + n) / (1.0 + self._df)) + 1.0).astype(np.float32)
+        idf[self._df > max(MAX_DF_RATIO * n, MAX_DF_FLOOR)] = 0.0
+        w = rows.multiply(idf).tocsr()
+        w.eliminate_zeros()
+        # Keep the TERMS_PER_ARTICLE largest weights of every row
+        for i in range(w.shape[0]):
+            start, end = w.indptr[i], w.indptr[i + 1]
+            if end - start > TERMS_PER_ARTICLE:
+                row = w.data[start:end]
+                cutoff = np.partition(row, -TERMS_PER_ARTICLE)[-TERMS_PER_ARTICLE]
+                row[row < cutoff] = 0.0
+        w.eliminate_zeros()
+        norms = np.sqrt(np.asarray(w.multiply(w).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.diags(1.0 / norms).dot(w).tocsr().astype(np.float32)
+
+    def _top_k(self, scores, row_slugs):
+        """Neighbour lists for a dense block of similarity rows."""
+        slugs = self.meta['slugs']
+        k = min(self.k, scores.shape[1])
+        lists = {}
+        if k == 0:
+            return {slug: [] for slug in row_slugs}
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for r, slug in enumerate(row_slugs):
+            cols = sorted(top[r], key=lambda c: -scores[r, c])
+            lists[slug] = [[slugs[c], round(float(scores[r, c]), 4)] for c in cols if scores[r, c] >= MIN_SCORE]
+        return lists
+
+    def _similarities(self, weights, rows):
+        """Dense cosine similarities of `rows` (indices) against every article, self excluded."""
+        block = (weights[rows] @ weights.T).toarray()
+        block[np.arange(len(rows)), rows] = -1.0
+        return block
+
+    # ------------------------------------------------------------------ public
+
+    def neighbours(self, slug):
+        """[{'slug', 'title', 'filename', 'score'}] for rendering; empty for unknown slugs."""
+        articles = self.meta['articles']
+        return [
+            dict(articles[other], slug=other, score=score)
+            for other, score in self.meta['neighbours'].get(slug, [])
+            if other in articles
+        ]
+
+    def recompute(self):
+        """Recomputes every neighbour list with batched sparse products."""
+        self._load_matrix()
+        slugs = self.meta['slugs']
+        if not slugs:
+            return
+        self._weights = weights = self._weighted(self._tf)
+        self._fold = True
+        neighbours = {}
+        for start in range(0, len(slugs), BATCH_ROWS):
+            rows = np.arange(start, min(start + BATCH_ROWS, len(slugs)))
+            neighbours.update(self._top_k(self._similarities(weights, rows), [slugs[r] for r in rows]))
+        self.meta['neighbours'] = neighbours
+
+    def rebuild(self, articles):
+        """Replaces the whole index from [(slug, title, filename, text)] and recomputes every list."""
+        articles = list(articles)
+        self._meta = {'version': FORMAT_VERSION, 'slugs': [a[0] for a in articles], 'articles': {}, 'neighbours': {},
+                      'base_rows': 0}
+        for slug, title, filename, _ in articles:
+            self._meta['articles'][slug] = {'title': title, 'filename': filename}
+        self._tf = _tf_rows([a[3] for a in articles])
+        self._df = np.bincount(self._tf.indices, minlength=DIMENSIONS).astype(np.int32)
+        self.recompute()
+        self.save()
+
+    def update(self, articles):
+        """
+        Adds or replaces [(slug, title, filename, text)] and refreshes the
+        affected neighbour lists.
+
+        Only the new rows are multiplied against the corpus. An existing
+        article's list is touched if a new article outranks its current
+        k-th neighbour, or if it pointed at a replaced article (that row
+        is recomputed exactly). Returns the slugs of existing articles whose
+        lists changed, so their pages can be re-rendered.
+        """
+        articles = list(articles)
+        if not articles:
+            return set()
+        self._load_matrix()
+        meta = self.meta
+        new_slugs = {a[0] for a in articles}
+        replaced = [s for s in meta['slugs'] if s in new_slugs]
+
+        if replaced:
+            # Dropping a row from the base files means rewriting them
+            base = meta['base_rows']
+            if any(i < base for i, s in enumerate(meta['slugs']) if s in new_slugs):
+                self._fold = True
+            keep = np.array([i for i, s in enumerate(meta['slugs']) if s not in new_slugs], dtype=np.int64)
+            dropped = self._tf[[i for i, s in enumerate(meta['slugs']) if s in new_slugs]]
+            self._df -= np.bincount(dropped.indices, minlength=DIMENSIONS).astype(np.int32)
+            self._tf = self._tf[keep]
+            self._weights = self._weights[keep]
+            meta['slugs'] = [meta['slugs'][i] for i in keep]
+
+        new_tf = _tf_rows([a[3] for a in articles])
+        self._df += np.bincount(new_tf.indices, minlength=DIMENSIONS).astype(np.int32)
+        self._tf = sp.vstack([self._tf, new_tf]).tocsr()
+        meta['slugs'].extend(a[0] for a in articles)
+        self._weights = weights = sp.vstack([self._weights, self._weighted(new_tf)]).tocsr()
+        for slug, title, filename, _ in articles:
+            meta['articles'][slug] = {'title': title, 'filename': filename}
+
+        slugs = meta['slugs']
+        position = {s: i for i, s in enumerate(slugs)}
+        new_rows = np.array([position[a[0]] for a in articles])
+        scores = self._similarities(weights, new_rows)
+        meta['neighbours'].update(self._top_k(scores, [slugs[r] for r in new_rows]))
+
+        changed = set()
+        # Lists that pointed at a replaced article are recomputed exactly
+        stale = [s for s, lst in meta['neighbours'].items()
+                 if s not in new_slugs and any(other in new_slugs for other, _ in lst)]
+        if stale:
+            rows = np.array([position[s] for s in stale if s in position])
+            meta['neighbours'].update(self._top_k(self._similarities(weights, rows), [slugs[r] for r in rows]))
+            changed.update(slugs[r] for r in rows)
+
+        # A new article enters an existing list if it beats that list's k-th score
+        skip = new_slugs | set(stale)
+        floors = np.array([
+            lst[-1][1] if len(lst) >= self.k else MIN_SCORE
+            for lst in (meta['neighbours'].get(s, []) for s in slugs)
+        ], dtype=np.float32)
+        hit_rows, hit_cols = np.nonzero(scores > floors[None, :])
+        for r, col in zip(hit_rows, hit_cols):
+            slug = slugs[col]
+            if slug in skip:
+                continue
+            merged = meta['neighbours'].get(slug, []) + [[slugs[new_rows[r]], round(float(scores[r, col]), 4)]]
+            merged.sort(key=lambda item: -item[1])
+            meta['neighbours'][slug] = merged[:self.k]
+            changed.add(slug)
+
+        self.save()
+        return changed
@@ -0,0 +1,245 @@
+import os
+import re
+import json
+import unicodedata
+from src.publisher.assets import SiteAssets
+from src.publisher.templating import render
+from src.publisher.output import OutputStage
+
+SEARCH_DIR = "search"
+MANIFEST_PATH = os.path.join(SEARCH_DIR, "manifest.json")
+
+# Bump whenever the tokenizer or shard format changes; forces a full rebuild
+SEARCH_INDEX_VERSION = 1
+
+TOKEN_SHARDS = 256          # postings shards, keyed by the first character of the bigram
+SUB_SHARDS = 16             # an oversized shard is split this many ways by the second character
+SPLIT_SHARD_BYTES = 16384   # shards above this are split on the next full build
+DOCS_PER_SHARD = 100        # result records per docs shard
+
+# Same rule as site.js: NFKC, lowercase, split on anything but letters and digits
+SPLIT_RE = re.compile(r'[\W_]+')
+
+
+def bigrams(text):
+    """Set of character bigrams of normalized text; one-letter words become unigrams."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens = set()
+    for word in SPLIT_RE.split(text):
+        if len(word) == 1:
+            tokens.add(word)
+        for i in range(len(word) - 1):
+            tokens.add(word[i:i + 2])
+    return tokens
+
+
+def token_shard(token, split=()):
+    """
+    Shard name of a token: two hex digits of the first character's code
+    point modulo TOKEN_SHARDS, plus "-<hex>" of the second character for
+    shards in `split` (common first characters such as の). site.js
+    computes the same.
+    """
+    base = f"{ord(token[0]) % TOKEN_SHARDS:02x}"
+    if base in split and len(token) > 1:
+        return f"{base}-{ord(token[1]) % SUB_SHARDS:x}"
+    return base
+
+
+class SearchIndex:
+    """
+    Static client-side search over titles and meta descriptions.
+
+    Every article gets a numeric id in publish order. Its title and
+    description are split into character bigrams (Japanese has no spaces
+    to split words on) and the postings are written as small JSON shards:
+
+    - search/t/<nn>.json     {bigram: [ids]} for bigrams whose first
+                             character maps to shard nn (nn-<h>.json
+                             for the few shards split by second character)
+    - search/d/<n>.json      [filename, title, date, description] for ids
+                             n*DOCS_PER_SHARD onwards
+    - search/manifest.json   build state used for incremental updates
+    - search.html            the search page (site.js runs the queries)
+
+    A query of k bigrams fetches at most k postings shards plus the docs
+    shards of the hits it shows. Because all bigrams starting with one
+    character share a shard (or its split parts), single-character queries
+    work without a separate unigram index.
+
+    update(new_files) only rewrites the shards touched by those articles.
+    """
+
+    def __init__(self, output_dir, catalog, assets=None, output=None):
+        self.output_dir = output_dir
+        self.catalog = catalog
+        self.assets = assets or SiteAssets(output_dir)
+        self.output = output or OutputStage.from_settings()
+        # Paths actually rewritten by update(), for the deploy stage
+        self.written = []
+
+    # ------------------------------------------------------------------ helpers
+
+    def _write(self, relpath, content):
+        _, written = self.output.write(os.path.join(self.output_dir, relpath), content)
+        self.written.extend(written)
+
+    def _read_json(self, relpath, default=None):
+        path = os.path.join(self.output_dir, relpath)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    @staticmethod
+    def _dump(data):
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+    @staticmethod
+    def _doc(article):
+        return [article['filename'], article['title'], article['published_at'][:10],
+                article.get('meta_description') or ""]
+
+    @staticmethod
+    def _tokens(doc):
+        return bigrams(doc[1]) | bigrams(doc[3])
+
+    def _token_path(self, shard):
+        return os.path.join(SEARCH_DIR, "t", f"{shard}.json")
+
+    def _docs_path(self, n):
+        return os.path.join(SEARCH_DIR, "d", f"{n}.json")
+
+    # ------------------------------------------------------------------ build
+
+    def update(self, new_files=None):
+        """
+        Writes the search shards and page.
+
+        With new_files, only the postings and docs shards of those articles
+        change; anything unexpected (missing or outdated manifest) falls
+        back to a full rebuild. Returns the shard size report.
+        """
+        manifest = self._read_json(MANIFEST_PATH)
+        if new_files and manifest and manifest.get('version') == SEARCH_INDEX_VERSION:
+            slugs = {os.path.splitext(os.path.basename(f))[0] for f in new_files}
+            self._update(manifest, slugs)
+            mode = "Updated"
+        else:
+            manifest = self._build()
+            mode = "Rebuilt"
+        self._write(MANIFEST_PATH, self._dump(manifest))
+        self._write("search.html", render(
+            "search.html",
+            title="Gaia Blog - 記事検索",
+            description="Gaia Blog の記事をタイトルと概要から検索できます。",
+            root="",
+            body_class="listing",
+            assets=self.assets.build(),
+            token_shards=TOKEN_SHARDS,
+            sub_shards=SUB_SHARDS,
+            split=manifest['split'],
+            docs_per_shard=DOCS_PER_SHARD,
+        ))
+        report = self.report(manifest)
+        print(f"{mode} search index ({len(self.written)} file(s) written): {report}")
+        return report
+
+    def _build(self):
+        articles = self.catalog.list_articles(oldest_first=True)
+        docs = [self._doc(a) for a in articles]
+        postings = {}
+        for doc_id, doc in enumerate(docs):
+            for token in self._tokens(doc):
+                postings.setdefault(token, []).append(doc_id)
+
+        def group(split):
+            shards = {f"{n:02x}": {} for n in range(TOKEN_SHARDS)}
+            for base in split:
+                shards.update({f"{base}-{n:x}": {} for n in range(SUB_SHARDS)})
+            for token, ids in postings.items():
+                shards[token_shard(token, split)][token] = ids
+            return {name: self._dump(entries) for name, entries in shards.items()}
+
+        shards = group(())
+        split = sorted(name for name, content in shards.items() if len(content.encode('utf-8')) > SPLIT_SHARD_BYTES)
+        if split:
+            shards = group(split)
+        sizes = {}
+        for name, content in sorted(shards.items()):
+            self._write(self._token_path(name), content)
+            sizes[name] = len(content.encode('utf-8'))
+        for n in range(0, max(len(docs), 1), DOCS_PER_SHARD):
+            self._write(self._docs_path(n // DOCS_PER_SHARD), self._dump(docs[n:n + DOCS_PER_SHARD]))
+        return {
+            'version': SEARCH_INDEX_VERSION,
+            'slugs': [a['slug'] for a in articles],
+            'split': split,
+            'shard_bytes': sizes,
+        }
+
+    def _update(self, manifest, slugs):
+        ids = {slug: i for i, slug in enumerate(manifest['slugs'])}
+        split = manifest['split']
+        postings = {}   # shard -> {token: ids}, loaded on demand
+        doc_shards = {}  # n -> docs, loaded on demand
+
+        def load_postings(shard):
+            if shard not in postings:
+                postings[shard] = self._read_json(self._token_path(shard), {})
+            return postings[shard]
+
+        def load_docs(n):
+            if n not in doc_shards:
+                doc_shards[n] = self._read_json(self._docs_path(n), [])
+            return doc_shards[n]
+
+        for slug in sorted(slugs):
+            article = self.catalog.get(slug)
+            if article is None:
+                continue
+            doc = self._doc(article)
+            if slug in ids:
+                doc_id = ids[slug]
+                docs = load_docs(doc_id // DOCS_PER_SHARD)
+                old = docs[doc_id % DOCS_PER_SHARD]
+                removed = self._tokens(old) - self._tokens(doc)
+                added = self._tokens(doc) - self._tokens(old)
+                docs[doc_id % DOCS_PER_SHARD] = doc
+            else:
+                doc_id = ids[slug] = len(manifest['slugs'])
+                manifest['slugs'].append(slug)
+                load_docs(doc_id // DOCS_PER_SHARD).append(doc)
+                removed, added = set(), self._tokens(doc)
+            for token in removed:
+                entries = load_postings(token_shard(token, split))
+                if doc_id in entries.get(token, []):
+                    entries[token].remove(doc_id)
+                    if not entries[token]:
+                        del entries[token]
+            for token in added:
+                entries = load_postings(token_shard(token, split)).setdefault(token, [])
+                if doc_id not in entries:
+                    entries.append(doc_id)
+                    entries.sort()
+
+        for shard, entries in postings.items():
+            content = self._dump(entries)
+            self._write(self._token_path(shard), content)
+            manifest['shard_bytes'][shard] = len(content.encode('utf-8'))
+        for n, docs in doc_shards.items():
+            self._write(self._docs_path(n), self._dump(docs))
+
+    @staticmethod
+    def report(manifest):
+        """One-line summary of postings shard sizes, to keep each fetch small."""
+        sizes = sorted(manifest['shard_bytes'].values())
+        if not sizes:
+            return "empty"
+        largest = max(manifest['shard_bytes'], key=manifest['shard_bytes'].get)
+        oversized = sum(1 for size in sizes if size > SPLIT_SHARD_BYTES)
+        return (f"{len(manifest['slugs'])} article(s), {len(sizes)} shard(s) ({len(manifest['split'])} split), "
+                f"{sum(sizes) / 1024:.0f} KB total, median {sizes[len(sizes) // 2] / 1024:.1f} KB, "
+                f"largest {largest}.json {sizes[-1] / 1024:.1f} KB"
+                + (f", {oversized} over {SPLIT_SHARD_BYTES // 1024} KB until the next full build" if oversized else ""))
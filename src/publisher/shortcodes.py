@@ -0,0 +1,169 @@
+import re
+
+# One tokenizer for every shortcode: an opener "[[NAME" (optionally followed
+# by ":") or a closer "]]". Its cost does not depend on how many handlers
+# are registered.
+TOKEN_RE = re.compile(r"\[\[([A-Z][A-Z0-9_]*)[ \t]*(?::[ \t]*)?|\]\]")
+
+ITEM_SPLIT_RE = re.compile(r"\s*(?:\n|\|)\s*")
+BULLET_RE = re.compile(r"^(?:[-*・]|\d+\.)\s*")
+SPEC_PAIR_RE = re.compile(r"^(.+?)\s*(?:[:=：])\s*(.+)$")
+
+
+class ShortcodeError(ValueError):
+    """Raised by a handler when a shortcode's body cannot be rendered."""
+
+
+class _Frame:
+    __slots__ = ("name", "start", "opener", "parts")
+
+    def __init__(self, name, start, opener):
+        self.name = name
+        self.start = start
+        self.opener = opener
+        self.parts = []
+
+
+def _items(body):
+    """Splits a list body on newlines or '|' and strips bullet markers."""
+    return [BULLET_RE.sub("", item) for item in ITEM_SPLIT_RE.split(body.strip()) if item.strip()]
+
+
+def chat_bubble(side, avatar_seed, alt):
+    def handler(body, engine):
+        classes = "chat-box right" if side == "right" else "chat-box"
+        return f"""
+<div class="{classes}">
+    <div class="chat-face"><img src="https://api.dicebear.com/9.x/avataaars/svg?seed={avatar_seed}" alt="{alt}"></div>
+    <div class="chat-area">
+        <div class="chat-bubble">{body}</div>
+    </div>
+</div>
+"""
+    return handler
+
+
+def list_box(css_class):
+    def handler(body, engine):
+        items = _items(body)
+        if not items:
+            raise ShortcodeError("empty list")
+        lis = "".join(f"<li>{item}</li>" for item in items)
+        return f'\n<div class="{css_class}"><ul>{lis}</ul></div>\n'
+    return handler
+
+
+def spec_table(body, engine):
+    rows = []
+    for item in _items(body):
+        m = SPEC_PAIR_RE.match(item)
+        if not m:
+            raise ShortcodeError(f"spec row without 'name: value': {item[:40]}")
+        rows.append(f"<tr><th>{m.group(1)}</th><td>{m.group(2)}</td></tr>")
+    if not rows:
+        raise ShortcodeError("empty spec table")
+    return ('\n<div class="box-common"><strong>【スペック】</strong><table><tbody>'
+            + "".join(rows) + '</tbody></table></div>\n')
+
+
+def rating(body, engine):
+    value, _, label = body.partition("|")
+    try:
+        score = float(value.strip())
+    except ValueError:
+        raise ShortcodeError(f"rating is not a number: {value.strip()[:20]}")
+    if not 0 <= score <= 5:
+        raise ShortcodeError(f"rating out of range 0-5: {score}")
+    full = int(score + 0.5)
+    stars = "★" * full + "☆" * (5 - full)
+    label = label.strip() or "総合評価"
+    return f'\n<div class="rating-box">{label}<span class="stars">{stars}</span> {score:g}/5</div>\n'
+
+
+def product(body, engine):
+    if engine.product_card is None:
+        raise ShortcodeError("no product card renderer configured")
+    keyword = body.strip()
+    if not keyword:
+        raise ShortcodeError("empty product keyword")
+    return engine.product_card(keyword)
+
+
+DEFAULT_HANDLERS = {
+    "CHAT_L": chat_bubble("left", "Felix", "User"),
+    "CHAT_R": chat_bubble("right", "Aneka", "Agent"),
+    "MERIT": list_box("merit-box"),
+    "DEMERIT": list_box("demerit-box"),
+    "SPEC": spec_table,
+    "RATING": rating,
+    "PRODUCT": product,
+}
+
+
+class ShortcodeEngine:
+    """
+    Expands [[NAME: body]] shortcodes in a single pass.
+
+    The text is tokenized once with TOKEN_RE and openers/closers are matched
+    with a stack, so shortcodes may nest and a body may contain ']]' that
+    belongs to an inner code. Each complete code is dispatched to its
+    registered handler (body already expanded). Unknown names, handler
+    errors and unterminated codes are left in the text verbatim and
+    reported in the returned error list.
+    """
+
+    def __init__(self, handlers=None, product_card=None):
+        self.handlers = dict(DEFAULT_HANDLERS if handlers is None else handlers)
+        # Callable keyword -> product card HTML, used by [[PRODUCT: ...]]
+        self.product_card = product_card
+
+    def register(self, name, handler):
+        """Adds or replaces a handler: handler(body, engine) -> html."""
+        self.handlers[name] = handler
+
+    def render(self, text):
+        """Returns (expanded_text, errors); errors are dicts with code, line and message."""
+        errors = []
+        out = []
+        stack = []
+        pos = 0
+        for m in TOKEN_RE.finditer(text):
+            target = stack[-1].parts if stack else out
+            target.append(text[pos:m.start()])
+            pos = m.end()
+            if m.group(1):
+                stack.append(_Frame(m.group(1), m.start(), m.group(0)))
+            elif stack:
+                frame = stack.pop()
+                html = self._dispatch(frame, text, errors)
+                (stack[-1].parts if stack else out).append(html)
+            else:
+                # A stray "]]" outside any shortcode is ordinary text
+                target.append(m.group(0))
+        (stack[-1].parts if stack else out).append(text[pos:])
+
+        while stack:
+            frame = stack.pop()
+            self._error(errors, frame, text, "unterminated shortcode (missing ']]')")
+            (stack[-1].parts if stack else out).append(frame.opener + "".join(frame.parts))
+        return "".join(out), errors
+
+    def _dispatch(self, frame, text, errors):
+        body = "".join(frame.parts)
+        handler = self.handlers.get(frame.name)
+        if handler is None:
+            self._error(errors, frame, text, "unknown shortcode")
+            return f"{frame.opener}{body}]]"
+        try:
+            return handler(body.strip(), self)
+        except ShortcodeError as e:
+            self._error(errors, frame, text, str(e))
+            return f"{frame.opener}{body}]]"
+
+    @staticmethod
+    def _error(errors, frame, text, message):
+        errors.append({
+            'code': frame.name,
+            'line': text.count("\n", 0, frame.start) + 1,
+            'message': message,
+        })
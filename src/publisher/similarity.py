@@ -0,0 +1,301 @@
+import os
+import re
+import csv
+import sqlite3
+import hashlib
+import html as html_lib
+import unicodedata
+from array import array
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from src.publisher.catalog import is_article_file, BODY_RE, TITLE_RE
+
+DEFAULT_INDEX_PATH = "data/similarity.db"
+DUPLICATES_LOG_FILE = "logs/duplicates.csv"
+
+SHINGLE_SIZE = 3       # character n-grams; Japanese has no word boundaries to shingle on
+NUM_BINS = 128         # signature length
+BANDS = 64             # LSH bands of NUM_BINS // BANDS rows: candidates from ~12% similarity up
+ROWS = NUM_BINS // BANDS
+EMPTY_BIN = (1 << 64) - 1
+
+# Affiliate boilerplate shared by every page; left in, it makes all articles look alike
+PRODUCT_CARD_RE = re.compile(r'<div class="product-card">.*?楽天で探す</a>', re.DOTALL)
+PROMO_RE = re.compile(r'\*?本記事はアフィリエイト・プロモーションを含みます。\*?')
+SHORTCODE_MARK_RE = re.compile(r'\[\[[A-Z][A-Z0-9_]*:?|\]\]')
+TAG_RE = re.compile(r'<[^>]+>')
+NON_WORD_RE = re.compile(r'[\W_]+')
+
+ACTIONS = ("off", "flag", "reject", "rewrite")
+
+
+def normalize_text(text):
+    """Markdown or HTML -> lowercase NFKC letters/digits only, without tags, shortcodes or boilerplate."""
+    text = PRODUCT_CARD_RE.sub(" ", text)
+    text = PROMO_RE.sub(" ", text)
+    text = SHORTCODE_MARK_RE.sub(" ", text)
+    text = TAG_RE.sub(" ", text)
+    text = unicodedata.normalize("NFKC", text).lower()
+    return NON_WORD_RE.sub("", text)
+
+
+def signature(text, shingle_size=SHINGLE_SIZE):
+    """
+    One-permutation MinHash over character shingles.
+
+    Every shingle is hashed once; the hash picks one of NUM_BINS bins and
+    each bin keeps its minimum. Comparing bins estimates Jaccard similarity
+    of the shingle sets at a fraction of the cost of NUM_BINS hash functions.
+    """
+    text = normalize_text(text)
+    sig = array('Q', [EMPTY_BIN]) * NUM_BINS
+    seen = set()
+    for i in range(max(0, len(text) - shingle_size + 1)):
+        shingle = text[i:i + shingle_size]
+        if shingle in seen:
+            continue
+        seen.add(shingle)
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+        b = h % NUM_BINS
+        v = h // NUM_BINS
+        if v < sig[b]:
+            sig[b] = v
+    return sig
+
+
+def estimate_similarity(a, b):
+    """Estimated Jaccard similarity of two signatures (bins empty in both are ignored)."""
+    matches = used = 0
+    for x, y in zip(a, b):
+        if x == EMPTY_BIN and y == EMPTY_BIN:
+            continue
+        used += 1
+        if x == y:
+            matches += 1
+    return matches / used if used else 0.0
+
+
+def band_keys(sig):
+    """One bucket key per LSH band; similar signatures share at least one with high probability."""
+    keys = []
+    for band in range(BANDS):
+        chunk = sig[band * ROWS:(band + 1) * ROWS].tobytes()
+        keys.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "little") >> 1)
+    return keys
+
+
+def page_text(html):
+    """(title, article body) of a rendered page, without head, CSS or JSON-LD; None if it has no body."""
+    m = BODY_RE.search(html)
+    if not m:
+        return None
+    t = TITLE_RE.search(html)
+    title = html_lib.unescape(t.group(1).strip()) if t else ""
+    return title, m.group(1)
+
+
+def _page_signature(path):
+    """Worker: (slug, title, signature bytes) for a published page, or None without an article body."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        found = page_text(f.read())
+    if found is None:
+        return None
+    title, body = found
+    filename = os.path.basename(path)
+    return filename[:-len(".html")], title, signature(title + "\n" + body).tobytes()
+
+
+class SimilarityIndex:
+    """
+    Near-duplicate index over published articles.
+
+    Each article is stored as a MinHash signature plus BANDS locality
+    sensitive hash buckets in SQLite. A lookup fetches only the articles
+    sharing a bucket and estimates their similarity, so checking a new
+    article takes milliseconds regardless of corpus size. add() updates
+    the index incrementally; build() fills it from docs/ in parallel.
+
+    On the current corpus unrelated articles score ~0.02 (p99 0.09) and
+    separate reviews of the same product 0.2-0.3, hence the 0.2 default.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS signatures (
+                slug TEXT PRIMARY KEY,
+                title TEXT,
+                sig BLOB NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS bands (band INTEGER, bucket INTEGER, slug TEXT)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_bands_bucket ON bands (band, bucket)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_bands_slug ON bands (slug)")
+        self.conn.commit()
+
+    @classmethod
+    def from_settings(cls):
+        from config.settings import SIMILARITY_INDEX_PATH
+        return cls(SIMILARITY_INDEX_PATH)
+
+    def close(self):
+        self.conn.close()
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def _store(self, slug, title, sig):
+        self.conn.execute("DELETE FROM bands WHERE slug = ?", (slug,))
+        self.conn.execute("INSERT OR REPLACE INTO signatures (slug, title, sig) VALUES (?, ?, ?)",
+                          (slug, title, sig.tobytes()))
+        self.conn.executemany("INSERT INTO bands (band, bucket, slug) VALUES (?, ?, ?)",
+                              [(band, key, slug) for band, key in enumerate(band_keys(sig))])
+
+    def add(self, slug, title, text, commit=True):
+        """Indexes (or re-indexes) one article from its Markdown or HTML body."""
+        self._store(slug, title, signature(title + "\n" + text))
+        if commit:
+            self.conn.commit()
+
+    def remove(self, slug):
+        self.conn.execute("DELETE FROM bands WHERE slug = ?", (slug,))
+        self.conn.execute("DELETE FROM signatures WHERE slug = ?", (slug,))
+        self.conn.commit()
+
+    def query(self, title, text, threshold=0.2, exclude=None, limit=5, sig=None):
+        """
+        Returns [(similarity, slug, title)] of indexed articles at or above
+        threshold, most similar first. exclude skips one slug (the article
+        itself when it is being regenerated).
+        """
+        sig = sig or signature(title + "\n" + text)
+        keys = band_keys(sig)
+        candidates = set()
+        for band, key in enumerate(keys):
+            for (slug,) in self.conn.execute("SELECT slug FROM bands WHERE band = ? AND bucket = ?", (band, key)):
+                candidates.add(slug)
+        candidates.discard(exclude)
+        matches = []
+        for slug in candidates:
+            row = self.conn.execute("SELECT title, sig FROM signatures WHERE slug = ?", (slug,)).fetchone()
+            other = array('Q')
+            other.frombytes(row[1])
+            score = estimate_similarity(sig, other)
+            if score >= threshold:
+                matches.append((score, slug, row[0]))
+        matches.sort(reverse=True)
+        return matches[:limit]
+
+    def build(self, docs_dir, workers=None):
+        """(Re)indexes every published page in docs_dir using a process pool. Returns the count."""
+        paths = [os.path.join(docs_dir, f) for f in sorted(os.listdir(docs_dir)) if is_article_file(f)]
+        count = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_page_signature, paths, chunksize=32):
+                if result is None:
+                    continue
+                slug, title, raw = result
+                sig = array('Q')
+                sig.frombytes(raw)
+                self._store(slug, title, sig)
+                count += 1
+        self.conn.commit()
+        return count
+
+    def pairs(self, threshold=0.2):
+        """All indexed article pairs at or above threshold: [(similarity, slug_a, slug_b)]."""
+        found = {}
+        for slug, title, raw in self.conn.execute("SELECT slug, title, sig FROM signatures").fetchall():
+            sig = array('Q')
+            sig.frombytes(raw)
+            for score, other, _ in self.query(title, "", threshold=threshold, exclude=slug, limit=50, sig=sig):
+                found[tuple(sorted((slug, other)))] = score
+        return sorted(((score, a, b) for (a, b), score in found.items()), reverse=True)
+
+
+class DuplicateRejected(Exception):
+    """Raised by DuplicateGuard when an article is too close to a published one."""
+
+
+class DuplicateGuard:
+    """
+    Checks articles against the SimilarityIndex before they are written.
+
+    action decides what happens to a near-duplicate:
+    - flag:    publish anyway, log it to logs/duplicates.csv
+    - reject:  raise DuplicateRejected; nothing is written
+    - rewrite: ask `rewriter(title, content, matches)` for a more distinct
+               version and check that once more; reject if still too close
+    """
+
+    def __init__(self, index, action="flag", threshold=0.2, rewriter=None, log_file=DUPLICATES_LOG_FILE):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown duplicate action '{action}' (expected one of {', '.join(ACTIONS)})")
+        self.index = index
+        self.action = action
+        self.threshold = threshold
+        self.rewriter = rewriter
+        self.log_file = log_file
+
+    @classmethod
+    def from_settings(cls, rewriter=None, docs_dir="docs"):
+        """
+        Guard per settings. The index is not in git, so on a fresh checkout
+        it is built from docs_dir first; an empty index would let every
+        duplicate through.
+        """
+        from config.settings import SIMILARITY_ACTION, SIMILARITY_THRESHOLD
+        index = SimilarityIndex.from_settings()
+        if SIMILARITY_ACTION != "off" and index.count() == 0 and os.path.isdir(docs_dir):
+            print("Similarity index is empty. Building it from published pages...")
+            print(f"Indexed {index.build(docs_dir)} article(s).")
+        return cls(index, action=SIMILARITY_ACTION, threshold=SIMILARITY_THRESHOLD, rewriter=rewriter)
+
+    def _log(self, slug, title, matches, outcome):
+        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+        file_exists = os.path.isfile(self.log_file)
+        with open(self.log_file, mode='a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if not file_exists:
+                writer.writerow(['Timestamp', 'Slug', 'Title', 'Similarity', 'DuplicateOf', 'Outcome'])
+            score, other, _ = matches[0]
+            writer.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), slug, title,
+                             f"{score:.2f}", other, outcome])
+
+    def check(self, slug, title, content):
+        """
+        Returns the content to publish (possibly rewritten).
+
+        Raises DuplicateRejected if the article must not be published.
+        """
+        if self.action == "off":
+            return content
+        matches = self.index.query(title, content, threshold=self.threshold, exclude=slug)
+        if not matches:
+            return content
+        score, other, other_title = matches[0]
+        print(f"  Near-duplicate ({score:.0%}) of {other}: {other_title}")
+
+        if self.action == "flag":
+            self._log(slug, title, matches, "flagged")
+            return content
+        if self.action == "rewrite" and self.rewriter is not None:
+            rewritten = self.rewriter(title, content, matches)
+            if rewritten and not self.index.query(title, rewritten, threshold=self.threshold, exclude=slug):
+                self._log(slug, title, matches, "rewritten")
+                print("  Rewritten into a distinct article.")
+                return rewritten
+            self._log(slug, title, matches, "rejected after rewrite")
+            raise DuplicateRejected(f"still {score:.0%} similar to {other} after rewrite")
+        self._log(slug, title, matches, "rejected")
+        raise DuplicateRejected(f"{score:.0%} similar to {other}")
+
+    def record(self, slug, title, content):
+        """Adds a published article to the index."""
+        if self.action != "off":
+            self.index.add(slug, title, content)
@@ -0,0 +1,126 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.publisher.catalog import is_article_file, scan_article_file, BODY_RE
+
+# Per-worker state, created once by _init_worker
+_worker = {}
+
+
+def _init_worker(output_dir, base_url, store_path):
+    # Imported here so the parent process does not pay for it twice
+    from src.publisher.html_generator import HtmlGenerator
+    from src.publisher.content_store import ContentStore
+    _worker['generator'] = HtmlGenerator(output_dir, base_url)
+    _worker['store'] = ContentStore(store_path)
+
+
+def _render_slugs(slugs):
+    """
+    Worker: renders a chunk of records from the memory-mapped store.
+
+    Returns (catalog fields, pages written, output stage stats for the chunk).
+    """
+    generator = _worker['generator']
+    store = _worker['store']
+    results = []
+    already_written = len(generator.written_files)
+    generator.output.stats = dict.fromkeys(generator.output.stats, 0)
+    for slug in slugs:
+        record = store.get(slug)
+        try:
+            results.append(generator.render_record(record))
+        except Exception as e:
+            print(f"Error rendering {slug}: {e}")
+    written = sum(1 for path in generator.written_files[already_written:] if path.endswith(".html"))
+    return results, written, generator.output.stats
+
+
+def import_published_pages(store, docs_dir):
+    """
+    Adds a source record for every published page the store does not know yet.
+
+    The Markdown of older articles was never kept, so their rendered body
+    (between </h1> and the footer) is stored as format 'html'.
+    """
+    imported = 0
+    for name in sorted(os.listdir(docs_dir)):
+        slug = name[:-len(".html")]
+        if not is_article_file(name) or slug in store:
+            continue
+        path = os.path.join(docs_dir, name)
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            m = BODY_RE.search(f.read())
+        if not m:
+            print(f"Skipping {name} (no article body found)")
+            continue
+        fields = scan_article_file(path)
+        store.put({
+            'slug': slug,
+            'filename': name,
+            'title': fields['title'],
+            'meta_description': fields['meta_description'] or f"{fields['title']}に関する詳細記事です。",
+            'search_query': fields['search_query'],
+            'published_at': fields['published_at'],
+            'modified_at': fields['modified_at'],
+            'format': 'html',
+            'content': m.group(1).strip(),
+            'source': None,
+        }, save_index=False)
+        imported += 1
+    store.save_index()
+    return imported
+
+
+def rebuild_site(generator, store, workers=None, slugs=None, chunk_size=32):
+    """
+    Re-renders every article (or just `slugs`) from the content store.
+
+    Pages are rendered in a process pool; each worker builds its own
+    HtmlGenerator (one reusable Markdown instance, compiled templates) and
+    maps the store. The parent then refreshes the catalog in one
+    transaction and rebuilds the index and sitemap once. Pages whose bytes
+    did not change are not rewritten, so a rebuild of an unchanged store
+    leaves docs/ (and git) untouched.
+    """
+    started = time.monotonic()
+    slugs = sorted(slugs) if slugs else store.slugs()
+    missing = [s for s in slugs if s not in store]
+    if missing:
+        print(f"Not in content store (skipped): {', '.join(missing[:10])}")
+    slugs = [s for s in slugs if s in store]
+    chunks = [slugs[i:i + chunk_size] for i in range(0, len(slugs), chunk_size)]
+
+    # Build the assets before forking so workers only read the manifest
+    generator.assets.build()
+    rendered = []
+    written = 0
+    if workers == 1:
+        _init_worker(generator.output_dir, generator.base_url, store.path)
+        results = map(_render_slugs, chunks)
+        for fields, count, stats in results:
+            rendered.extend(fields)
+            written += count
+            generator.output.merge(stats)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(generator.output_dir, generator.base_url, store.path)) as pool:
+            for fields, count, stats in pool.map(_render_slugs, chunks):
+                rendered.extend(fields)
+                written += count
+                generator.output.merge(stats)
+    render_seconds = time.monotonic() - started
+
+    for fields in rendered:
+        generator.catalog.upsert(commit=False, **fields)
+    generator.catalog.conn.commit()
+
+    generator.update_index()
+    generator.generate_sitemap()
+    total = time.monotonic() - started
+    rate = len(rendered) / render_seconds if render_seconds else 0.0
+    print(f"Rebuilt {len(rendered)} of {len(slugs)} page(s) in {total:.1f}s "
+          f"(render {render_seconds:.1f}s, {rate:.0f} pages/s); "
+          f"{written} changed, {len(rendered) - written} unchanged and left as is")
+    generator.output.log_run("rebuild")
+    return rendered
@@ -0,0 +1,123 @@
+import os
+from src.publisher.templating import render
+from src.publisher.output import OutputStage
+
+# Sitemap protocol limit is 50,000 URLs per file
+MAX_URLS_PER_SHARD = 50000
+
+SHARD_DIR = "sitemaps"
+
+
+class SitemapWriter:
+    """
+    Writes a sitemap index (sitemap.xml) pointing at per-month shards.
+
+    Each shard is written as sitemaps/<YYYY-MM>.xml plus a precompressed
+    .xml.gz twin (always, since the index points at it; .br too when the
+    output stage precompresses). <lastmod> comes from the article's recorded modify time,
+    so crawlers only revisit what actually changed, and only the shards that
+    hold changed articles are regenerated.
+    """
+
+    def __init__(self, output_dir, base_url, catalog, max_urls=MAX_URLS_PER_SHARD, output=None):
+        self.output_dir = output_dir
+        self.base_url = base_url
+        self.catalog = catalog
+        self.max_urls = max_urls
+        self.output = output or OutputStage.from_settings()
+        # Paths rewritten or removed by write(), for the deploy stage
+        self.written = []
+
+    def _write(self, relpath, content):
+        _, written = self.output.write(os.path.join(self.output_dir, relpath), content, compress=True)
+        self.written.extend(written)
+
+    @staticmethod
+    def _lastmod(article):
+        return (article.get('modified_at') or article['published_at'])[:10]
+
+    def _shards(self, articles):
+        """Groups articles into shard name -> articles, splitting oversized months."""
+        months = {}
+        for a in articles:
+            months.setdefault(a['published_at'][:7], []).append(a)
+        shards = {}
+        for month, items in months.items():
+            if len(items) <= self.max_urls:
+                shards[month] = items
+            else:
+                for i in range(0, len(items), self.max_urls):
+                    shards[f"{month}-{i // self.max_urls + 1}"] = items[i:i + self.max_urls]
+        return shards
+
+    def _render_urlset(self, entries):
+        return render("sitemap_urlset.xml", entries=entries)
+
+    def _render_index(self, shards):
+        entries = [(f"{self.base_url}/{SHARD_DIR}/{name}.xml.gz", lastmod) for name, lastmod in shards]
+        return render("sitemap_index.xml", shards=entries)
+
+    def _is_index_current(self, shards):
+        """True if sitemap.xml is already an index and every shard file exists."""
+        path = os.path.join(self.output_dir, "sitemap.xml")
+        if not os.path.exists(path):
+            return False
+        with open(path, 'r', encoding='utf-8') as f:
+            if '<sitemapindex' not in f.read(512):
+                return False
+        return all(
+            os.path.exists(os.path.join(self.output_dir, SHARD_DIR, f"{name}.xml.gz"))
+            for name in shards
+        )
+
+    def write(self, changed_files=None):
+        """
+        Regenerates the sitemap index.
+
+        With changed_files, only the shards containing those articles are
+        rewritten; otherwise (or if the index is missing) every shard is.
+        """
+        articles = self.catalog.list_articles(oldest_first=True)
+        shards = self._shards(articles)
+
+        if changed_files and self._is_index_current(shards):
+            slugs = {os.path.splitext(os.path.basename(f))[0] for f in changed_files}
+            dirty = {name for name, items in shards.items() if any(a['slug'] in slugs for a in items)}
+        else:
+            dirty = set(shards)
+
+        for name in sorted(dirty):
+            entries = [
+                (f"{self.base_url}/{a['filename']}", self._lastmod(a), "monthly", "0.8")
+                for a in reversed(shards[name])
+            ]
+            self._write(os.path.join(SHARD_DIR, f"{name}.xml"), self._render_urlset(entries))
+
+        # Site front and month archives change whenever an article is added
+        newest = self._lastmod(articles[-1]) if articles else None
+        pages = [(f"{self.base_url}/index.html", newest, "daily", "1.0")] if newest else []
+        month_lastmods = {}
+        for a in articles:
+            month = a['published_at'][:7]
+            month_lastmods[month] = max(month_lastmods.get(month, ""), self._lastmod(a))
+        for month in sorted(month_lastmods, reverse=True):
+            pages.append((f"{self.base_url}/month/{month}.html", month_lastmods[month], "weekly", "0.5"))
+        self._write(os.path.join(SHARD_DIR, "pages.xml"), self._render_urlset(pages))
+
+        index_entries = [("pages", newest)] if newest else []
+        for name in sorted(shards, reverse=True):
+            index_entries.append((name, max(self._lastmod(a) for a in shards[name])))
+        index_path = os.path.join(self.output_dir, "sitemap.xml")
+        _, written = self.output.write(index_path, self._render_index(index_entries))
+        self.written.extend(written)
+
+        # Drop shards that no longer correspond to any month
+        shard_dir = os.path.join(self.output_dir, SHARD_DIR)
+        keep = set(shards) | {"pages"}
+        for f in os.listdir(shard_dir):
+            name = f.split(".xml")[0]
+            if name not in keep:
+                os.remove(os.path.join(shard_dir, f))
+                self.written.append(os.path.join(shard_dir, f))
+
+        print(f"Updated sitemap.xml ({len(dirty)} of {len(shards)} shard(s) regenerated)")
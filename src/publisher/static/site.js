@@ -0,0 +1,153 @@
+/* Gaia site script. Built into docs/assets/site.<hash>.js by src/publisher/assets.py */
+(function () {
+    // Google Analytics 4 (the measurement ID is filled in at build time)
+    var GA_ID = '__GA_ID__';
+    window.dataLayer = window.dataLayer || [];
+    window.gtag = function () { dataLayer.push(arguments); };
+    gtag('js', new Date());
+    gtag('config', GA_ID);
+    var ga = document.createElement('script');
+    ga.async = true;
+    ga.src = 'https://www.googletagmanager.com/gtag/js?id=' + GA_ID;
+    document.head.appendChild(ga);
+
+    // Affiliate click tracking: <a data-aff="amazon" data-label="...">
+    document.addEventListener('click', function (e) {
+        var link = e.target.closest ? e.target.closest('a[data-aff]') : null;
+        if (!link) return;
+        gtag('event', 'click_' + link.getAttribute('data-aff'), {
+            'event_category': 'affiliate',
+            'event_label': link.getAttribute('data-label') || ''
+        });
+    });
+
+    // Infinite scroll on the index: <div id="more" data-next="N"> loads cards/N.json, N-1, ...
+    function initInfiniteScroll() {
+        var grid = document.getElementById('cards');
+        var sentinel = document.getElementById('more');
+        if (!grid || !sentinel || !sentinel.hasAttribute('data-next')) return;
+        var next = parseInt(sentinel.getAttribute('data-next'), 10);
+        if (!('IntersectionObserver' in window) || !(next >= 1)) return;
+        var loading = false;
+        var observer = new IntersectionObserver(function (entries) {
+            if (!entries[0].isIntersecting || loading || next < 1) return;
+            loading = true;
+            fetch('cards/' + next + '.json').then(function (r) { return r.json(); }).then(function (cards) {
+                cards.forEach(function (c) {
+                    var a = document.createElement('a');
+                    a.href = c.f;
+                    a.className = 'card';
+                    a.innerHTML = '<div class="card-content"><div class="card-date"></div><h2 class="card-title"></h2><div class="card-readmore">Read More →</div></div>';
+                    a.querySelector('.card-date').textContent = c.d;
+                    a.querySelector('.card-title').textContent = c.t;
+                    grid.appendChild(a);
+                });
+                next -= 1;
+                if (next < 1) { observer.disconnect(); sentinel.style.display = 'none'; }
+                loading = false;
+            }).catch(function () { loading = false; });
+        });
+        observer.observe(sentinel);
+    }
+
+    // Search page: bigram postings in search/t/<nn>.json, result records in
+    // search/d/<n>.json (see src/publisher/search_index.py). Tokenization
+    // must match bigrams() there: NFKC, lowercase, split on non letters/digits.
+    function bigrams(text) {
+        var tokens = {};
+        text.normalize('NFKC').toLowerCase().split(/[^\p{L}\p{N}]+/u).forEach(function (word) {
+            var chars = Array.from(word);
+            if (chars.length === 1) tokens[chars[0]] = true;
+            for (var i = 0; i + 1 < chars.length; i++) tokens[chars[i] + chars[i + 1]] = true;
+        });
+        return Object.keys(tokens);
+    }
+
+    function initSearch() {
+        var results = document.getElementById('search-results');
+        var input = document.getElementById('search-input');
+        if (!results || !input) return;
+        var status = document.getElementById('search-status');
+        var shards = parseInt(results.getAttribute('data-shards'), 10);
+        var subShards = parseInt(results.getAttribute('data-sub-shards'), 10);
+        var split = (results.getAttribute('data-split') || '').split(',');
+        var perShard = parseInt(results.getAttribute('data-docs-per-shard'), 10);
+        var query = new URLSearchParams(location.search).get('q') || '';
+        input.value = query;
+        var tokens = bigrams(query);
+        if (!tokens.length) return;
+
+        var cache = {};
+        function fetchJson(url, empty) {
+            if (!cache[url]) {
+                cache[url] = fetch(url).then(function (r) { return r.ok ? r.json() : empty; })
+                    .catch(function () { return empty; });
+            }
+            return cache[url];
+        }
+        function postingsOf(token) {
+            var chars = Array.from(token);
+            var first = token.codePointAt(0);
+            var base = (first % shards).toString(16).padStart(2, '0');
+            var isSplit = split.indexOf(base) !== -1;
+            if (chars.length > 1) {
+                var shard = isSplit ? base + '-' + (chars[1].codePointAt(0) % subShards).toString(16) : base;
+                return fetchJson('search/t/' + shard + '.json', {}).then(function (postings) {
+                    return postings[token] || [];
+                });
+            }
+            // One character: every bigram starting with it sits in this shard (or its split parts)
+            var files = [base];
+            for (var n = 0; isSplit && n < subShards; n++) files.push(base + '-' + n.toString(16));
+            return Promise.all(files.map(function (f) { return fetchJson('search/t/' + f + '.json', {}); }))
+                .then(function (parts) {
+                    var ids = {};
+                    parts.forEach(function (postings) {
+                        Object.keys(postings).forEach(function (t) {
+                            if (t.codePointAt(0) === first) postings[t].forEach(function (id) { ids[id] = true; });
+                        });
+                    });
+                    return Object.keys(ids).map(Number);
+                });
+        }
+
+        status.textContent = '検索中…';
+        Promise.all(tokens.map(postingsOf)).then(function (lists) {
+            var hits = lists.reduce(function (acc, ids) {
+                var set = new Set(ids);
+                return acc.filter(function (id) { return set.has(id); });
+            });
+            hits.sort(function (a, b) { return b - a; });  // ids follow publish order: newest first
+            var shown = hits.slice(0, 50);
+            status.textContent = '「' + query + '」: ' + hits.length + ' 件' +
+                (hits.length > shown.length ? '（新しい ' + shown.length + ' 件を表示）' : '');
+            return Promise.all(shown.map(function (id) {
+                return fetchJson('search/d/' + Math.floor(id / perShard) + '.json', []).then(function (docs) {
+                    return docs[id % perShard];
+                });
+            }));
+        }).then(function (docs) {
+            docs.filter(Boolean).forEach(function (d) {
+                var a = document.createElement('a');
+                a.href = d[0];
+                a.className = 'card';
+                a.innerHTML = '<div class="card-content"><div class="card-date"></div><h2 class="card-title"></h2><p class="card-desc"></p><div class="card-readmore">Read More →</div></div>';
+                a.querySelector('.card-date').textContent = d[2];
+                a.querySelector('.card-title').textContent = d[1];
+                a.querySelector('.card-desc').textContent = d[3];
+                results.appendChild(a);
+            });
+        });
+    }
+
+    function init() {
+        initInfiniteScroll();
+        initSearch();
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+})();
@@ -0,0 +1,48 @@
+import os
+import threading
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+BYTECODE_CACHE_DIR = "data/cache/jinja"
+
+# Stamped into every rendered page (<meta name="gaia-migration">); bump
+# together with each new pass in src/publisher/migrations.py
+MIGRATION_VERSION = 2
+
+_environment = None
+_lock = threading.Lock()
+
+
+def get_environment():
+    """
+    Returns the process-wide Jinja2 environment.
+
+    Templates are compiled once per process (the environment keeps them) and
+    the compiled bytecode is cached on disk, so new processes and pool
+    workers skip the parse step. HTML and XML output is autoescaped; pass
+    trusted markup (rendered article bodies) wrapped in Markup.
+    """
+    global _environment
+    if _environment is None:
+        with _lock:
+            if _environment is None:
+                os.makedirs(BYTECODE_CACHE_DIR, exist_ok=True)
+                _environment = Environment(
+                    loader=FileSystemLoader(TEMPLATE_DIR),
+                    bytecode_cache=FileSystemBytecodeCache(BYTECODE_CACHE_DIR),
+                    autoescape=select_autoescape(["html", "xml"]),
+                    trim_blocks=True,
+                    lstrip_blocks=True,
+                    auto_reload=False,
+                )
+                # Keep JSON-LD readable: original key order, Japanese unescaped
+                _environment.policies["json.dumps_kwargs"] = {"sort_keys": False, "ensure_ascii": False}
+                # Freshly rendered pages already have every migration pass applied
+                _environment.globals["migration_version"] = MIGRATION_VERSION
+    return _environment
+
+
+def render(template_name, **context):
+    """Renders a template from src/publisher/templates/."""
+    return get_environment().get_template(template_name).render(**context)
+
@@ -0,0 +1,50 @@
+import os
+import hashlib
+import tempfile
+
+
+def file_hash(path):
+    """SHA-256 of a file's bytes, or None if it does not exist."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def atomic_write(path, data):
+    """
+    Writes bytes to path via a temp file in the same directory and a rename.
+
+    A crash mid-write leaves the old file (or nothing) in place, never a
+    truncated one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600; published files should be world-readable like before
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_if_changed(path, content):
+    """
+    Atomically writes content (str or bytes) unless the file already holds it.
+
+    Returns True if the file was written, False if its hash already matched
+    and it was left untouched (mtime preserved).
+    """
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    if file_hash(path) == hashlib.sha256(data).hexdigest():
+        return False
+    atomic_write(path, data)
+    return True
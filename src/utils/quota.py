@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+    import fcntl
+
+# Process exit codes for scheduled runs
+EXIT_QUOTA_EXHAUSTED = 3
+EXIT_ALREADY_RUNNING = 4
+
+
+class QuotaExhausted(Exception):
+    """Raised when the shared daily request or token budget is used up."""
+
+
+class AlreadyRunning(Exception):
+    """Raised when another process holds a single-instance lock."""
+
+
+def _lock_fd(fd, blocking):
+    if msvcrt:
+        mode = msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, mode, 1)
+    else:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        fcntl.flock(fd, flags)
+
+
+def _unlock_fd(fd):
+    if msvcrt:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class FileLock:
+    """Exclusive inter-process lock on a file (fcntl on POSIX, msvcrt on Windows)."""
+
+    def __init__(self, path, blocking=True):
+        self.path = path
+        self.blocking = blocking
+        self.fd = None
+
+    def acquire(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        try:
+            _lock_fd(self.fd, self.blocking)
+        except OSError:
+            os.close(self.fd)
+            self.fd = None
+            raise
+
+    def release(self):
+        if self.fd is not None:
+            _unlock_fd(self.fd)
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class InstanceLock:
+    """
+    Single-instance guard for bulk jobs.
+
+    Held for the lifetime of the job; a second process gets AlreadyRunning
+    immediately instead of competing for the same quota.
+    """
+
+    def __init__(self, name, lock_dir="data/locks"):
+        self.name = name
+        self.lock = FileLock(os.path.join(lock_dir, f"{name}.lock"), blocking=False)
+
+    def __enter__(self):
+        try:
+            self.lock.acquire()
+        except OSError:
+            raise AlreadyRunning(f"Another '{self.name}' job is already running.")
+        os.ftruncate(self.lock.fd, 0)
+        os.write(self.lock.fd, str(os.getpid()).encode())
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+
+
+def quota_day():
+    """Gemini daily quotas reset at midnight Pacific time."""
+    try:
+        from zoneinfo import ZoneInfo
+        now = datetime.now(ZoneInfo("America/Los_Angeles"))
+    except Exception:
+        # No tz database (e.g. Windows without tzdata): approximate with PST
+        now = datetime.now(timezone(timedelta(hours=-8)))
+    return now.strftime("%Y-%m-%d")
+
+
+class QuotaGovernor:
+    """
+    Shared Gemini quota state for every process on this machine.
+
+    State lives in a small JSON file guarded by a FileLock, so overlapping
+    scheduler runs and manual scripts see the same:
+    - token bucket for requests per minute
+    - daily request budget
+    - daily token budget (0 disables it)
+    """
+
+    def __init__(self, state_path="data/quota_state.json", rpm=10, daily_requests=250,
+                 daily_tokens=0, burst=1):
+        self.state_path = state_path
+        self.rpm = max(1, rpm)
+        self.daily_requests = daily_requests
+        self.daily_tokens = daily_tokens
+        self.burst = max(1, burst)
+        self.lock = FileLock(state_path + ".lock")
+        self._thread_lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    @classmethod
+    def from_settings(cls, **overrides):
+        from config.settings import QUOTA_STATE_PATH, GEMINI_RPM, GEMINI_RPD, GEMINI_DAILY_TOKENS
+        options = dict(state_path=QUOTA_STATE_PATH, rpm=GEMINI_RPM,
+                       daily_requests=GEMINI_RPD, daily_tokens=GEMINI_DAILY_TOKENS)
+        options.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**options)
+
+    def _load(self):
+        state = {}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+        today = quota_day()
+        if state.get('day') != today:
+            state.update({'day': today, 'requests': 0, 'tokens': 0, 'exhausted': False})
+        state.setdefault('bucket', self.burst)
+        state.setdefault('updated', time.time())
+        return state
+
+    def _save(self, state):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+
+    def _check_budget(self, state):
+        if state.get('exhausted'):
+            raise QuotaExhausted(f"Daily quota marked exhausted for {state['day']}.")
+        if self.daily_requests and state['requests'] >= self.daily_requests:
+            raise QuotaExhausted(f"Daily request budget used: {state['requests']}/{self.daily_requests}.")
+        if self.daily_tokens and state['tokens'] >= self.daily_tokens:
+            raise QuotaExhausted(f"Daily token budget used: {state['tokens']}/{self.daily_tokens}.")
+
+    def acquire(self):
+        """
+        Blocks until a request may be sent, then counts it against the budget.
+
+        Raises QuotaExhausted instead of waiting when the daily budget is gone.
+        Returns the seconds spent waiting for the bucket.
+        """
+        waited = 0.0
+        rate = self.rpm / 60.0
+        while True:
+            with self._thread_lock, self.lock:
+                state = self._load()
+                self._check_budget(state)
+                now = time.time()
+                state['bucket'] = min(self.burst, state['bucket'] + (now - state['updated']) * rate)
+                state['updated'] = now
+                if state['bucket'] >= 1:
+                    state['bucket'] -= 1
+                    state['requests'] += 1
+                    self._save(state)
+                    self.waited_seconds += waited
+                    return waited
+                self._save(state)
+                delay = (1 - state['bucket']) / rate
+            time.sleep(delay)
+            waited += delay
+
+    def record_usage(self, tokens):
+        """Adds the token count reported by the API to today's total."""
+        if not tokens:
+            return
+        with self._thread_lock, self.lock:
+            state = self._load()
+            state['tokens'] += int(tokens)
+            self._save(state)
+
+    def mark_exhausted(self):
+        """Called when the API itself reports the daily quota as spent."""
+        with self._thread_lock, self.lock:
+            state = self._load()
+            state['exhausted'] = True
+            self._save(state)
+
+    def status(self):
+        with self._thread_lock, self.lock:
+            state = self._load()
+        return {
+            'day': state['day'],
+            'requests': state['requests'],
+            'daily_requests': self.daily_requests,
+            'tokens': state['tokens'],
+            'daily_tokens': self.daily_tokens,
+            'exhausted': state.get('exhausted', False),
+        }
+
+    def describe(self):
+        s = self.status()
+        tokens = f"{s['tokens']}/{s['daily_tokens']}" if s['daily_tokens'] else f"{s['tokens']}"
+        return f"Quota {s['day']}: requests {s['requests']}/{s['daily_requests']}, tokens {tokens}"
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import uuid
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+TELEMETRY_LOG_FILE = "logs/telemetry.jsonl"
+
+
+class Telemetry:
+    """
+    Per-stage timings of a pipeline run, appended to logs/telemetry.jsonl.
+
+    One JSON object per line: {"ts", "run", "stage", "seconds", "ok", ...}
+    plus stage-specific fields (attempt, items, slug, error). Each run gets
+    a short id and ends with a "run" event holding the wall time and the
+    number of articles written (successful "article" events). Outside
+    start_run()/end_run() nothing is recorded, so render workers and tools
+    pay only a flag check.
+
+    Thread-safe: bulk generation records API attempts from worker threads.
+    """
+
+    def __init__(self, path=TELEMETRY_LOG_FILE):
+        self.path = path
+        self.run_id = None
+        self.mode = None
+        self._started = None
+        self._file = None
+        self.articles = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.run_id is not None
+
+    def start_run(self, mode, path=None):
+        """Opens the log and starts a run. Returns the run id."""
+        if path:
+            self.path = path
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self.run_id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.articles = 0
+        self._started = time.monotonic()
+        return self.run_id
+
+    def end_run(self, **fields):
+        """Writes the closing "run" event (wall time, articles, articles/hour) and closes the log."""
+        if not self.active:
+            return
+        articles = self.articles
+        seconds = time.monotonic() - self._started
+        per_hour = articles / seconds * 3600 if seconds else 0.0
+        self.record("run", seconds, mode=self.mode, articles=articles, articles_per_hour=round(per_hour, 2),
+                    **fields)
+        with self._lock:
+            self._file.close()
+            self._file = None
+            self.run_id = None
+
+    def record(self, stage, seconds, ok=True, **fields):
+        if not self.active:
+            return
+        event = {
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'run': self.run_id,
+            'stage': stage,
+            'seconds': round(seconds, 4),
+            'ok': ok,
+        }
+        event.update(fields)
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self._lock:
+            if stage == "article" and ok:
+                self.articles += 1
+            if self._file is not None:
+                self._file.write(line)
+                self._file.flush()
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """
+        Times the block as one event. The yielded dict can take extra
+        fields (or ok=False); an exception marks the event failed and
+        propagates.
+        """
+        if not self.active:
+            yield {}
+            return
+        extra = dict(fields)
+        started = time.monotonic()
+        try:
+            yield extra
+        except BaseException as e:
+            extra.update(ok=False, error=f"{type(e).__name__}: {e}"[:200])
+            raise
+        finally:
+            ok = extra.pop('ok', True)
+            self.record(name, time.monotonic() - started, ok=ok, **extra)
+
+
+# Process-wide instance; main.py starts and ends the run
+telemetry = Telemetry()
+
+
+def read_events(path=TELEMETRY_LOG_FILE, runs=None):
+    """Events of the last `runs` runs (all if None), oldest first. Unparseable lines are skipped."""
+    if not os.path.exists(path):
+        return []
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue  # a line cut short by a crash
+    if runs is not None:
+        order = list(dict.fromkeys(e.get('run') for e in events))
+        keep = set(order[-runs:])
+        events = [e for e in events if e.get('run') in keep]
+    return events
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
@@ -1,23 +1,30 @@
 
 from src.generator.gemini_client import GeminiClient
+from src.generator.response_cache import add_cache_arguments, cache_from_args
 from src.generator.prompts import Prompts
 from src.publisher.html_generator import HtmlGenerator
 from src.publisher.affiliate import AffiliateInjector
 from config.settings import AMAZON_TAG, RAKUTEN_ID
+from src.utils.quota import QuotaExhausted
 import json
 import os
+import argparse
 
-def generate_test_article(topic):
+def generate_test_article(topic, cache=None, refresh=False):
     print(f"Generating test article for topic: {topic}")
     
     # Initialize components
-    client = GeminiClient()
+    client = GeminiClient(cache=cache, refresh=refresh)
     html_gen = HtmlGenerator()
     affiliate = AffiliateInjector(amazon_tag=AMAZON_TAG, rakuten_id=RAKUTEN_ID)
     
     # 1. Generate Content
     prompt = Prompts.AFFILIATE_ARTICLE.format(topic=topic)
-    markdown_content = client.generate_content(prompt)
+    try:
+        markdown_content = client.generate_content(prompt)
+    except QuotaExhausted as e:
+        print(f"[QUOTA] {e}")
+        return
     
     # 2. Extract Title (Simple extraction for test)
     lines = markdown_content.strip().split('\n')
@@ -61,4 +68,7 @@ def generate_test_article(topic):
     print(f"Generated: {os.path.join(html_gen.output_dir, filename)}")
 
 if __name__ == "__main__":
-    generate_test_article("Anker Prime Power Bank (モバイルバッテリー)")
+    parser = argparse.ArgumentParser(description="Render one test article for template checks")
+    add_cache_arguments(parser, enabled_by_default=True)
+    args = parser.parse_args()
+    generate_test_article("Anker Prime Power Bank (モバイルバッテリー)", cache=cache_from_args(args), refresh=args.refresh)
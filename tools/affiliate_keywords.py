@@ -0,0 +1,102 @@
+import re
+import time
+import argparse
+from collections import Counter
+from src.publisher.affiliate import AffiliateInjector
+from src.publisher.catalog import ArticleCatalog
+from src.publisher.keyword_linker import KeywordLinker, load_keywords
+from config.settings import AFFILIATE_KEYWORDS_PATH, CATALOG_PATH, AMAZON_TAG, RAKUTEN_ID
+
+HEADER = """# Affiliate keyword dictionary for src/publisher/keyword_linker.py
+# term<TAB>search query (default: term)<TAB>platform (amazon|rakuten, default: amazon)
+# The first occurrence of each term in an article body becomes an affiliate search link.
+"""
+
+MODEL_TOKEN_RE = re.compile(r'[A-Za-z0-9]')
+MIN_BRAND_ARTICLES = 3
+
+def _candidates(query):
+    """Full product query, its Latin model-name prefix, and its first word (brand)."""
+    words = query.split()
+    yield query
+    model = []
+    for word in words:
+        if not MODEL_TOKEN_RE.search(word):
+            break
+        model.append(word)
+    if 2 <= len(model) < len(words):
+        yield " ".join(model)
+
+def seed(args):
+    """Adds product names and brands from the catalog's search queries to the dictionary."""
+    catalog = ArticleCatalog(CATALOG_PATH)
+    queries = sorted({(a['search_query'] or "").strip() for a in catalog.list_articles()} - {""})
+    existing = load_keywords(args.file)
+    known = {term.lower() for term, _, _ in existing}
+    brands = Counter(q.split()[0] for q in queries if len(q.split()) > 1)
+    new = []
+    for brand, count in sorted(brands.items()):
+        if count >= MIN_BRAND_ARTICLES and len(brand) >= 2 and brand.lower() not in known:
+            new.append((brand, brand))
+            known.add(brand.lower())
+    for query in queries:
+        for term in _candidates(query):
+            if term.lower() not in known:
+                new.append((term, query))
+                known.add(term.lower())
+    lines = [f"{term}\t{query}\t{platform}" for term, query, platform in existing]
+    lines += [f"{term}\t{query if query != term else ''}\tamazon" for term, query in new]
+    with open(args.file, "w", encoding="utf-8") as f:
+        f.write(HEADER + "\n".join(sorted(lines, key=str.lower)) + "\n")
+    print(f"Added {len(new)} term(s); dictionary now holds {len(lines)}.")
+
+def _linker(path):
+    return KeywordLinker(load_keywords(path), AffiliateInjector(amazon_tag=AMAZON_TAG, rakuten_id=RAKUTEN_ID))
+
+def check(args):
+    linker = _linker(args.file)
+    with open(args.html, "r", encoding="utf-8") as f:
+        html = f.read()
+    start = time.monotonic()
+    _, linked = linker.link(html)
+    print(f"{len(linked)} term(s) linked in {(time.monotonic() - start) * 1000:.1f} ms "
+          f"({len(linker.targets)} terms, {len(linker.automaton)} automaton states):")
+    for term in sorted(linked):
+        print(f"  {term}")
+
+def bench(args):
+    """Scan time with the real dictionary and with it padded by synthetic terms."""
+    with open(args.html, "r", encoding="utf-8") as f:
+        html = f.read()
+    entries = load_keywords(args.file)
+    for extra in (0, 10000, 100000):
+        padded = entries + [(f"zzproduct{i:06d}", f"zzproduct{i:06d}", "amazon") for i in range(extra)]
+        linker = KeywordLinker(padded, AffiliateInjector(), max_links=10 ** 6)
+        start = time.monotonic()
+        for _ in range(args.repeat):
+            linker.link(html)
+        per = (time.monotonic() - start) / args.repeat * 1000
+        print(f"{len(linker.targets):>7} terms: {per:.2f} ms per page ({len(html)} chars)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Affiliate keyword dictionary")
+    parser.add_argument("--file", default=AFFILIATE_KEYWORDS_PATH, help="Dictionary TSV")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_seed = sub.add_parser("seed", help="Add product names and brands from the catalog's search queries")
+    p_seed.set_defaults(func=seed)
+
+    p_check = sub.add_parser("check", help="Show which terms a rendered page would link")
+    p_check.add_argument("html")
+    p_check.set_defaults(func=check)
+
+    p_bench = sub.add_parser("bench", help="Time one page against growing dictionaries")
+    p_bench.add_argument("html")
+    p_bench.add_argument("--repeat", type=int, default=20)
+    p_bench.set_defaults(func=bench)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
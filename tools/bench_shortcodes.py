@@ -0,0 +1,76 @@
+import re
+import timeit
+import argparse
+from src.publisher.shortcodes import ShortcodeEngine, DEFAULT_HANDLERS
+
+SAMPLE_PARAGRAPH = (
+    "2026年モデルは出力120Wを維持しつつ重量110gまで軽量化された。"
+    "ホテルのゆるいコンセントでも自重で抜け落ちにくい。\n\n"
+)
+
+SAMPLE_CODES = [
+    "[[CHAT_L: 出張先のコンセントがゆるくて充電器が抜ける……]]",
+    "[[CHAT_R: 110gのモデルなら自重で抜けにくいですよ。]]",
+    "[[MERIT: - 重量110g\n- 出力120W\n- 3ポート同時充電]]",
+    "[[DEMERIT: - 価格が高い | - 発熱がやや大きい]]",
+    "[[SPEC: 重量: 110g | 出力: 120W | ポート: USB-C x3]]",
+    "[[RATING: 4 | コスパ]]",
+]
+
+
+def make_article(blocks=40):
+    """A synthetic Markdown article with one shortcode per paragraph."""
+    parts = []
+    for i in range(blocks):
+        parts.append(SAMPLE_PARAGRAPH)
+        parts.append(SAMPLE_CODES[i % len(SAMPLE_CODES)] + "\n\n")
+    return "".join(parts)
+
+
+def legacy_processor(names):
+    """The previous approach: one DOTALL re.sub pass per registered shortcode."""
+    patterns = [re.compile(r'\[\[' + name + r':\s*(.*?)\]\]', re.DOTALL) for name in names]
+
+    def process(text):
+        for pattern in patterns:
+            text = pattern.sub(lambda m: f"<div>{m.group(1)}</div>", text)
+        return text
+    return process
+
+
+def dummy_handler(body, engine):
+    return f"<div>{body}</div>"
+
+
+def _per_call_us(func, repeat):
+    return min(timeit.repeat(func, number=repeat, repeat=3)) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-article cost of shortcode expansion vs number of registered shortcodes")
+    parser.add_argument("--repeat", type=int, default=200, help="Renders per measurement")
+    parser.add_argument("--blocks", type=int, default=120, help="Paragraph+shortcode blocks per article")
+    args = parser.parse_args()
+
+    article = make_article(args.blocks)
+    print(f"Article: {len(article)} chars, {args.blocks} shortcodes")
+    # Both sides use the same trivial handler so only scanning/dispatch is measured;
+    # the last column is the engine with the real built-in handlers.
+    print(f"{'Registered':>10} {'Engine us':>10} {'Per-pattern us':>15} {'Engine+real handlers us':>24}")
+    print("-" * 62)
+    for extra in (0, 8, 32, 128):
+        names = list(DEFAULT_HANDLERS) + [f"CUSTOM_{i}" for i in range(extra)]
+        engine = ShortcodeEngine(handlers={name: dummy_handler for name in names})
+        real = ShortcodeEngine(product_card=lambda keyword: keyword)
+        for name in names[len(DEFAULT_HANDLERS):]:
+            real.register(name, dummy_handler)
+        legacy = legacy_processor(names)
+
+        engine_us = _per_call_us(lambda: engine.render(article), args.repeat)
+        legacy_us = _per_call_us(lambda: legacy(article), args.repeat)
+        real_us = _per_call_us(lambda: real.render(article), args.repeat)
+        print(f"{len(names):>10} {engine_us:>10.1f} {legacy_us:>15.1f} {real_us:>24.1f}")
+
+
+if __name__ == "__main__":
+    main()
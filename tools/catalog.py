@@ -0,0 +1,39 @@
+import argparse
+from src.publisher.catalog import ArticleCatalog
+from config.settings import CATALOG_PATH
+
+def backfill(args):
+    catalog = ArticleCatalog(CATALOG_PATH)
+    catalog.backfill(args.docs, workers=args.workers)
+    print(f"Catalog now holds {catalog.count()} articles ({CATALOG_PATH}).")
+
+def search(args):
+    catalog = ArticleCatalog(CATALOG_PATH)
+    results = catalog.search(args.query, limit=args.limit)
+    if not results:
+        print("No matches.")
+        return
+    for row in results:
+        print(f"{row['published_at'][:10]}  {row['filename']}")
+        print(f"    {row['title']}")
+        print(f"    {row['snippet']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Gaia article catalog")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_backfill = sub.add_parser("backfill", help="Scan docs/ and (re)build the catalog")
+    p_backfill.add_argument("--docs", default="docs", help="Directory with published pages")
+    p_backfill.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p_backfill.set_defaults(func=backfill)
+
+    p_search = sub.add_parser("search", help="Full-text search over titles and bodies")
+    p_search.add_argument("query", help="FTS5 query, e.g. 'モバイルバッテリー' or 'title:Anker'")
+    p_search.add_argument("--limit", type=int, default=20)
+    p_search.set_defaults(func=search)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
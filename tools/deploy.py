@@ -0,0 +1,39 @@
+import argparse
+import time
+from src.publisher.deploy import GitDeployer, DeployError
+from src.utils.quota import FileLock
+
+def status(args):
+    deployer = GitDeployer.from_settings()
+    state = deployer._read_state()
+    last = state.get('last_push')
+    print(f"Remote: {deployer.remote}/{deployer.branch}, push interval {deployer.push_interval / 60:.0f} min")
+    print(f"Local commits waiting: {deployer.unpushed_commits()}")
+    if last:
+        print(f"Last push: {(time.time() - last) / 60:.0f} min ago")
+    else:
+        print("Last push: never (from this machine)")
+
+def push(args):
+    """Pushes waiting commits now, regardless of the interval."""
+    deployer = GitDeployer.from_settings()
+    try:
+        with FileLock(deployer.lock_path):
+            if not deployer.unpushed_commits():
+                print("Nothing to push.")
+                return
+            deployer.push()
+    except DeployError as e:
+        print(f"Push failed: {e}")
+        raise SystemExit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched git deploy of generated content")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Show local commits waiting for the next push").set_defaults(func=status)
+    sub.add_parser("push", help="Push waiting commits immediately").set_defaults(func=push)
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
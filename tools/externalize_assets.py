@@ -0,0 +1,39 @@
+import os
+import argparse
+from src.publisher.assets import SiteAssets, externalize_page
+
+def externalize(docs_dir, dry_run=False):
+    """Rewrites published pages to link the shared CSS/JS bundle instead of inlining it."""
+    assets = SiteAssets(docs_dir)
+    head_tags = assets.head_tags() if not dry_run else '<link rel="stylesheet" href="assets/site.css">'
+    changed = 0
+    saved = 0
+    for name in sorted(os.listdir(docs_dir)):
+        if not name.endswith(".html"):
+            continue
+        path = os.path.join(docs_dir, name)
+        with open(path, "r", encoding="utf-8") as f:
+            page = f.read()
+        new_page = externalize_page(page, head_tags)
+        if new_page is None:
+            continue
+        changed += 1
+        saved += len(page.encode("utf-8")) - len(new_page.encode("utf-8"))
+        if not dry_run:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(new_page)
+
+    action = "Would rewrite" if dry_run else "Rewrote"
+    print(f"{action} {changed} page(s), {saved / 1024:.0f} KB less HTML.")
+    if not dry_run:
+        print(f"Assets: {', '.join(assets.build().values())}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Move inline CSS/GA/onclick tracking of published pages into docs/assets/")
+    parser.add_argument("--docs", default="docs", help="Directory with published pages")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    args = parser.parse_args()
+    externalize(args.docs, dry_run=args.dry_run)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import argparse
+from src.generator.json_extract import extract_articles, FAILED_RESPONSES_DIR
+
+FIXTURES_DIR = "tools/fixtures/llm_json"
+
+def check_fixtures(directory):
+    """
+    Runs the extractor over the fixture corpus.
+
+    manifest.json lists, per file, how many articles the response was meant
+    to hold ("expected") and how many must be recovered ("min_salvaged").
+    Returns the number of fixtures below their minimum.
+    """
+    with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    expected_total = 0
+    salvaged_total = 0
+    failures = 0
+    print(f"{'Fixture':<32} {'Expected':>8} {'Salvaged':>8}  Result")
+    print("-" * 75)
+    for name in sorted(manifest):
+        spec = manifest[name]
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            result = extract_articles(f.read())
+        salvaged = len(result.articles)
+        passed = salvaged >= spec["min_salvaged"]
+        if not passed:
+            failures += 1
+        expected_total += spec["expected"]
+        salvaged_total += min(salvaged, spec["expected"])
+        status = "ok  " if passed else "FAIL"
+        print(f"{name:<32} {spec['expected']:>8} {salvaged:>8}  {status} {result.summary()}")
+
+    rate = salvaged_total / expected_total * 100 if expected_total else 0.0
+    print("-" * 75)
+    print(f"Salvage rate: {salvaged_total}/{expected_total} articles ({rate:.1f}%), "
+          f"{failures} fixture(s) below minimum")
+    return failures
+
+def scan_failed(directory):
+    """Re-runs the extractor over responses saved by dump_failed_response()."""
+    if not os.path.isdir(directory):
+        print(f"\nNo saved responses in {directory}.")
+        return
+    names = sorted(n for n in os.listdir(directory) if n.endswith(".txt"))
+    recovered = 0
+    print(f"\nSaved responses in {directory}: {len(names)}")
+    for name in names:
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            result = extract_articles(f.read())
+        recovered += len(result.articles)
+        print(f"  {name}: {result.summary()}")
+    print(f"Articles recoverable from saved responses: {recovered}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how many articles the JSON extractor salvages")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Fixture corpus with manifest.json")
+    parser.add_argument("--failed", default=FAILED_RESPONSES_DIR,
+                        help="Also re-check responses saved from real runs")
+    args = parser.parse_args()
+
+    failures = check_fixtures(args.fixtures)
+    scan_failed(args.failed)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import time
+import argparse
+from collections import Counter
+from src.publisher.migrations import MigrationEngine, PASSES, latest_version, page_version
+from src.utils.quota import InstanceLock, AlreadyRunning, EXIT_ALREADY_RUNNING
+
+def list_passes(args):
+    for version in sorted(PASSES):
+        name, func, articles_only = PASSES[version]
+        scope = "articles" if articles_only else "all pages"
+        print(f"v{version} {name} ({scope}): {(func.__doc__ or '').strip().splitlines()[0]}")
+
+def status(args):
+    engine = MigrationEngine(args.docs)
+    versions = Counter()
+    for path in engine.pages():
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            page = f.read()
+        if page.strip():
+            versions[page_version(page)] += 1
+    print(f"Latest migration: v{latest_version()}")
+    for version, count in sorted(versions.items()):
+        print(f"  v{version}: {count} page(s)")
+
+def run(args):
+    apply = args.apply
+    engine = MigrationEngine(args.docs)
+    start = time.monotonic()
+    engine.run(target=args.to, apply=apply, workers=args.workers, diffs=args.diff)
+    for line in engine.report(apply=apply):
+        print(line)
+    for diff in engine.diffs:
+        print(diff)
+    print(f"Done in {time.monotonic() - start:.1f}s.")
+    if apply:
+        engine.output.log_run("migrate")
+    else:
+        print("Nothing written. Re-run with --apply to migrate these pages.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned site-wide migration passes to published pages")
+    parser.add_argument("--docs", default="docs", help="Directory with published pages")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_list = sub.add_parser("list", help="Show the registered passes")
+    p_list.set_defaults(func=list_passes)
+
+    p_status = sub.add_parser("status", help="Count pages per migration version")
+    p_status.set_defaults(func=status)
+
+    p_run = sub.add_parser("run", help="Dry run (diff stats), or migrate with --apply")
+    p_run.add_argument("--to", type=int, default=None, help="Stop at this version (default: latest)")
+    p_run.add_argument("--apply", action="store_true", help="Write the migrated pages")
+    p_run.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p_run.add_argument("--diff", type=int, default=0, metavar="N", help="Dry run: print the diff of the first N changed pages")
+    p_run.set_defaults(func=run)
+
+    args = parser.parse_args()
+    if args.command == "run" and args.apply:
+        # Rewrites docs/; never overlap with a bulk run or a rebuild
+        try:
+            with InstanceLock("bulk"):
+                args.func(args)
+        except AlreadyRunning as e:
+            print(f"[LOCKED] {e} Exiting.")
+            raise SystemExit(EXIT_ALREADY_RUNNING)
+    else:
+        args.func(args)
+
+if __name__ == "__main__":
+    main()
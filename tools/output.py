@@ -0,0 +1,40 @@
+import time
+import argparse
+from src.publisher.output import OutputStage, process_tree, remove_siblings, brotli
+
+def process(args):
+    stage = OutputStage.from_settings()
+    if args.no_minify:
+        stage.minify = False
+    if args.no_compress:
+        stage.precompress = False
+    if stage.precompress and brotli is None:
+        print("brotli is not installed; writing .gz siblings only.")
+    start = time.monotonic()
+    written = process_tree(stage, args.docs, workers=args.workers)
+    print(f"Processed {args.docs}/ in {time.monotonic() - start:.1f}s; {len(written)} file(s) written.")
+    stage.log_run("bulk-process")
+
+def clean(args):
+    removed = remove_siblings(args.docs)
+    print(f"Removed {len(removed)} precompressed sibling(s).")
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify and precompress published files")
+    parser.add_argument("--docs", default="docs", help="Directory with published pages")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_process = sub.add_parser("process", help="Minify every page and write .gz/.br siblings (parallel)")
+    p_process.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p_process.add_argument("--no-minify", action="store_true", help="Only precompress")
+    p_process.add_argument("--no-compress", action="store_true", help="Only minify")
+    p_process.set_defaults(func=process)
+
+    p_clean = sub.add_parser("clean", help="Delete .gz/.br siblings (sitemap shards keep their .xml.gz)")
+    p_clean.set_defaults(func=clean)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
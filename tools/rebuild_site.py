@@ -0,0 +1,82 @@
+import os
+import argparse
+from src.publisher.html_generator import HtmlGenerator
+from src.publisher.content_store import ContentStore
+from src.publisher.site_rebuild import import_published_pages, rebuild_site
+from src.utils.quota import InstanceLock, AlreadyRunning, EXIT_ALREADY_RUNNING
+from config.settings import CONTENT_STORE_PATH
+
+def rebuild(args):
+    generator = HtmlGenerator(args.docs)
+    store = ContentStore(CONTENT_STORE_PATH)
+    if args.import_missing:
+        imported = import_published_pages(store, args.docs)
+        print(f"Imported {imported} published page(s) into the content store.")
+    rebuild_site(generator, store, workers=args.workers, slugs=args.slugs or None)
+
+def import_pages(args):
+    store = ContentStore(CONTENT_STORE_PATH)
+    imported = import_published_pages(store, args.docs)
+    print(f"Imported {imported} published page(s). Store holds {len(store)} article(s).")
+
+def stats(args):
+    store = ContentStore(CONTENT_STORE_PATH)
+    s = store.stats()
+    formats = {}
+    for record in store.iter_records():
+        formats[record.get('format')] = formats.get(record.get('format'), 0) + 1
+    print(f"Content store: {CONTENT_STORE_PATH}")
+    print(f"  Articles: {s['records']} ({', '.join(f'{k}: {v}' for k, v in sorted(formats.items()))})")
+    print(f"  Pack size: {s['pack_bytes'] / 1024:.0f} KB ({s['live_bytes'] / 1024:.0f} KB live)")
+
+def compact(args):
+    store = ContentStore(CONTENT_STORE_PATH)
+    before = store.stats()['pack_bytes']
+    store.compact()
+    print(f"Compacted {before / 1024:.0f} KB -> {store.stats()['pack_bytes'] / 1024:.0f} KB")
+
+def backup(args):
+    store = ContentStore(CONTENT_STORE_PATH)
+    copied = store.backup(args.dest)
+    size = sum(os.path.getsize(path) for path in copied)
+    print(f"Backed up {len(store)} article(s) to {args.dest} ({size / 1024:.0f} KB): {', '.join(copied)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-render the site from the content store")
+    parser.add_argument("--docs", default="docs", help="Directory with published pages")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_rebuild = sub.add_parser("rebuild", help="Re-render every article, then index and sitemap")
+    p_rebuild.add_argument("slugs", nargs="*", help="Only these articles (default: all)")
+    p_rebuild.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p_rebuild.add_argument("--import-missing", action="store_true",
+                           help="First import published pages that have no source record")
+    p_rebuild.set_defaults(func=rebuild)
+
+    p_import = sub.add_parser("import", help="Import published pages that have no source record")
+    p_import.set_defaults(func=import_pages)
+
+    p_stats = sub.add_parser("stats", help="Show content store size")
+    p_stats.set_defaults(func=stats)
+
+    p_compact = sub.add_parser("compact", help="Drop superseded records from the pack")
+    p_compact.set_defaults(func=compact)
+
+    p_backup = sub.add_parser("backup", help="Copy the content store (not in git) to a directory")
+    p_backup.add_argument("dest", help="Target directory, e.g. on another disk")
+    p_backup.set_defaults(func=backup)
+
+    args = parser.parse_args()
+    if args.command in ("rebuild", "import", "compact"):
+        # Writes docs/ and the store; never overlap with a bulk run
+        try:
+            with InstanceLock("bulk"):
+                args.func(args)
+        except AlreadyRunning as e:
+            print(f"[LOCKED] {e} Exiting.")
+            raise SystemExit(EXIT_ALREADY_RUNNING)
+    else:
+        args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import time
+import argparse
+from src.publisher.related import RelatedArticles
+from src.publisher.content_store import ContentStore
+from config.settings import CONTENT_STORE_PATH
+
+def _store_articles(store):
+    return [(r['slug'], r['title'], r['filename'], r['title'] + "\n" + r['content'])
+            for r in store.iter_records()]
+
+def rebuild(args):
+    store = ContentStore(CONTENT_STORE_PATH)
+    related = RelatedArticles.from_settings()
+    start = time.monotonic()
+    articles = _store_articles(store)
+    related.rebuild(articles)
+    print(f"Linked {len(articles)} article(s) to up to {related.k} neighbours in {time.monotonic() - start:.1f}s.")
+    print("Re-render the pages to show the new lists: python -m tools.rebuild_site rebuild")
+
+def recompute(args):
+    related = RelatedArticles.from_settings()
+    start = time.monotonic()
+    related.recompute()
+    related.save()
+    print(f"Recomputed {len(related.meta['slugs'])} neighbour list(s) in {time.monotonic() - start:.1f}s.")
+
+def show(args):
+    related = RelatedArticles.from_settings()
+    neighbours = related.neighbours(args.slug)
+    if not neighbours:
+        print(f"No related articles for {args.slug}.")
+    for item in neighbours:
+        print(f"  {item['score']:.2f}  {item['slug']}  {item['title']}")
+
+def bench(args):
+    """Times rebuild, full recompute and a one-article update on a copy of the corpus scaled to --size."""
+    import tempfile
+    store = ContentStore(CONTENT_STORE_PATH)
+    base = _store_articles(store)
+    if not base:
+        print("Content store is empty.")
+        return
+    articles = []
+    round_no = 0
+    while len(articles) < args.size:
+        articles.extend((f"{slug}-{round_no}", title, filename, f"{text} {round_no}")
+                        for slug, title, filename, text in base[:args.size - len(articles)])
+        round_no += 1
+    with tempfile.TemporaryDirectory() as tmp:
+        related = RelatedArticles(tmp, k=args.k)
+        start = time.monotonic()
+        related.rebuild(articles)
+        print(f"rebuild   {len(articles)} articles: {time.monotonic() - start:.2f}s")
+        start = time.monotonic()
+        related.recompute()
+        print(f"recompute {len(articles)} articles: {time.monotonic() - start:.2f}s")
+        related = RelatedArticles(tmp, k=args.k)
+        slug, title, filename, text = base[0]
+        start = time.monotonic()
+        changed = related.update([(slug + "-bench", title, filename, text)])
+        print(f"update    1 article (load + save included): {time.monotonic() - start:.2f}s, "
+              f"{len(changed)} other list(s) changed")
+
+def main():
+    parser = argparse.ArgumentParser(description="Related-article (関連記事) index")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_rebuild = sub.add_parser("rebuild", help="Rebuild the matrix and every neighbour list from the content store")
+    p_rebuild.set_defaults(func=rebuild)
+
+    p_recompute = sub.add_parser("recompute", help="Refresh every neighbour list with current IDF weights")
+    p_recompute.set_defaults(func=recompute)
+
+    p_show = sub.add_parser("show", help="List the related articles of one slug")
+    p_show.add_argument("slug")
+    p_show.set_defaults(func=show)
+
+    p_bench = sub.add_parser("bench", help="Time rebuild/recompute/update on the corpus scaled up")
+    p_bench.add_argument("--size", type=int, default=10000)
+    p_bench.add_argument("--k", type=int, default=5)
+    p_bench.set_defaults(func=bench)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
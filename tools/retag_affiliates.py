@@ -0,0 +1,123 @@
+import os
+import mmap
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from src.publisher.affiliate import retag_links
+from src.publisher.content_store import ContentStore
+from src.publisher.output import gzip_bytes, brotli_bytes, brotli
+from src.utils.fs import atomic_write
+from config.settings import AMAZON_TAG, RAKUTEN_ID, CONTENT_STORE_PATH
+
+# Cheap pre-check on the mapped bytes before running the regex
+MARKERS = (b"amazon.co.jp/s?k=", b"search.rakuten.co.jp/search/mall/")
+
+def _retag_file(job):
+    """
+    Worker: retags one page. The page is memory-mapped, so files without
+    affiliate links are rejected without being read into memory. With
+    apply, changed pages are replaced atomically and their .gz/.br siblings
+    refreshed. Returns (path, counts, byte delta, written paths) or None if
+    the page needs no change.
+    """
+    path, amazon_tag, rakuten_id, renames, apply = job
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if all(mm.find(marker) == -1 for marker in MARKERS):
+                return None
+            new_data, counts = retag_links(mm, amazon_tag, rakuten_id, renames)
+            if new_data is None:
+                return None
+            delta = len(new_data) - len(mm)
+    written = []
+    if apply:
+        atomic_write(path, new_data)
+        written.append(path)
+        for suffix, compressor in ((".gz", gzip_bytes), (".br", brotli_bytes)):
+            sibling = path + suffix
+            if not os.path.exists(sibling):
+                continue
+            if suffix == ".br" and brotli is None:
+                os.remove(sibling)  # would be stale; cannot be rebuilt without brotli
+            else:
+                atomic_write(sibling, compressor(new_data))
+            written.append(sibling)
+    return path, counts, delta, written
+
+def _pages(docs_dir):
+    for root, _, files in os.walk(docs_dir):
+        for name in sorted(files):
+            if name.endswith(".html"):
+                yield os.path.join(root, name)
+
+def _run(paths, args, renames, apply):
+    jobs = [(path, args.amazon_tag, args.rakuten_id, renames, apply) for path in paths]
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        return [r for r in pool.map(_retag_file, jobs, chunksize=64) if r is not None]
+
+def _retag_store(args, renames):
+    """Retags imported (format 'html') source records so a later rebuild keeps the new links."""
+    store = ContentStore(CONTENT_STORE_PATH)
+    changed = 0
+    for record in store.iter_records():
+        if record.get('format') != 'html':
+            continue
+        new_data, _ = retag_links(record['content'].encode('utf-8'), args.amazon_tag, args.rakuten_id, renames)
+        if new_data is None:
+            continue
+        store.put(dict(record, content=new_data.decode('utf-8')), save_index=False)
+        changed += 1
+    store.save_index()
+    if changed:
+        # Every retagged record was appended in full; drop the superseded copies
+        store.compact()
+    return changed
+
+def retag(args):
+    renames = dict(item.split("=", 1) for item in args.rename)
+    start = time.monotonic()
+    paths = list(_pages(args.docs))
+    plan = _run(paths, args, renames, apply=False)
+    totals = {'links': 0, 'urls': 0, 'labels': 0}
+    for _, counts, _, _ in plan:
+        for key in totals:
+            totals[key] += counts[key]
+    delta = sum(d for _, _, d, _ in plan)
+    print(f"Dry run over {len(paths)} page(s) in {time.monotonic() - start:.1f}s: "
+          f"{len(plan)} page(s) to rewrite, {totals['urls']} URL(s) and {totals['labels']} label(s) "
+          f"out of {totals['links']} affiliate link(s) on them, {delta:+d} bytes")
+    for path, counts, _, _ in plan[:args.show]:
+        print(f"  {path}: {counts['urls']} URL(s), {counts['labels']} label(s)")
+    if len(plan) > args.show:
+        print(f"  ... and {len(plan) - args.show} more")
+
+    if not args.apply:
+        print("Nothing written. Re-run with --apply to rewrite these pages.")
+        return
+    start = time.monotonic()
+    done = _run([path for path, _, _, _ in plan], args, renames, apply=True)
+    written = sum(len(w) for _, _, _, w in done)
+    print(f"Rewrote {len(done)} page(s) ({written} file(s) with siblings) in {time.monotonic() - start:.1f}s.")
+    if not args.no_store:
+        print(f"Retagged {_retag_store(args, renames)} imported source record(s) in the content store.")
+    if args.amazon_tag != AMAZON_TAG or args.rakuten_id != RAKUTEN_ID:
+        print("Note: set AMAZON_TAG/RAKUTEN_ID to the new values too, or the next render brings the old ones back.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite affiliate tags and links across published pages in place")
+    parser.add_argument("--docs", default="docs", help="Directory with published pages")
+    parser.add_argument("--amazon-tag", default=AMAZON_TAG, help="Amazon associate tag (default: AMAZON_TAG)")
+    parser.add_argument("--rakuten-id", default=RAKUTEN_ID, help="Rakuten affiliate id (default: RAKUTEN_ID)")
+    parser.add_argument("--rename", action="append", default=[], metavar="OLD=NEW",
+                        help="Point links for keyword OLD at NEW (URL and tracking label); repeatable")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--show", type=int, default=10, help="Pages listed in the dry-run summary")
+    parser.add_argument("--apply", action="store_true", help="Write the changes after the dry-run summary")
+    parser.add_argument("--no-store", action="store_true", help="Leave content store records alone")
+    args = parser.parse_args()
+    retag(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,28 @@
 import os
 import csv
+import argparse
 from datetime import datetime, timedelta
+from src.publisher.catalog import ArticleCatalog
+from src.utils.telemetry import read_events, percentile
+from config.settings import CATALOG_PATH, TELEMETRY_PATH
 
 DOCS_DIR = "docs"
 LOG_FILE = "logs/history.csv"
 
-def get_total_articles():
-    if not os.path.exists(DOCS_DIR):
-        return 0
-    return len([f for f in os.listdir(DOCS_DIR) if f.endswith(".html") and f != "index.html" and not f.startswith("google") and not f.startswith("test_")])
+# Pipeline order for the stage table; stages not listed here follow
+STAGE_ORDER = ["topic_select", "prompt_build", "quota_wait", "api", "api_attempt", "json_parse",
+               "duplicate_check", "article", "shortcodes", "markdown", "keyword_links", "related", "write",
+               "index", "search_index", "sitemap", "deploy"]
 
-def get_daily_stats():
-    if not os.path.exists(DOCS_DIR):
-        return {}
-    
-    stats = {}
+def get_total_articles(catalog):
+    return catalog.count()
+
+def get_daily_stats(catalog):
     today = datetime.now().date()
     yesterday = today - timedelta(days=1)
-    
-    files = [f for f in os.listdir(DOCS_DIR) if f.endswith(".html") and f != "index.html" and not f.startswith("google") and not f.startswith("test_")]
-    
-    count_today = 0
-    count_yesterday = 0
-    
-    for f in files:
-        filepath = os.path.join(DOCS_DIR, f)
-        mtime = datetime.fromtimestamp(os.path.getmtime(filepath)).date()
-        
-        if mtime == today:
-            count_today += 1
-        elif mtime == yesterday:
-            count_yesterday += 1
-            
     return {
-        "Today": count_today,
-        "Yesterday": count_yesterday
+        "Today": catalog.count_by_date(today.isoformat()),
+        "Yesterday": catalog.count_by_date(yesterday.isoformat())
     }
 
 def show_history(limit=10):
@@ -62,17 +50,65 @@ def show_history(limit=10):
     except Exception as e:
         print(f"Error reading history: {e}")
 
+def show_telemetry(path=TELEMETRY_PATH, runs=20):
+    """p50/p95 per stage and articles per hour over the last `runs` runs."""
+    events = read_events(path, runs=runs)
+    if not events:
+        print("\nNo telemetry recorded yet.")
+        return
+    run_events = [e for e in events if e['stage'] == 'run']
+    run_seconds = sum(e['seconds'] for e in run_events)
+
+    by_stage = {}
+    for e in events:
+        if e['stage'] != 'run':
+            by_stage.setdefault(e['stage'], []).append(e)
+    stages = [s for s in STAGE_ORDER if s in by_stage] + sorted(set(by_stage) - set(STAGE_ORDER))
+
+    print(f"\n--- Pipeline Stages (last {len({e['run'] for e in events})} run(s)) ---")
+    print(f"{'Stage':<16} {'Count':>6} {'Failed':>6} {'p50 s':>8} {'p95 s':>8} {'Total s':>9} {'Share':>6}")
+    print("-" * 64)
+    for stage in stages:
+        seconds = [e['seconds'] for e in by_stage[stage]]
+        failed = sum(1 for e in by_stage[stage] if not e.get('ok', True))
+        # Nested (article includes markdown...) and concurrent (api) stages overlap, so shares do not add up
+        share = f"{sum(seconds) / run_seconds * 100:.0f}%" if run_seconds else "-"
+        print(f"{stage:<16} {len(seconds):>6} {failed:>6} {percentile(seconds, 50):>8.3f} "
+              f"{percentile(seconds, 95):>8.3f} {sum(seconds):>9.1f} {share:>6}")
+
+    if not run_events:
+        return
+    print(f"\n{'Run':<14} {'Started':<20} {'Mode':<8} {'Articles':>8} {'Wall s':>8} {'Per hour':>9}")
+    print("-" * 72)
+    for e in run_events[-10:]:
+        print(f"{e['run']:<14} {e['ts'][:19]:<20} {e.get('mode') or '-':<8} {e.get('articles', 0):>8} "
+              f"{e['seconds']:>8.1f} {e.get('articles_per_hour', 0):>9.1f}")
+    articles = sum(e.get('articles', 0) for e in run_events)
+    if run_seconds:
+        print(f"Articles per hour: {articles / run_seconds * 3600:.1f} "
+              f"({articles} article(s) in {run_seconds / 60:.1f} min of run time)")
+
 def main():
+    parser = argparse.ArgumentParser(description="Article counts, run history and per-stage timings")
+    parser.add_argument("--runs", type=int, default=20, help="Runs included in the stage table")
+    parser.add_argument("--telemetry", default=TELEMETRY_PATH, help="Telemetry JSONL log")
+    args = parser.parse_args()
+
     print("\n=== Gaia Content Generation Stats ===\n")
     
-    total = get_total_articles()
+    catalog = ArticleCatalog(CATALOG_PATH)
+    if catalog.count() == 0 and os.path.exists(DOCS_DIR):
+        catalog.backfill(DOCS_DIR)
+
+    total = get_total_articles(catalog)
     print(f"Total Published Articles: {total}")
     
-    daily = get_daily_stats()
+    daily = get_daily_stats(catalog)
     print(f"Generated Today:        {daily['Today']}")
     print(f"Generated Yesterday:    {daily['Yesterday']}")
     
     show_history()
+    show_telemetry(args.telemetry, runs=args.runs)
     print("\n=====================================")
 
 if __name__ == "__main__":
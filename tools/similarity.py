@@ -0,0 +1,57 @@
+import time
+import argparse
+from src.publisher.similarity import SimilarityIndex, page_text
+from config.settings import SIMILARITY_THRESHOLD
+
+def build(args):
+    index = SimilarityIndex.from_settings()
+    start = time.monotonic()
+    count = index.build(args.docs, workers=args.workers)
+    print(f"Indexed {count} article(s) in {time.monotonic() - start:.1f}s.")
+
+def check(args):
+    index = SimilarityIndex.from_settings()
+    with open(args.file, 'r', encoding='utf-8') as f:
+        text = f.read()
+    # Rendered pages are compared by title and body only, like build() indexes them
+    title, text = page_text(text) or ("", text)
+    start = time.monotonic()
+    matches = index.query(title, text, threshold=args.threshold, exclude=args.exclude)
+    print(f"Checked against {index.count()} article(s) in {(time.monotonic() - start) * 1000:.1f} ms.")
+    if not matches:
+        print("No near-duplicates.")
+    for score, slug, title in matches:
+        print(f"  {score:.0%}  {slug}  {title}")
+
+def pairs(args):
+    index = SimilarityIndex.from_settings()
+    found = index.pairs(threshold=args.threshold)
+    print(f"{len(found)} pair(s) at or above {args.threshold:.0%}:")
+    for score, a, b in found[:args.limit]:
+        print(f"  {score:.0%}  {a}  <->  {b}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate article index")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="Index every published page (parallel)")
+    p_build.add_argument("--docs", default="docs", help="Directory with published pages")
+    p_build.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p_build.set_defaults(func=build)
+
+    p_check = sub.add_parser("check", help="Find published articles similar to a Markdown/HTML file")
+    p_check.add_argument("file")
+    p_check.add_argument("--exclude", help="Slug to ignore (the article itself)")
+    p_check.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD)
+    p_check.set_defaults(func=check)
+
+    p_pairs = sub.add_parser("pairs", help="List near-duplicate pairs already published")
+    p_pairs.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD)
+    p_pairs.add_argument("--limit", type=int, default=30)
+    p_pairs.set_defaults(func=pairs)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+from datetime import datetime
+from src.pipeline.topic_queue import TopicQueue, PENDING, IN_FLIGHT, FAILED
+
+def status(args):
+    queue = TopicQueue.from_settings()
+    added, completed = queue.sync()
+    if added or completed:
+        print(f"Synced: {added} new topic(s), {completed} newly completed.")
+    print(queue.describe())
+    for state in (PENDING, IN_FLIGHT, FAILED):
+        rows = queue.list(state, limit=args.limit)
+        if not rows:
+            continue
+        print(f"\n--- {state} (first {args.limit}) ---")
+        for row in rows:
+            extra = ""
+            if row['attempts']:
+                extra = f"  attempts={row['attempts']} retry at {datetime.fromtimestamp(row['available_at']):%Y-%m-%d %H:%M}"
+                extra += f"  ({row['last_error']})" if row['last_error'] else ""
+            print(f"  [p{row['priority']} w{row['weight']:g}] {row['topic']}{extra}")
+
+def add(args):
+    queue = TopicQueue.from_settings()
+    for topic in args.topics:
+        if queue.add(topic, priority=args.priority, weight=args.weight):
+            print(f"Queued: {topic}")
+        elif args.priority or args.weight != 1.0:
+            queue.set_priority(topic, priority=args.priority, weight=args.weight)
+            print(f"Already queued, priority/weight updated: {topic}")
+        else:
+            print(f"Already known: {topic} ({queue.get(topic)['state']})")
+
+def retry_failed(args):
+    queue = TopicQueue.from_settings()
+    print(f"Re-queued {queue.retry_failed()} failed topic(s).")
+
+def main():
+    parser = argparse.ArgumentParser(description="Gaia topic queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_status = sub.add_parser("status", help="Sync with topics.txt/completion log and show the queue")
+    p_status.add_argument("--limit", type=int, default=10)
+    p_status.set_defaults(func=status)
+
+    p_add = sub.add_parser("add", help="Queue topics (or change priority/weight of queued ones)")
+    p_add.add_argument("topics", nargs="+")
+    p_add.add_argument("--priority", type=int, default=0, help="Higher priorities are always claimed first")
+    p_add.add_argument("--weight", type=float, default=1.0, help="Relative chance within the same priority")
+    p_add.set_defaults(func=add)
+
+    p_retry = sub.add_parser("retry-failed", help="Move failed topics back to pending")
+    p_retry.set_defaults(func=retry_failed)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,195 +1,14 @@
-
-import os
-import re
-from src.publisher.html_generator import HtmlGenerator
-from src.publisher.affiliate import AffiliateInjector
-from config.settings import AMAZON_TAG, RAKUTEN_ID
+from src.publisher.migrations import MigrationEngine
 
 def regenerate_all_articles():
-    gen = HtmlGenerator()
-    injector = AffiliateInjector(amazon_tag=AMAZON_TAG, rakuten_id=RAKUTEN_ID)
-    
-    docs_dir = "docs"
-    files = [f for f in os.listdir(docs_dir) if f.startswith("article_") and f.endswith(".html")]
-    
-    print(f"Found {len(files)} articles to regenerate.")
-    
-    for filename in files:
-        filepath = os.path.join(docs_dir, filename)
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        # Extract Title
-        title_match = re.search(r'<title>(.*?)</title>', content)
-        title = title_match.group(1) if title_match else "Untitled"
-        
-        # Extract body content (between <div class="container">...<div class="footer">)
-        # This is a bit tricky since we already have HTML.
-        # A simpler approach for now might be to just re-wrap the content if we had the original markdown.
-        # But we don't have the original markdown easily accessible for all files (unless we parse the logs or something).
-        # 
-        # ALTERNATIVE:
-        # Since the goal is mainly to add OGP tags and update CSS/layout structure in the <head> and container wrapper,
-        # we can parse the "inner" content of the article and re-pass it to `generate_article`.
-        # The `generate_article` method expects Markdown, but if we pass HTML, standard Markdown parsers often leave it alone or we can wrap it.
-        # 
-        # However, `generate_article` wraps content in `container` and adds `h1`.
-        # Existing files already have `h1` inside `container`.
-        # 
-        # Let's try to extract the "Main Content" excluding H1, Nav, and Footer.
-        
-        # 1. Find start of content: After </h1>
-        # 2. Find end of content: Before <p style='font-size:0.8em
-        
-        start_marker = "</h1>"
-        end_marker = "<div class=\"footer\">"
-        
-        start_idx = content.find(start_marker)
-        end_idx = content.find(end_marker)
-        
-        if start_idx != -1 and end_idx != -1:
-            # Extract everything between H1 and Footer
-            # Note: The original Markdown -> HTML conversion put H1 inside the body.
-            # We want to preserve the inner HTML.
-            
-            # Adjust start index to skip </h1>
-            body_content = content[start_idx + len(start_marker):end_idx].strip()
-            
-            # Remove the old <p style...> attribution if it exists, because generate_article might not add it, 
-            # OR we should check if generate_article adds it. 
-            # Current `generate_article` does NOT add the attribution line automatically in the template, 
-            # it assumes it's in the input or handled by the caller.
-            # But wait, looking at `main.py`, the attribution is appended to the markdown BEFORE calling generate_article.
-            # So the `body_content` we extracted INCLUDES the attribution.
-            
-            # The new `generate_article` template puts `{html_content}` inside `.container`.
-            # And it adds `h1` and `nav` and `footer` automatically.
-            # So if we pass `body_content` as `markdown_content`, it should render okay-ish, 
-            # EXCEPT that `markdown.markdown` might mess up existing HTML if not careful.
-            # But passing raw HTML to `markdown` usually works fine with `extra` extension.
-            
-            # Let's try regenerating one file first to see.
-            
-            # We need to bypass `process_shortcodes` if the content is already processed HTML.
-            # The current `generate_article` calls `process_shortcodes`.
-            # If we pass already-rendered HTML (with `<div class="chat-box">`), 
-            # `process_shortcodes` won't find `[[CHAT...]]` so it will do nothing. That's good.
-            
-            # One issue: `generate_article` takes `markdown_content`.
-            # If we pass HTML string, `markdown.markdown()` will typically return it as is (wrapping in <p> if it looks like text).
-            # To be safe, we might need a flag or separate method, but let's try direct usage.
-            
-            # RE-GENERATION
-            # We will use a temporary method or just manually construct the file using the new template logic
-            # to ensure OGP and everything is correct.
-            
-            # Actually, the cleanest way is to use the `HtmlGenerator` but we need to ensure we don't double-process.
-            
-            # Let's duplicate the logic of `generate_article` here for mass-update allowing HTML input.
-            
-            # OGP Description
-            description = f"{title}に関する詳細記事です。"
-            article_url = f"{gen.base_url}/{filename}"
-            
-            new_html = f"""
-            <!DOCTYPE html>
-            <html lang="ja">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>{title}</title>
-                <meta name="description" content="{description}">
-                <link rel="icon" href="favicon.png" type="image/png">
-                
-                <!-- OGP Tags -->
-                <meta property="og:title" content="{title}" />
-                <meta property="og:type" content="article" />
-                <meta property="og:url" content="{article_url}" />
-                <meta property="og:description" content="{description}" />
-                <meta property="og:site_name" content="Gaia Blog" />
-                <meta property="og:locale" content="ja_JP" />
-
-                <style>
-                    /* Common */
-                    body {{ font-family: 'Helvetica Neue', Arial, sans-serif; line-height: 1.6; max-width: 800px; margin: 0 auto; padding: 20px; color: #333; }}
-                    h1 {{ color: #2c3e50; font-size: 1.8em; margin-bottom: 30px; }}
-                    h2 {{ color: #34495e; border-bottom: 2px solid #ecf0f1; padding-bottom: 10px; margin-top: 40px; font-size: 1.5em; clear: both; }}
-                    h3 {{ color: #2c3e50; margin-top: 30px; font-size: 1.25em; border-left: 5px solid #3498db; padding-left: 10px; }}
-                    a {{ color: #3498db; text-decoration: none; }}
-                    a:hover {{ text-decoration: underline; }}
-                    .container {{ background: #fff; padding: 40px; border-radius: 8px; box-shadow: 0 4px 15px rgba(0,0,0,0.05); }}
-                    .footer {{ margin-top: 60px; padding-top: 20px; border-top: 1px solid #eee; font-size: 0.9em; color: #7f8c8d; text-align: center; }}
-                    .nav {{ margin-bottom: 20px; }}
-
-                    /* Chat Bubble */
-                    .chat-box {{ width: 100%; overflow: hidden; margin-bottom: 20px; }}
-                    .chat-face {{ float: left; margin-right: 15px; text-align: center; width: 60px; }}
-                    .chat-face img {{ width: 50px; height: 50px; border-radius: 50%; border: 2px solid #eee; object-fit: cover; background-color: #ddd; }}
-                    .chat-area {{ float: left; position: relative; width: calc(100% - 90px); }}
-                    .chat-bubble {{ position: relative; display: inline-block; padding: 15px; background: #f0f4f8; border-radius: 10px; }}
-                    .chat-bubble::after {{ content: ''; position: absolute; left: -10px; top: 15px; border-right: 15px solid #f0f4f8; border-top: 10px solid transparent; border-bottom: 10px solid transparent; }}
-                    
-                    /* Right Chat (User) */
-                    .chat-box.right .chat-face {{ float: right; margin-right: 0; margin-left: 15px; }}
-                    .chat-box.right .chat-area {{ float: right; text-align: right; }}
-                    .chat-box.right .chat-bubble {{ background: #e3f2fd; text-align: left; }}
-                    .chat-box.right .chat-bubble::after {{ left: auto; right: -10px; border-right: none; border-left: 15px solid #e3f2fd; }}
-
-                    /* Merit/Demerit Boxes */
-                    .box-common, .merit-box, .demerit-box {{ padding: 20px; border-radius: 5px; margin: 25px 0; border: 1px solid transparent; }}
-                    .box-common {{ background-color: #f9f9f9; border-color: #ddd; }}
-                    .box-common table {{ width: 100%; border-collapse: collapse; margin-top: 15px; }}
-                    .box-common th, .box-common td {{ padding: 10px; border: 1px solid #ddd; text-align: left; }}
-                    .box-common th {{ background-color: #f1f5f9; width: 30%; color: #334155; }}
-                    .merit-box {{ background-color: #f0f9ff; border-color: #bae6fd; color: #0369a1; }}
-                    .merit-box::before {{ content: '✅ メリット'; display: block; font-weight: bold; margin-bottom: 10px; font-size: 1.1em; }}
-                    .demerit-box {{ background-color: #fef2f2; border-color: #fecaca; color: #b91c1c; }}
-                    .demerit-box::before {{ content: '⚠️ デメリット・注意点'; display: block; font-weight: bold; margin-bottom: 10px; font-size: 1.1em; }}
-
-                    /* Rating */
-                    .rating-box {{ display: flex; align-items: center; margin-bottom: 20px; font-weight: bold; background: #fffbeb; padding: 10px; border-radius: 5px; }}
-                    .stars {{ color: #f59e0b; font-size: 1.2em; margin-left: 10px; letter-spacing: 2px; }}
-
-                    /* Product Card (Amazon/Rakuten Style) */
-                    .product-card {{ display: flex; border: 1px solid #e5e7eb; border-radius: 8px; overflow: hidden; margin: 30px 0; box-shadow: 0 4px 6px -1px rgba(0,0,0,0.1); transition: transform 0.2s; }}
-                    .product-card:hover {{ transform: translateY(-2px); box-shadow: 0 10px 15px -3px rgba(0,0,0,0.1); }}
-                    .product-img {{ width: 120px; background: #f3f4f6; display: flex; align-items: center; justify-content: center; font-size: 2em; color: #9ca3af; min-height: 120px; text-align: center; }}
-                    .product-info {{ padding: 20px; flex: 1; display: flex; flex-direction: column; justify-content: center; }}
-                    .product-title {{ font-weight: bold; font-size: 1.1em; margin-bottom: 5px; color: #1f2937; }}
-                    .product-btn-group {{ margin-top: 15px; display: flex; gap: 10px; }}
-                    .btn {{ display: inline-block; padding: 10px 20px; border-radius: 4px; color: #fff; font-weight: bold; text-align: center; font-size: 0.9em; flex: 1; max-width: 150px; text-decoration: none; }}
-                    .btn-amazon {{ background-color: #f9ce56; color: #111; }}
-                    .btn-rakuten {{ background-color: #bf0000; }}
-                    .btn:hover {{ opacity: 0.9; text-decoration: none; }}
-
-                    /* Clearfix for floats */
-                    .clearfix::after {{ content: ""; clear: both; display: table; }}
-
-                    /* Responsive */
-                    @media (max-width: 600px) {{
-                        .product-card {{ flex-direction: column; }}
-                        .product-img {{ width: 100%; height: 150px; }}
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="nav"><a href="index.html">← Top Page</a></div>
-                    <h1>{title}</h1>
-                    {body_content}
-                    <div class="footer">
-                        <p>&copy; 2026 Gaia Automated Content. All rights reserved.</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(new_html)
-            print(f"Updated: {filename}")
-        else:
-            print(f"Skipping {filename} (structure not matched)")
+    """
+    Re-wraps published articles in the current layout (migration v2,
+    after the v1 favicon pass). Pages stamped as migrated are skipped.
+    """
+    engine = MigrationEngine("docs")
+    engine.run(target=2, apply=True)
+    for line in engine.report(apply=True):
+        print(line)
 
 if __name__ == "__main__":
     regenerate_all_articles()